@@ -0,0 +1,314 @@
+"""
+Книга позиций chess_my: какие ходы и с каким итогом делались в позиции в записанных партиях.
+
+Начальная расстановка одна (Board.setup_pieces), поэтому первые полуходы всех партий
+проходят через небольшое дерево позиций. Книга строится заранее из партий (JSONL selfplay.py,
+текстовые архивы replay.py или двоичные архивы gamefile.py) и хранит первые max_plies
+полуходов каждой партии.
+
+Файл: заголовок (MAGIC, число записей, max_plies) и записи фиксированной длины, отсортированные
+по Zobrist-ключу позиции (Board.zobrist_key, ключи одинаковы при каждом запуске):
+ключ (uint64), ход from | to << 6 (uint16), сколько раз сыгран (uint32), сумма результатов
+для сделавшего ход (+1 выигрыш, -1 проигрыш, int32). Книга читается через mmap, позиция
+ищется двоичным поиском; OpeningBook считает обращения и попадания.
+
+Пример:
+    python selfplay.py chess --games 20000 --white greedy --black greedy --out games.jsonl
+    python book.py build games.jsonl --out opening.cbk --max-plies 12
+    python book.py show opening.cbk --moves b2b4 g7g5
+    python book.py hitrate opening.cbk other_games.jsonl
+    python chess_my.py --book opening.cbk
+"""
+import argparse
+import json
+import mmap
+import struct
+import sys
+import time
+
+from chess_my import COORDS, Board, encode_move
+
+MAGIC = b"CBK1"
+HEADER = struct.Struct("<4sIH2x")
+ENTRY = struct.Struct("<QHIi")
+# Сколько полуходов от начала партии попадает в книгу по умолчанию
+MAX_PLIES = 16
+# Сколько раз ход должен быть сыгран, чтобы попасть в книгу и чтобы его играл поисковик
+MIN_COUNT = 3
+# Результат партии для белых
+RESULT_SCORES = {'1-0': 1, '0-1': -1, '1/2-1/2': 0}
+
+
+def read_games(path):
+    """
+    Генератор (ходы, результат для белых) из файла партий: .cmg (gamefile.py) или строки
+    JSON selfplay.py / текстовые строки ходов (replay.py). Если результат неизвестен — 0.
+    Испорченные строки пропускаются с сообщением в stderr.
+    :param path:
+    :return:
+    """
+    if path.endswith('.cmg'):
+        from gamefile import GameArchive
+
+        with GameArchive(path) as archive:
+            for game in range(len(archive)):
+                # Ходы архива уже проверены; начальная позиция должна быть стандартной
+                if archive.entry(game)[2]:
+                    continue
+                yield [(COORDS[move & 63], COORDS[(move >> 6) & 63]) for move in archive.moves(game)], 0
+        return
+
+    from replay import parse_line, parse_move
+
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            result = 0
+            try:
+                texts = parse_line(line)
+            except ValueError as error:
+                # Как replay.iter_games: испорченная строка не останавливает чтение остальных
+                print(f"{path}, строка {line_number}: партия пропущена ({error}).", file=sys.stderr)
+                continue
+            if texts is None:
+                continue
+            if line.lstrip().startswith('{'):
+                result = RESULT_SCORES.get(json.loads(line).get('result'), 0)
+            else:
+                for score_text, score in RESULT_SCORES.items():
+                    if line.rstrip().endswith(score_text):
+                        result = score
+            yield [parse_move(text) for text in texts], result
+
+
+def collect(games, max_plies=MAX_PLIES):
+    """
+    Счётчики {(ключ позиции, упакованный ход): [сколько раз, сумма результатов]} по первым
+    max_plies полуходам партий. Партия обрывается на первом недопустимом ходе.
+    :param games: (ходы (start, end), результат для белых)
+    :param max_plies:
+    :return: (счётчики, число партий, число пропущенных ходов-ошибок)
+    """
+    stats = {}
+    played = invalid = 0
+    for moves, result in games:
+        played += 1
+        board = Board()
+        for move in moves[:max_plies]:
+            if move is None or not board.is_valid_move(move[0], move[1], board.turn)[0]:
+                invalid += 1
+                break
+            start, end = move
+            key = (board.zobrist_key, encode_move(start[0] * 8 + start[1], end[0] * 8 + end[1]))
+            entry = stats.get(key)
+            if entry is None:
+                entry = stats[key] = [0, 0]
+            entry[0] += 1
+            entry[1] += result if board.turn == 'white' else -result
+            board.make_move(start, end)
+    return stats, played, invalid
+
+
+def write_book(stats, path, max_plies=MAX_PLIES, min_count=MIN_COUNT):
+    """
+    Пишет отсортированный файл книги. Ходы, сыгранные реже min_count раз, отбрасываются.
+    :return: число записей
+    """
+    entries = sorted(((key, move, count, score) for (key, move), (count, score) in stats.items()
+                      if count >= min_count), key=lambda entry: (entry[0], -entry[2]))
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(entries), max_plies))
+        for entry in entries:
+            f.write(ENTRY.pack(*entry))
+    return len(entries)
+
+
+class BookMove:
+    """
+    Ход из книги: (start, end), сколько раз сыгран и средний результат для сделавшего ход (-1..1).
+    """
+    __slots__ = ('move', 'count', 'score')
+
+    def __init__(self, move, count, score):
+        self.move = move
+        self.count = count
+        self.score = score
+
+    @property
+    def average(self):
+        return self.score / self.count if self.count else 0.0
+
+    def __repr__(self):
+        return f"BookMove({self.move}, count={self.count}, average={self.average:+.2f})"
+
+
+class OpeningBook:
+    """
+    Книга позиций только для чтения (через mmap). lookup — двоичный поиск по ключу позиции.
+    search отдаёт ход книги, только если он сыгран не меньше min_count раз и в среднем
+    не проигрывает (средний результат не ниже min_average); иначе позиция анализируется поиском.
+    """
+    def __init__(self, path, min_count=MIN_COUNT, min_average=0.0):
+        self.path = path
+        self.min_count = min_count
+        self.min_average = min_average
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, self.max_plies = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or len(self.data) != HEADER.size + self.count * ENTRY.size:
+            self.close()
+            raise ValueError(f"{path}: это не файл книги позиций.")
+        self.lookups = 0
+        self.hits = 0
+
+    def _key_at(self, position):
+        return struct.unpack_from("<Q", self.data, HEADER.size + position * ENTRY.size)[0]
+
+    def lookup(self, board):
+        """
+        Ходы книги для позиции на доске, самые частые первыми; пустой список, если позиции нет.
+        Ходы, недопустимые в позиции (коллизия ключей), отбрасываются.
+        :param board:
+        :return: список BookMove
+        """
+        key = board.zobrist_key
+        self.lookups += 1
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        moves = []
+        position = low
+        while position < self.count:
+            entry_key, move, count, score = ENTRY.unpack_from(self.data, HEADER.size + position * ENTRY.size)
+            if entry_key != key:
+                break
+            start, end = COORDS[move & 63], COORDS[(move >> 6) & 63]
+            if board.is_valid_move(start, end, board.turn)[0]:
+                moves.append(BookMove((start, end), count, score))
+            position += 1
+        if moves:
+            self.hits += 1
+        return moves
+
+    def search(self, board):
+        """
+        Самый частый из надёжных ходов книги (см. min_count и min_average) в виде
+        chess_engine.SearchResult или None, если такого хода нет.
+        Книга не оценивает позицию, поэтому оценка в результате — 0.
+        """
+        from chess_engine import SearchResult
+
+        started = time.perf_counter()
+        moves = [entry for entry in self.lookup(board)
+                 if entry.count >= self.min_count and entry.average >= self.min_average]
+        if not moves:
+            return None
+        best = moves[0]
+        return SearchResult(best.move, 0, 0, 0, time.perf_counter() - started, (best.move,))
+
+    @property
+    def hit_rate(self):
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def stats(self):
+        return {'entries': self.count, 'max_plies': self.max_plies, 'lookups': self.lookups,
+                'hits': self.hits, 'hit_rate': self.hit_rate}
+
+    def close(self):
+        if self.data is not None:
+            self.data.close()
+            self.data = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def measure_hit_rate(book, games, max_plies=None):
+    """
+    Доля попаданий книги по полуходам партий: на каждом полуходе до max_plies
+    (по умолчанию — глубина книги) позиция ищется в книге, затем делается ход партии.
+    :return: (попаданий по полуходам, обращений по полуходам)
+    """
+    max_plies = book.max_plies if max_plies is None else max_plies
+    hits = [0] * max_plies
+    lookups = [0] * max_plies
+    for moves, _ in games:
+        board = Board()
+        for ply, move in enumerate(moves[:max_plies]):
+            if move is None or not board.is_valid_move(move[0], move[1], board.turn)[0]:
+                break
+            lookups[ply] += 1
+            if book.lookup(board):
+                hits[ply] += 1
+            board.make_move(*move)
+    return hits, lookups
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Книга позиций chess_my.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help="построить книгу из партий")
+    build.add_argument('sources', nargs='+', help="файлы партий: .jsonl, текст или .cmg")
+    build.add_argument('--out', required=True)
+    build.add_argument('--max-plies', type=int, default=MAX_PLIES)
+    build.add_argument('--min-count', type=int, default=MIN_COUNT, help="не брать ходы, сыгранные реже")
+    show = commands.add_parser('show', help="ходы книги в позиции")
+    show.add_argument('book')
+    show.add_argument('--fen', help="позиция (по умолчанию — начальная)")
+    show.add_argument('--moves', nargs='*', default=(), help="ходы от позиции, например b2b4 g7g5")
+    hitrate = commands.add_parser('hitrate', help="доля попаданий книги по полуходам партий")
+    hitrate.add_argument('book')
+    hitrate.add_argument('games', nargs='+')
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        started = time.perf_counter()
+        stats = {}
+        played = invalid = 0
+        for source in args.sources:
+            part, count, errors = collect(read_games(source), args.max_plies)
+            for key, (times, score) in part.items():
+                entry = stats.setdefault(key, [0, 0])
+                entry[0] += times
+                entry[1] += score
+            played += count
+            invalid += errors
+        entries = write_book(stats, args.out, args.max_plies, args.min_count)
+        print(f"{played} партий ({invalid} с ошибками), {entries} записей за "
+              f"{time.perf_counter() - started:.1f} с", file=sys.stderr)
+        return
+
+    with OpeningBook(args.book) as book:
+        if args.command == 'show':
+            from perft import apply_moves, move_to_str
+
+            board = Board.from_fen(args.fen) if args.fen else Board()
+            apply_moves(board, args.moves, board.turn)
+            moves = book.lookup(board)
+            if not moves:
+                print("Позиции нет в книге.")
+            for entry in moves:
+                print(f"{move_to_str(entry.move)}: {entry.count} раз, средний результат {entry.average:+.2f}")
+            return
+        hits = lookups = None
+        for source in args.games:
+            part_hits, part_lookups = measure_hit_rate(book, read_games(source))
+            hits = part_hits if hits is None else [a + b for a, b in zip(hits, part_hits)]
+            lookups = part_lookups if lookups is None else [a + b for a, b in zip(lookups, part_lookups)]
+        for ply, (hit, total) in enumerate(zip(hits, lookups)):
+            if total:
+                print(f"полуход {ply + 1}: {hit}/{total} ({hit / total:.1%})")
+        print(json.dumps(book.stats()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+"""
+Битбордовое представление доски checkers_my на 32 тёмных клетках.
+
+Шашки стоят только на клетках с (row + col) % 2 == 1, поэтому каждая тёмная клетка получает
+номер row * 4 + col // 2 (0..31, row=0 — 8-я горизонталь, как в checkers_my), а позиция —
+три 32-битных числа: белые, чёрные и дамки. Тихие ходы и одиночные взятия шашек считаются
+сразу для всех шашек сдвигами битбордов, цепочки взятий — поиском в глубину по битам,
+без изменения доски. Правила совпадают с checkers_my (обязательное взятие, шашки ходят
+и бьют вперёд, дальнобойные дамки, турецкий удар); это проверяет режим сверки:
+    python checkers_bitboard.py --cross-check --games 200
+Perft: python perft.py checkers --board bitboard --depth 8
+"""
+import argparse
+import random
+import time
+from collections import Counter
+
+import checkers_my
+from checkers_my import Checker, KingChecker, DIRECTIONS, ZOBRIST_KEYS, ZOBRIST_BLACK_TO_MOVE
+
+WHITE, BLACK = 0, 1
+COLORS = ('white', 'black')
+
+FULL = (1 << 32) - 1
+
+# Номер тёмной клетки -> (row, col) и обратно
+SQUARE_COORDS = tuple((row, 2 * k + (1 if row % 2 == 0 else 0)) for row in range(8) for k in range(4))
+SQUARE_INDEX = {coords: square for square, coords in enumerate(SQUARE_COORDS)}
+BITS = tuple(1 << square for square in range(32))
+
+EVEN_ROWS = sum(BITS[square] for square, (row, _) in enumerate(SQUARE_COORDS) if row % 2 == 0)
+ODD_ROWS = FULL ^ EVEN_ROWS
+NOT_LEFT = FULL ^ sum(BITS[square] for square, (_, col) in enumerate(SQUARE_COORDS) if col == 0)
+NOT_RIGHT = FULL ^ sum(BITS[square] for square, (_, col) in enumerate(SQUARE_COORDS) if col == 7)
+# Горизонтали превращения: для белых 8-я (row=0), для чёрных 1-я (row=7)
+PROMOTION_ROWS = (sum(BITS[square] for square in range(4)), sum(BITS[square] for square in range(28, 32)))
+
+# Направления — в том же порядке, что checkers_my.DIRECTIONS: вверх-влево, вверх-вправо,
+# вниз-влево, вниз-вправо. Вперёд для белых — первые два, для чёрных — последние два.
+UP_LEFT, UP_RIGHT, DOWN_LEFT, DOWN_RIGHT = range(4)
+FORWARD = ((UP_LEFT, UP_RIGHT), (DOWN_LEFT, DOWN_RIGHT))
+OPPOSITE_DIRECTION = (DOWN_RIGHT, DOWN_LEFT, UP_RIGHT, UP_LEFT)
+
+
+# Ключи Zobrist по номеру клетки для шашки/дамки каждого цвета — те же числа, что у checkers_my.Board
+WHITE_MAN, BLACK_MAN, WHITE_KING, BLACK_KING = range(4)
+SQUARE_KEYS = tuple(tuple(ZOBRIST_KEYS[(piece_type, color)][row * 8 + col] for row, col in SQUARE_COORDS)
+                    for piece_type, color in ((Checker, 'white'), (Checker, 'black'),
+                                              (KingChecker, 'white'), (KingChecker, 'black')))
+
+
+def _ray(square, direction):
+    row, col = SQUARE_COORDS[square]
+    dr, dc = DIRECTIONS[direction]
+    ray = []
+    row, col = row + dr, col + dc
+    while 0 <= row < 8 and 0 <= col < 8:
+        ray.append(SQUARE_INDEX[(row, col)])
+        row, col = row + dr, col + dc
+    return tuple(ray)
+
+
+# RAYS[direction][square] — клетки по диагонали от square; соседняя клетка — первая в луче (или её нет)
+RAYS = tuple(tuple(_ray(square, direction) for square in range(32)) for direction in range(4))
+
+
+def shift(bits, direction):
+    """
+    Сдвигает все биты на одну клетку по диагонали direction (ушедшие за край доски пропадают).
+    На чётных и нечётных горизонталях соседние клетки отличаются на разное число номеров.
+    :param bits:
+    :param direction:
+    :return:
+    """
+    if direction == UP_LEFT:
+        return ((bits & EVEN_ROWS) >> 4) | ((bits & ODD_ROWS & NOT_LEFT) >> 5)
+    if direction == UP_RIGHT:
+        return ((bits & EVEN_ROWS & NOT_RIGHT) >> 3) | ((bits & ODD_ROWS) >> 4)
+    if direction == DOWN_LEFT:
+        return (((bits & EVEN_ROWS) << 4) | ((bits & ODD_ROWS & NOT_LEFT) << 3)) & FULL
+    return (((bits & EVEN_ROWS & NOT_RIGHT) << 5) | ((bits & ODD_ROWS) << 4)) & FULL
+
+
+def iter_bits(bitboard):
+    """
+    Перебирает номера установленных битов от младшего к старшему.
+    :param bitboard:
+    :return:
+    """
+    while bitboard:
+        bit = bitboard & -bitboard
+        yield bit.bit_length() - 1
+        bitboard ^= bit
+
+
+class CheckersBitboard:
+    """
+    Доска шашек из трёх битбордов: white, black — все шашки цвета, kings — дамки обоих цветов.
+    Ход — кортеж (from_square, to_square, captured), где captured — битборд снимаемых шашек.
+    key — Zobrist-хеш позиции с учётом очереди хода, обновляется в make_move.
+    """
+    # Как переводить номера клеток ходов в (row, col) (см. perft.move_to_str)
+    SQUARE_COORDS = SQUARE_COORDS
+
+    def __init__(self):
+        self.white = 0
+        self.black = 0
+        self.kings = 0
+        self.turn = 'white'
+        self.key = 0
+
+    @classmethod
+    def from_board(cls, board):
+        """
+        Строит битбордовую доску по checkers_my.Board.
+        :param board:
+        :return:
+        """
+        bitboard_board = cls()
+        for pos, piece in board.grid.items():
+            bit = BITS[SQUARE_INDEX[pos]]
+            if piece.color == 'white':
+                bitboard_board.white |= bit
+            else:
+                bitboard_board.black |= bit
+            if isinstance(piece, KingChecker):
+                bitboard_board.kings |= bit
+        bitboard_board.turn = board.turn
+        bitboard_board.key = board.zobrist_key
+        return bitboard_board
+
+    @classmethod
+    def from_fen(cls, fen):
+        return cls.from_board(checkers_my.Board.from_fen(fen))
+
+    def to_board(self):
+        """
+        Обратное преобразование в checkers_my.Board.
+        :return:
+        """
+        board = checkers_my.Board(setup=False)
+        for color, bits in ((WHITE, self.white), (BLACK, self.black)):
+            for square in iter_bits(bits):
+                piece_type = KingChecker if self.kings & BITS[square] else Checker
+                board.grid[SQUARE_COORDS[square]] = piece_type(COLORS[color])
+        board.turn = self.turn
+        return board
+
+    def to_fen(self):
+        return self.to_board().to_fen()
+
+    def copy(self):
+        board = CheckersBitboard()
+        board.white, board.black, board.kings, board.turn, board.key = \
+            self.white, self.black, self.kings, self.turn, self.key
+        return board
+
+    @property
+    def zobrist_key(self):
+        return self.key
+
+    def piece_count(self):
+        return bin(self.white | self.black).count("1")
+
+    def generate_moves(self, color):
+        """
+        Все ходы цвета color списком (from_square, to_square, captured).
+        Как в checkers_my, взятие обязательно, а цепочка взятий продолжается до конца.
+        :param color: 'white'/'black' или WHITE/BLACK
+        :return:
+        """
+        if isinstance(color, str):
+            color = COLORS.index(color)
+        own, enemy = (self.white, self.black) if color == WHITE else (self.black, self.white)
+        occupied = self.white | self.black
+        empty = FULL ^ occupied
+        men = own & ~self.kings
+        kings = own & self.kings
+        forward = FORWARD[color]
+
+        # Какие шашки могут бить: сдвиг через врага на пустую клетку и обратно — сразу для всех шашек
+        jumpers = kings
+        for direction in forward:
+            landing = shift(shift(men, direction) & enemy, direction) & empty
+            back = OPPOSITE_DIRECTION[direction]
+            jumpers |= shift(shift(landing, back), back)
+        if jumpers:
+            captures = []
+            for square in iter_bits(jumpers):
+                is_king = bool(kings & BITS[square])
+                self._extend_chains(square, square, is_king, forward, enemy, occupied ^ BITS[square], 0, captures)
+            if captures:
+                return captures
+
+        moves = []
+        for direction in forward:
+            back = OPPOSITE_DIRECTION[direction]
+            neighbors = RAYS[back]
+            for to_square in iter_bits(shift(men, direction) & empty):
+                moves.append((neighbors[to_square][0], to_square, 0))
+        for square in iter_bits(kings):
+            for direction in range(4):
+                for to_square in RAYS[direction][square]:
+                    if occupied & BITS[to_square]:
+                        break
+                    moves.append((square, to_square, 0))
+        return moves
+
+    def _extend_chains(self, start, square, is_king, forward, enemy, occupied, captured, captures):
+        """
+        Продолжает цепочку взятий из square. Ходящая шашка снята с доски (её нет в occupied),
+        взятые шашки остаются в occupied до конца хода, но повторно их бить нельзя.
+        Возвращает True, если с square есть хотя бы одно взятие.
+        """
+        found = False
+        for direction in (range(4) if is_king else forward):
+            ray = RAYS[direction][square]
+            if is_king:
+                # Дамка: первая фигура на диагонали, за ней — любые свободные клетки до следующей
+                for index, victim in enumerate(ray):
+                    if occupied & BITS[victim]:
+                        break
+                else:
+                    continue
+                lands = []
+                for land in ray[index + 1:]:
+                    if occupied & BITS[land]:
+                        break
+                    lands.append(land)
+            else:
+                if len(ray) < 2 or occupied & BITS[ray[1]]:
+                    continue
+                victim = ray[0]
+                lands = (ray[1],)
+            victim_bit = BITS[victim]
+            if not enemy & victim_bit or captured & victim_bit or not lands:
+                continue
+            found = True
+            taken = captured | victim_bit
+            final = []
+            continued = False
+            for land in lands:
+                if self._extend_chains(start, land, is_king, forward, enemy, occupied, taken, captures):
+                    continued = True
+                else:
+                    final.append(land)
+            # Если взятие продолжается хоть с одной клетки, остановиться на других нельзя
+            if not continued:
+                for land in final:
+                    captures.append((start, land, taken))
+        return found
+
+    def make_move(self, from_square, to_square, captured=0):
+        """
+        Делает ход и возвращает состояние для unmake_move — сами три битборда, очередь хода и ключ.
+        :param from_square:
+        :param to_square:
+        :param captured: битборд снимаемых шашек
+        :return:
+        """
+        undo = (self.white, self.black, self.kings, self.turn, self.key)
+        from_bit = BITS[from_square]
+        to_bit = BITS[to_square]
+        white_moves = bool(self.white & from_bit)
+        is_king = bool(self.kings & from_bit)
+        kind = (WHITE_MAN if white_moves else BLACK_MAN) + (2 if is_king else 0)
+        key = self.key ^ ZOBRIST_BLACK_TO_MOVE ^ SQUARE_KEYS[kind][from_square]
+        for square in iter_bits(captured):
+            key ^= SQUARE_KEYS[(BLACK_MAN if white_moves else WHITE_MAN)
+                               + (2 if self.kings & BITS[square] else 0)][square]
+        # Не через XOR: цепочка дамки может закончиться на исходной клетке
+        if white_moves:
+            self.white = (self.white & ~from_bit) | to_bit
+            self.black &= ~captured
+        else:
+            self.black = (self.black & ~from_bit) | to_bit
+            self.white &= ~captured
+        kings = self.kings & ~captured
+        if is_king:
+            kings = (kings & ~from_bit) | to_bit
+        elif to_bit & PROMOTION_ROWS[WHITE if white_moves else BLACK]:
+            kings |= to_bit
+            kind += 2
+        self.kings = kings
+        self.key = key ^ SQUARE_KEYS[kind][to_square]
+        self.turn = 'black' if self.turn == 'white' else 'white'
+        return undo
+
+    def unmake_move(self, undo):
+        self.white, self.black, self.kings, self.turn, self.key = undo
+
+
+def board_move(move):
+    """
+    Ход CheckersBitboard -> ход checkers_my.Board: (start, end, captured) в клетках (row, col).
+    :param move:
+    :return:
+    """
+    from_square, to_square, captured = move
+    return (SQUARE_COORDS[from_square], SQUARE_COORDS[to_square],
+            tuple(SQUARE_COORDS[square] for square in iter_bits(captured)))
+
+
+def move_key(start, end, captured):
+    """
+    Ход в сравнимом виде для сверки: ((row, col) начала, (row, col) конца, frozenset клеток снятых шашек).
+    """
+    return start, end, frozenset(captured)
+
+
+def bitboard_move_key(move):
+    from_square, to_square, captured = move
+    return move_key(SQUARE_COORDS[from_square], SQUARE_COORDS[to_square],
+                    (SQUARE_COORDS[square] for square in iter_bits(captured)))
+
+
+def cross_check(board, bitboard_board=None):
+    """
+    Сравнивает ходы checkers_my (Checker/KingChecker через Board.generate_moves) с битбордовым
+    генератором для обоих цветов. Ходы сравниваются как мультимножества: разные порядки
+    взятия одних и тех же шашек — разные ходы.
+    :param board: checkers_my.Board
+    :param bitboard_board: CheckersBitboard той же позиции (по умолчанию строится из board)
+    :return: список расхождений (цвет, лишние в checkers_my, лишние в битбордах); пустой — всё совпало
+    """
+    if bitboard_board is None:
+        bitboard_board = CheckersBitboard.from_board(board)
+    mismatches = []
+    for color in COLORS:
+        expected = Counter(move_key(*move) for move in board.generate_moves(color))
+        actual = Counter(bitboard_move_key(move) for move in bitboard_board.generate_moves(color))
+        if expected != actual:
+            mismatches.append((color, sorted(expected - actual), sorted(actual - expected)))
+    return mismatches
+
+
+def random_position(rng, pieces=12):
+    """
+    Случайная позиция для сверки: шашки и дамки обоих цветов на случайных тёмных клетках
+    (шашки — не на своей горизонтали превращения).
+    """
+    board = checkers_my.Board(setup=False)
+    squares = rng.sample(range(32), pieces)
+    for square in squares:
+        color = rng.choice(COLORS)
+        row = SQUARE_COORDS[square][0]
+        on_last_row = row == (0 if color == 'white' else 7)
+        piece_type = KingChecker if on_last_row or rng.random() < 0.3 else Checker
+        board.grid[SQUARE_COORDS[square]] = piece_type(color)
+    return board
+
+
+def random_cross_check(games=100, max_plies=200, seed=0):
+    """
+    Играет случайные партии одновременно на checkers_my.Board и CheckersBitboard и после
+    каждого хода сверяет генераторы и расстановку. Половина партий начинается со случайной
+    позиции с дамками, чтобы проверить дальнобойные взятия.
+    :return: количество проверенных позиций
+    """
+    rng = random.Random(seed)
+    positions = 0
+    for game in range(games):
+        board = checkers_my.Board() if game % 2 == 0 else random_position(rng, rng.randint(4, 16))
+        bitboard_board = CheckersBitboard.from_board(board)
+        color = 'white'
+        for ply in range(max_plies):
+            mismatches = cross_check(board, bitboard_board)
+            if mismatches:
+                raise AssertionError(f"Партия {game}, полуход {ply}, {board.to_fen()}: {mismatches[0]}")
+            positions += 1
+            moves = bitboard_board.generate_moves(color)
+            if not moves:
+                break
+            move = rng.choice(moves)
+            start, end, captured = bitboard_move_key(move)
+            for candidate in board.generate_moves(color):
+                if move_key(*candidate) == (start, end, captured):
+                    board.make_move(*candidate)
+                    break
+            bitboard_board.make_move(*move)
+            if board.to_fen() != bitboard_board.to_fen() or board.zobrist_key != bitboard_board.key:
+                raise AssertionError(f"Партия {game}, полуход {ply}: расстановка разошлась")
+            color = 'black' if color == 'white' else 'white'
+    return positions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Битбордовый генератор ходов checkers_my.")
+    parser.add_argument('--cross-check', action='store_true',
+                        help="сверить генератор с checkers_my на случайных партиях")
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.cross_check:
+        started = time.perf_counter()
+        checked = random_cross_check(args.games, seed=args.seed)
+        print(f"Сверка пройдена: {checked} позиций за {time.perf_counter() - started:.2f} с.")
+    else:
+        parser.print_help()
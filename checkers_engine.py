@@ -0,0 +1,391 @@
+"""
+Анализ позиций checkers_my: альфа-бета поиск с итеративным углублением, таблицей транспозиций
+и точным решением окончаний с малым числом шашек.
+
+Поиск ходит по CheckersBitboard (make_move/unmake_move без копий доски). Оценка — материал
+(дамка дороже шашки) и продвижение шашек к превращению. Взятие в шашках обязательно, поэтому
+на листьях позиция со взятием доигрывается, пока не станет спокойной.
+
+Окончания, где на доске не больше ENDGAME_PIECES шашек, сначала решаются точно: поиск без
+оценочной функции, только до конца партии (проигрывает тот, кому нечем ходить). Доказанный
+выигрыш или проигрыш запоминается в Engine.endgames по Zobrist-ключу позиции — и для корня,
+и для всех доказанных по пути позиций, — поэтому повторные окончания (а они в партиях
+повторяются постоянно) решаются мгновенно, в том числе внутри обычного поиска.
+Позиция, в которой за SOLVE_PLIES полуходов никто не выигрывает, считается ничейной.
+"""
+import time
+
+from checkers_bitboard import CheckersBitboard, board_move, iter_bits
+from chess_engine import SearchResult, SearchTimeout, MATE_SCORE, INFINITY, MAX_PLY
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+
+MAN_VALUE = 100
+KING_VALUE = 300
+# Бонус за каждую горизонталь, пройденную шашкой к превращению
+ADVANCE_BONUS = 4
+
+# Сколько шашек (всего на доске) может быть в окончании, которое решается точно
+ENDGAME_PIECES = 6
+# Горизонт точного решения в полуходах
+SOLVE_PLIES = 32
+# Предел размера кэша решённых окончаний (при переполнении он очищается)
+ENDGAME_CACHE_LIMIT = 1 << 20
+
+# Оценка с модулем не меньше WIN_THRESHOLD — доказанный выигрыш или проигрыш
+WIN_THRESHOLD = MATE_SCORE - MAX_PLY
+
+
+def evaluate(board):
+    """
+    Статическая оценка позиции CheckersBitboard с точки зрения того, чей ход (board.turn).
+    :param board:
+    :return:
+    """
+    kings = board.kings
+    white_men = board.white & ~kings
+    black_men = board.black & ~kings
+    score = (MAN_VALUE * (bin(white_men).count("1") - bin(black_men).count("1"))
+             + KING_VALUE * (bin(board.white & kings).count("1") - bin(board.black & kings).count("1")))
+    # Номер клетки — row * 4 + col // 2: белые идут к row=0, чёрные к row=7
+    for square in iter_bits(white_men):
+        score += ADVANCE_BONUS * (7 - square // 4)
+    for square in iter_bits(black_men):
+        score -= ADVANCE_BONUS * (square // 4)
+    return score if board.turn == 'white' else -score
+
+
+def _to_table(score, ply):
+    """
+    Доказанная оценка узла на глубине ply -> оценка относительно самого узла
+    (для endgames и таблиц транспозиций). Недоказанные оценки не меняются.
+    """
+    if score >= WIN_THRESHOLD:
+        return score + ply
+    if score <= -WIN_THRESHOLD:
+        return score - ply
+    return score
+
+
+def _from_table(score, ply):
+    if score >= WIN_THRESHOLD:
+        return score - ply
+    if score <= -WIN_THRESHOLD:
+        return score + ply
+    return score
+
+
+class Engine:
+    """
+    Поисковик для шашек. Таблица транспозиций и кэш решённых окончаний сохраняются
+    между вызовами search.
+    """
+    # Как часто (в узлах) проверять, не вышло ли время
+    CHECK_EVERY = 1024
+
+    def __init__(self, tt_size=1 << 18):
+        self.tt = TranspositionTable(tt_size)
+        # Отдельная таблица для точного решения: там оценки без оценочной функции
+        self.solve_tt = TranspositionTable(tt_size)
+        self.endgames = {} # {Zobrist-ключ: доказанная оценка относительно позиции}
+        # {ключ: глубина, до которой окончание просчитано без результата}; SOLVE_PLIES — ничья
+        self.horizons = {}
+        self.nodes = 0
+        self.deadline = None
+        self.endgame_hits = 0
+
+    def search(self, board, time_limit=1.0, max_depth=MAX_PLY - 1, on_iteration=None):
+        """
+        Лучший ход для стороны board.turn. В окончании сначала пробует точное решение
+        (из кэша — мгновенно), иначе — итеративное углубление до max_depth или пока не выйдет время.
+        :param board: checkers_my.Board или CheckersBitboard (доска не меняется)
+        :param time_limit: бюджет времени в секундах (None — без ограничения)
+        :param max_depth:
+        :param on_iteration: вызывается с SearchResult после каждой завершённой глубины
+        :return: SearchResult; ход — в виде checkers_my (start, end, captured); move = None, если ходов нет
+        """
+        started = time.perf_counter()
+        self.deadline = started + time_limit if time_limit is not None else None
+        self.nodes = 0
+        self.tt.new_search()
+        # Ищем на своей копии: доска вызывающего не меняется даже при прерывании по времени
+        if isinstance(board, CheckersBitboard):
+            board = board.copy()
+        else:
+            board = CheckersBitboard.from_board(board)
+
+        moves = board.generate_moves(board.turn)
+        if not moves:
+            return SearchResult(None, -MATE_SCORE, 0, 0, 0.0)
+
+        if board.piece_count() <= ENDGAME_PIECES:
+            # На точное решение — не больше половины времени, остальное — обычному поиску
+            deadline = self.deadline
+            if time_limit is not None:
+                self.deadline = started + time_limit / 2
+            solved = self.solve(board)
+            self.deadline = deadline
+            if solved is not None:
+                score, move, depth = solved
+                return SearchResult(board_move(move), score, depth, self.nodes,
+                                    time.perf_counter() - started, (board_move(move),))
+
+        result = SearchResult(board_move(moves[0]), 0, 0, 0, 0.0, (board_move(moves[0]),))
+        for depth in range(1, max_depth + 1):
+            try:
+                score, move = self._root(board, moves, depth, self._alpha_beta)
+            except SearchTimeout:
+                break
+            elapsed = time.perf_counter() - started
+            result = SearchResult(board_move(move), score, depth, self.nodes, elapsed,
+                                  self.principal_variation(board, depth, move))
+            if on_iteration is not None:
+                on_iteration(result)
+            if abs(score) >= WIN_THRESHOLD:
+                break
+            moves.remove(move)
+            moves.insert(0, move)
+
+        result.nodes = self.nodes
+        result.elapsed = time.perf_counter() - started
+        return result
+
+    def solve(self, board):
+        """
+        Точное решение окончания на CheckersBitboard: итеративное углубление до SOLVE_PLIES
+        без оценочной функции. Останавливается, как только выигрыш или проигрыш доказан
+        или вышло время поиска.
+        :param board:
+        :return: (оценка, ход, глубина) для доказанного результата или None
+        """
+        key = board.key
+        known = self.endgames.get(key)
+        moves = board.generate_moves(board.turn)
+        if known is not None:
+            self.endgame_hits += 1
+            return known, self._best_known_move(board, moves), 0
+        # Продолжаем с глубины, на которой остановились в прошлый раз
+        reached = self.horizons.get(key, 0)
+        if reached >= SOLVE_PLIES:
+            return None
+        self.solve_tt.new_search()
+        for depth in range(reached + 1, SOLVE_PLIES + 1):
+            try:
+                score, move = self._root(board, moves, depth, self._solve)
+            except SearchTimeout:
+                return None
+            if abs(score) >= WIN_THRESHOLD:
+                self._remember(key, score)
+                self.horizons.pop(key, None)
+                return score, move, depth
+            self.horizons[key] = depth
+            moves.remove(move)
+            moves.insert(0, move)
+        return None
+
+    def _best_known_move(self, board, moves):
+        """
+        Ход из решённой позиции: ведущий в решённую позицию с лучшей для нас оценкой.
+        """
+        best_move, best_score = moves[0], -INFINITY
+        for move in moves:
+            undo = board.make_move(*move)
+            known = self.endgames.get(board.key)
+            if known is not None:
+                score = -_from_table(known, 1)
+            elif not board.generate_moves(board.turn):
+                score = MATE_SCORE - 1
+            else:
+                score = 0 if self.horizons.get(board.key, 0) >= SOLVE_PLIES else -INFINITY + 1
+            board.unmake_move(undo)
+            if score > best_score:
+                best_move, best_score = move, score
+        return best_move
+
+    def _remember(self, key, score):
+        if len(self.endgames) >= ENDGAME_CACHE_LIMIT:
+            self.endgames.clear()
+        self.endgames[key] = score
+
+    def _root(self, board, moves, depth, search):
+        alpha, beta = -INFINITY, INFINITY
+        best_move = moves[0]
+        for move in moves:
+            undo = board.make_move(*move)
+            try:
+                score = -search(board, depth - 1, -beta, -alpha, 1)
+            finally:
+                board.unmake_move(undo)
+            if score > alpha:
+                alpha = score
+                best_move = move
+        return alpha, best_move
+
+    def _tick(self):
+        self.nodes += 1
+        if self.deadline is not None and self.nodes % self.CHECK_EVERY == 0 \
+                and time.perf_counter() >= self.deadline:
+            raise SearchTimeout()
+
+    def _alpha_beta(self, board, depth, alpha, beta, ply):
+        self._tick()
+        key = board.key
+        if board.piece_count() <= ENDGAME_PIECES:
+            known = self.endgames.get(key)
+            if known is not None:
+                self.endgame_hits += 1
+                return _from_table(known, ply)
+
+        moves = board.generate_moves(board.turn)
+        if not moves:
+            # Нечем ходить — проигрыш (чем ближе, тем хуже)
+            return -MATE_SCORE + ply
+        # Спокойная позиция на горизонте — оцениваем; при обязательном взятии считаем дальше
+        if (depth <= 0 and not moves[0][2]) or ply >= MAX_PLY - 1:
+            return evaluate(board)
+
+        original_alpha = alpha
+        entry = self.tt.probe(key)
+        tt_move = None
+        if entry is not None:
+            tt_move = entry[4]
+            if entry[1] >= depth:
+                value, flag = _from_table(entry[2], ply), entry[3]
+                if flag == EXACT:
+                    return value
+                if flag == LOWER and value >= beta:
+                    return value
+                if flag == UPPER and value <= alpha:
+                    return value
+        if tt_move in moves:
+            moves.remove(tt_move)
+            moves.insert(0, tt_move)
+
+        best_score = -INFINITY
+        best_move = None
+        for move in moves:
+            undo = board.make_move(*move)
+            try:
+                score = -self._alpha_beta(board, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                board.unmake_move(undo)
+            if score > best_score:
+                best_score = score
+                best_move = move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+
+        if best_score <= original_alpha:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt.store(key, depth, _to_table(best_score, ply), flag, best_move)
+        return best_score
+
+    def _solve(self, board, depth, alpha, beta, ply):
+        """
+        Поиск для точного решения: на горизонте позиция считается ничейной (0), поэтому
+        оценки вне нуля — только доказанные выигрыши и проигрыши. Они запоминаются в endgames.
+        """
+        self._tick()
+        key = board.key
+        known = self.endgames.get(key)
+        if known is not None:
+            self.endgame_hits += 1
+            return _from_table(known, ply)
+
+        moves = board.generate_moves(board.turn)
+        if not moves:
+            self._remember(key, -MATE_SCORE)
+            return -MATE_SCORE + ply
+        if depth <= 0 or ply >= MAX_PLY - 1:
+            return 0
+
+        original_alpha = alpha
+        entry = self.solve_tt.probe(key)
+        if entry is not None:
+            if entry[4] in moves:
+                moves.remove(entry[4])
+                moves.insert(0, entry[4])
+            if entry[1] >= depth:
+                value, flag = _from_table(entry[2], ply), entry[3]
+                if flag == EXACT or (flag == LOWER and value >= beta) or (flag == UPPER and value <= alpha):
+                    return value
+
+        best_score = -INFINITY
+        best_move = None
+        for move in moves:
+            undo = board.make_move(*move)
+            try:
+                score = -self._solve(board, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                board.unmake_move(undo)
+            if score > best_score:
+                best_score = score
+                best_move = move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+
+        if best_score <= original_alpha:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.solve_tt.store(key, depth, _to_table(best_score, ply), flag, best_move)
+        # Выигрыш, доказанный нижней границей, и проигрыш — верхней, тоже доказаны
+        # (расстояние до конца партии тогда — оценка сверху)
+        if (best_score >= WIN_THRESHOLD and flag != UPPER) or (best_score <= -WIN_THRESHOLD and flag != LOWER):
+            self._remember(key, _to_table(best_score, ply))
+        return best_score
+
+    def principal_variation(self, board, depth, first_move):
+        """
+        Главная линия: first_move и продолжение из таблицы транспозиций (в виде ходов checkers_my).
+        """
+        pv = [board_move(first_move)]
+        undos = [board.make_move(*first_move)]
+        seen = set()
+        for _ in range(depth - 1):
+            key = board.key
+            entry = self.tt.probe(key)
+            if entry is None or entry[4] is None or key in seen:
+                break
+            move = entry[4]
+            if move not in board.generate_moves(board.turn):
+                break
+            seen.add(key)
+            pv.append(board_move(move))
+            undos.append(board.make_move(*move))
+        for undo in reversed(undos):
+            board.unmake_move(undo)
+        return tuple(pv)
+
+
+def format_score(score):
+    """
+    Оценка для вывода: '+1.25' в шашках или 'выигрыш за N ходов' (N — число своих ходов).
+    """
+    if abs(score) >= WIN_THRESHOLD:
+        plies = MATE_SCORE - abs(score)
+        moves = (plies + 1) // 2
+        return f"выигрыш не дольше чем за {moves} ход(ов)" if score > 0 else f"проигрыш за {moves} ход(ов)"
+    return f"{score / MAN_VALUE:+.2f}"
+
+
+def format_move(move):
+    """
+    Ход checkers_my (start, end, captured) в виде 'c3e5' и списка снятых шашек.
+    """
+    from chess_my import Board
+
+    start, end, captured = move
+    text = Board.coords_to_algebraic(start) + Board.coords_to_algebraic(end)
+    if captured:
+        text += " (x " + " ".join(Board.coords_to_algebraic(pos) for pos in captured) + ")"
+    return text
@@ -1,94 +1,198 @@
+from chess_my import zobrist_table
+from render import MODES, Renderer
+
+
+# Направления диагоналей: первые два — вперёд для белых, последние два — вперёд для чёрных
+DIRECTIONS = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+
+
+def _diagonal_rays(row, col):
+    rays = []
+    for dr, dc in DIRECTIONS:
+        ray = []
+        r, c = row + dr, col + dc
+        while 0 <= r < 8 and 0 <= c < 8:
+            ray.append((r, c))
+            r += dr
+            c += dc
+        rays.append(tuple(ray))
+    return tuple(rays)
+
+
+# Для каждой клетки: 4 луча клеток по диагоналям в порядке DIRECTIONS (считаются один раз)
+DIAGONAL_RAYS = {(row, col): _diagonal_rays(row, col) for row in range(8) for col in range(8)}
+
+
 class Piece:
     """
     Базовый класс для шашечных фигур.
+    Как и в chess_my, фигуры неизменяемы и существуют в одном экземпляре на (тип, цвет),
+    поэтому превращение в дамку и копии доски не создают новых объектов.
+
+    Потомки задают тихие ходы (quiet_moves) и одиночные прыжки со взятием (capture_steps);
+    цепочки взятий из прыжков собирает доска (Board.capture_chains).
     """
+    __slots__ = ('color', 'symbol')
+    letter = 'M' # буква в FEN (у белых заглавная, у чёрных строчная)
+    symbols = ('⛀', '⛂')  # Символы для обычной шашки: (белая, чёрная)
+
+    # Общие экземпляры: {(класс, цвет): фигура}
+    _instances = {}
+
+    def __new__(cls, color):
+        piece = Piece._instances.get((cls, color))
+        if piece is None:
+            piece = object.__new__(cls)
+            object.__setattr__(piece, 'color', color)  # 'white' или 'black'
+            object.__setattr__(piece, 'symbol', cls.symbols[0] if color == 'white' else cls.symbols[1])
+            Piece._instances[(cls, color)] = piece
+        return piece
+
     def __init__(self, color):
-        self.color = color  # 'white' или 'black'
-        self.symbol = '⛀' if color == 'white' else '⛂'  # Символ для обычной шашки
+        pass
 
-    def get_valid_moves(self, board, start_row, start_col):
+    def __setattr__(self, name, value):
+        raise AttributeError("Шашки неизменяемы: один экземпляр используется на всех досках.")
+
+    def __reduce__(self):
+        return type(self), (self.color,)
+
+    def quiet_moves(self, board, pos):
+        """
+        Клетки, куда шашка с клетки pos может пойти без взятия.
+        """
         raise NotImplementedError("Этот метод должен быть переопределен в дочерних классах.")
 
+    def capture_steps(self, board, pos, captured):
+        """
+        Одиночные взятия с клетки pos: пары (клетка снимаемой шашки, клетки, куда можно встать).
+        Шашки из captured уже взяты в этой цепочке: прыгать через них второй раз нельзя.
+        """
+        raise NotImplementedError("Этот метод должен быть переопределен в дочерних классах.")
+
+    def get_valid_moves(self, board, start_row, start_col):
+        """
+        Куда может пойти шашка: концы её цепочек взятий, а если брать нечего — тихие ходы.
+        Обязательность взятия другими шашками учитывает Board.generate_moves.
+        """
+        chains = board.capture_chains((start_row, start_col))
+        if chains:
+            return list(dict.fromkeys(end for _, end, _ in chains))
+        return self.quiet_moves(board, (start_row, start_col))
+
     def __str__(self):
         return self.symbol
 
 
 class Checker(Piece):
     """
-    Обычная шашка.
+    Обычная шашка: ходит и бьёт по диагонали только вперёд.
     """
-    def get_valid_moves(self, board, start_row, start_col):
-        moves = []
-        direction = -1 if self.color == 'white' else 1  # Белые ходят вверх, черные вниз
-
-        # Обычные ходы по диагонали
-        for dc in [-1, 1]:
-            new_row, new_col = start_row + direction, start_col + dc
-            if board.is_on_board(new_row, new_col) and not board.get_piece(new_row, new_col):
-                moves.append((new_row, new_col))
-
-        # Ходы с взятием (перепрыгивание через соседнюю вражескую шашку)
-        for dc in [-1, 1]:
-            mid_row, mid_col = start_row + direction, start_col + dc
-            end_row, end_col = start_row + 2 * direction, start_col + 2 * dc
-            if board.is_on_board(end_row, end_col):
-                mid_piece = board.get_piece(mid_row, mid_col)
-                end_piece = board.get_piece(end_row, end_col)
-                if mid_piece and mid_piece.color != self.color and not end_piece:
-                    moves.append((end_row, end_col))
-        return moves
+    __slots__ = ()
+
+    def forward_rays(self, pos):
+        rays = DIAGONAL_RAYS[pos]
+        # Белые ходят вверх, черные вниз
+        return rays[:2] if self.color == 'white' else rays[2:]
+
+    def quiet_moves(self, board, pos):
+        grid = board.grid
+        return [ray[0] for ray in self.forward_rays(pos) if ray and ray[0] not in grid]
+
+    def capture_steps(self, board, pos, captured):
+        # Взятие — перепрыгивание через соседнюю вражескую шашку на пустую клетку за ней
+        grid = board.grid
+        for ray in self.forward_rays(pos):
+            if len(ray) < 2 or ray[1] in grid:
+                continue
+            target = grid.get(ray[0])
+            if target is not None and target.color != self.color and ray[0] not in captured:
+                yield ray[0], (ray[1],)
 
 
 class KingChecker(Piece):
     """
-    Шашка, ставшая дамкой (фlying king).
-    Дамка ходит по диагонали как слон в шахматах и может захватывать вражескую шашку,
-    только если прыжок (перешагивание) возможен.
+    Шашка, ставшая дамкой (flying king).
+    Дамка ходит по диагонали как слон в шахматах и может захватывать вражескую шашку
+    на любом расстоянии, вставая на любую свободную клетку за ней.
     """
-    def __init__(self, color):
-        super().__init__(color)
-        self.symbol = '⛁' if color == 'white' else '⛃'
+    __slots__ = ()
+    letter = 'K'
+    symbols = ('⛁', '⛃')
 
-    def get_valid_moves(self, board, start_row, start_col):
+    def quiet_moves(self, board, pos):
+        grid = board.grid
         moves = []
-        directions = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
-        for dr, dc in directions:
-            row, col = start_row, start_col
-            enemy_found = False  # Флаг: в этой диагонали уже встретили вражескую шашку
-            while True:
-                row += dr
-                col += dc
-                if not board.is_on_board(row, col):
-                    break
-
-                current = board.get_piece(row, col)
-                if not enemy_found:
-                    # Пока по пути пусто, дамка может ходить
-                    if not current:
-                        moves.append((row, col))
-                    else:
-                        # Если встречаем фигуру
-                        if current.color != self.color:
-                            # Это потенциальное захватывающее движение.
-                            enemy_found = True
-                            # Теперь ищем пустые клетки сразу за врагом
-                            jump_row, jump_col = row + dr, col + dc
-                            while board.is_on_board(jump_row, jump_col) and not board.get_piece(jump_row, jump_col):
-                                moves.append((jump_row, jump_col))
-                                jump_row += dr
-                                jump_col += dc
-                        # В любом случае останавливаем дальнейшее движение по этой диагонали.
-                        break
-                else:
-                    # Если уже встретили врага, не продолжаем движение.
+        for ray in DIAGONAL_RAYS[pos]:
+            for square in ray:
+                if square in grid:
                     break
+                moves.append(square)
         return moves
 
+    def capture_steps(self, board, pos, captured):
+        grid = board.grid
+        for ray in DIAGONAL_RAYS[pos]:
+            for index, square in enumerate(ray):
+                target = grid.get(square)
+                if target is None:
+                    continue
+                # Первая фигура на диагонали: бить можно только ещё не взятую вражескую
+                if target.color != self.color and square not in captured:
+                    lands = []
+                    for land in ray[index + 1:]:
+                        if land in grid:
+                            break
+                        lands.append(land)
+                    if lands:
+                        yield square, lands
+                break
+
+
+# Ключи Zobrist: ZOBRIST_KEYS[(тип, цвет)][row * 8 + col]. Строятся, как в chess_my, из строки,
+# поэтому одинаковы во всех процессах и у checkers_bitboard
+ZOBRIST_KEYS = {(piece_type, color): zobrist_table(f"checkers:{piece_type.__name__}", color)
+                for piece_type in (Checker, KingChecker) for color in ('white', 'black')}
+ZOBRIST_BLACK_TO_MOVE = zobrist_table("checkers:side", "black")[0]
+
+
+class MoveRecord:
+    """
+    Запись о ходе для отката (см. Board.make_move/unmake_move):
+    ходившая шашка, снятые с доски шашки и флаг превращения в дамку.
+    """
+    __slots__ = ('start', 'end', 'piece', 'captured', 'promoted')
+
+    def __init__(self, start, end, piece, captured=(), promoted=False):
+        self.start = start
+        self.end = end
+        self.piece = piece
+        self.captured = captured # кортеж ((row, col), Piece)
+        self.promoted = promoted
+
+
+# Начальная расстановка в FEN: M — шашка, K — дамка, после пробела — чей ход
+START_FEN = "1m1m1m1m/m1m1m1m1/1m1m1m1m/8/8/M1M1M1M1/1M1M1M1M/M1M1M1M1 w"
+
 
 class Board:
-    def __init__(self):
+    def __init__(self, setup=True):
         self.grid = {}
-        self.setup_pieces()
+        self.turn = 'white' # чей ход; make_move/unmake_move переключают его
+        # setup=False — пустая доска (например, для from_fen)
+        if setup:
+            self.setup_pieces()
+
+    @property
+    def zobrist_key(self):
+        """
+        Zobrist-хеш позиции (расстановка и очередь хода), тот же, что CheckersBitboard.key.
+        :return:
+        """
+        key = ZOBRIST_BLACK_TO_MOVE if self.turn == 'black' else 0
+        for (row, col), piece in self.grid.items():
+            key ^= ZOBRIST_KEYS[(type(piece), piece.color)][row * 8 + col]
+        return key
 
     def setup_pieces(self):
         """
@@ -116,55 +220,222 @@ class Board:
 
     def move_piece(self, start, end):
         """
-        Двигает фигуру с клетки start в end.
-        Если ход является захватывающим (jump), удаляет первую встреченную вражескую шашку.
+        Двигает фигуру с клетки start в end, снимая все шашки цепочки взятий.
+        Возвращает MoveRecord для отката хода.
+        """
+        return self.make_move(start, end)
+
+    def make_move(self, start, end, captured=None):
+        """
+        Делает ход и возвращает MoveRecord, по которому unmake_move вернёт доску назад.
+        Если на клетке start нет шашки, возвращает None.
+        :param start:
+        :param end:
+        :param captured: клетки снимаемых шашек (третий элемент хода из generate_moves);
+                         None — найти цепочку взятий с концом end
+        :return:
         """
-        piece = self.grid.get(start)
+        grid = self.grid
+        piece = grid.get(start)
         if not piece:
-            return
+            return None
+        if captured is None:
+            captured = self._find_captured(start, end, piece)
+        removed = tuple((pos, grid.pop(pos)) for pos in captured)
+        self.turn = 'black' if self.turn == 'white' else 'white'
+
+        # Сначала убираем шашку с start: цепочка дамки может закончиться там же, где началась
+        del grid[start]
+        grid[end] = piece
+
+        # Превращение обычной шашки в дамку, если она дошла до конца поля.
+        promoted = False
+        if isinstance(piece, Checker):
+            if (piece.color == 'white' and end[0] == 0) or (piece.color == 'black' and end[0] == 7):
+                grid[end] = KingChecker(piece.color)
+                promoted = True
+        return MoveRecord(start, end, piece, removed, promoted)
 
-        # Определяем, является ли ход захватывающим: если разница по строкам больше 1.
+    def _find_captured(self, start, end, piece):
+        """
+        Снимаемые шашки для хода, заданного только клетками start и end.
+        """
+        for _, chain_end, captured in self.capture_chains(start, piece):
+            if chain_end == end:
+                return captured
+        # Ход без цепочки: снимаем первую вражескую шашку на пути прыжка, если она есть
         if abs(start[0] - end[0]) > 1 and abs(start[1] - end[1]) > 1:
             dr = 1 if end[0] > start[0] else -1
             dc = 1 if end[1] > start[1] else -1
             row, col = start[0] + dr, start[1] + dc
-            # Ищем первую занятую клетку на пути
             while (row, col) != end:
-                if (row, col) in self.grid and self.grid[(row, col)].color != piece.color:
-                    # Это съеденная шашка
-                    del self.grid[(row, col)]
-                    break
+                target = self.grid.get((row, col))
+                if target is not None and target.color != piece.color:
+                    return ((row, col),)
                 row += dr
                 col += dc
+        return ()
 
-        self.grid[end] = piece
-        del self.grid[start]
+    def unmake_move(self, record):
+        """
+        Откатывает ход, сделанный make_move.
+        """
+        del self.grid[record.end]
+        self.grid[record.start] = record.piece
+        for pos, piece in record.captured:
+            self.grid[pos] = piece
+        self.turn = 'black' if self.turn == 'white' else 'white'
 
-        # Превращение обычной шашки в дамку, если она дошла до конца поля.
-        if isinstance(piece, Checker):
-            if (piece.color == 'white' and end[0] == 0) or (piece.color == 'black' and end[0] == 7):
-                self.grid[end] = KingChecker(piece.color)
+    def capture_chains(self, start, piece=None):
+        """
+        Все полные цепочки взятий шашки с клетки start: список (start, end, captured),
+        где captured — клетки снятых шашек по порядку. Цепочка продолжается, пока есть что брать
+        (и дамка обязана встать туда, откуда взятие продолжается).
 
-    def print_board(self):
-        print("   a  b c  d  e f  g  h")
+        Поиск в глубину прямо на доске, без копий: ходящая шашка на время поиска снимается
+        с start, а взятые шашки остаются на месте до конца хода (турецкий удар) —
+        поэтому их нельзя перепрыгнуть второй раз.
+        """
+        grid = self.grid
+        piece = piece or grid.get(start)
+        if piece is None:
+            return []
+        chains = []
+        del grid[start]
+        try:
+            self._extend_chains(start, start, piece, [], chains)
+        finally:
+            grid[start] = piece
+        return chains
+
+    def _extend_chains(self, start, pos, piece, captured, chains):
+        """
+        Продолжает цепочку из клетки pos. Возвращает True, если с pos есть хотя бы одно взятие.
+        """
+        found = False
+        for victim, lands in piece.capture_steps(self, pos, captured):
+            found = True
+            captured.append(victim)
+            final = []
+            continued = False
+            for land in lands:
+                if self._extend_chains(start, land, piece, captured, chains):
+                    continued = True
+                else:
+                    final.append(land)
+            # Если с какой-то клетки за побитой шашкой взятие продолжается, остановиться на других нельзя
+            if not continued:
+                done = tuple(captured)
+                chains.extend((start, land, done) for land in final)
+            captured.pop()
+        return found
+
+    def generate_moves(self, color):
+        """
+        Все ходы шашек цвета color списком (start, end, captured).
+        Взятие обязательно: если хоть одна шашка может бить, возвращаются только цепочки взятий.
+        """
+        own = [(start, piece) for start, piece in self.grid.items() if piece.color == color]
+        captures = []
+        for start, piece in own:
+            captures.extend(self.capture_chains(start, piece))
+        if captures:
+            return captures
+        moves = []
+        for start, piece in own:
+            for end in piece.quiet_moves(self, start):
+                moves.append((start, end, ()))
+        return moves
+
+    def to_fen(self):
+        """
+        Позиция в FEN: горизонтали от 8-й к 1-й (M — шашка, K — дамка, строчные — чёрные)
+        и очередь хода 'w'/'b'.
+        """
+        rows = []
+        for row in range(8):
+            text = ""
+            empty = 0
+            for col in range(8):
+                piece = self.grid.get((row, col))
+                if piece is None:
+                    empty += 1
+                    continue
+                if empty:
+                    text += str(empty)
+                    empty = 0
+                text += piece.letter if piece.color == 'white' else piece.letter.lower()
+            if empty:
+                text += str(empty)
+            rows.append(text)
+        return "/".join(rows) + (" w" if self.turn == 'white' else " b")
+
+    @classmethod
+    def from_fen(cls, fen):
+        """
+        Строит доску сразу из FEN, без начальной расстановки.
+        """
+        fields = fen.split()
+        rows = fields[0].split("/") if fields else []
+        if len(rows) != 8:
+            raise ValueError(f"В FEN должно быть 8 горизонталей, а не {len(rows)}.")
+        board = cls(setup=False)
+        for row, text in enumerate(rows):
+            col = 0
+            for char in text:
+                if char.isdigit():
+                    col += int(char)
+                    continue
+                piece_type = {'M': Checker, 'K': KingChecker}.get(char.upper())
+                if piece_type is None or col >= 8:
+                    raise ValueError(f"Неверная горизонталь FEN: {text!r}.")
+                board.grid[(row, col)] = piece_type('white' if char.isupper() else 'black')
+                col += 1
+            if col != 8:
+                raise ValueError(f"Неверная длина горизонтали FEN: {text!r}.")
+        if len(fields) > 1 and fields[1] not in ('w', 'b'):
+            raise ValueError(f"Неверная очередь хода в FEN: {fields[1]!r}.")
+        board.turn = 'black' if len(fields) > 1 and fields[1] == 'b' else 'white'
+        return board
+
+    # Буквы столбцов над и под доской
+    FILES_HEADER = "   a  b c  d  e f  g  h"
+
+    def cells(self, highlight_moves=None):
+        """
+        Кадр для рендерера: 64 символа клеток (индекс row*8+col), клетки из highlight_moves помечены '•'.
+        :param highlight_moves: список (row, col)
+        :return:
+        """
+        cells = []
         for row in range(8):
-            print(8 - row, end="  ")
             for col in range(8):
                 piece = self.get_piece(row, col)
-                # Выводим символы шашек или пустые клетки (для шахматных полей используем разные символы)
-                if piece:
-                    print(str(piece), end=" ")
-                else:
-                    # Цвет клетки определяется по (row+col) % 2:
-                    print('▭' if (row+col) % 2 == 0 else '▬', end=" ")
-            print("", 8 - row)
-        print("   a  b c  d  e f  g  h")
+                # Цвет пустой клетки определяется по (row+col) % 2
+                cells.append(str(piece) if piece else ('▭' if (row + col) % 2 == 0 else '▬'))
+        for row, col in highlight_moves or ():
+            cells[row * 8 + col] = '•'
+        return cells
+
+    def print_board(self, highlight_moves=None, renderer=None):
+        """
+        Печатает доску одним вызовом; renderer (render.Renderer) задаёт режим вывода.
+        :param highlight_moves:
+        :param renderer:
+        :return:
+        """
+        if renderer is None:
+            renderer = Renderer()
+        renderer.draw(self.cells(highlight_moves), self.FILES_HEADER)
 
 
 class Game:
-    def __init__(self):
+    def __init__(self, render='full'):
         self.board = Board()
+        # Вывод доски: 'full', 'diff' (перерисовка только изменившихся клеток) или 'headless'
+        self.renderer = Renderer(render)
         self.current_turn = 'white'
+        self.engine = None # Создаётся при первом запросе подсказки
 
     def switch_turn(self):
         self.current_turn = 'black' if self.current_turn == 'white' else 'white'
@@ -176,30 +447,155 @@ class Game:
         row = 8 - int(pos[1])
         return row, col
 
+    def find_moves(self, start, end):
+        """
+        Допустимые ходы (start, end, captured) текущего игрока из start в end.
+        Учитывает обязательное взятие: при возможности бить тихий ход недопустим.
+        Разные цепочки взятий могут начинаться и кончаться на одних и тех же клетках; цепочки,
+        снимающие одни и те же шашки, приводят к одной позиции и считаются одним ходом.
+        """
+        moves = {}
+        for move in self.board.generate_moves(self.current_turn):
+            if move[0] == start and move[1] == end:
+                moves.setdefault(frozenset(move[2]), move)
+        return list(moves.values())
+
+    def find_move(self, start, end, captured=None):
+        """
+        Допустимый ход (start, end, captured) текущего игрока или None.
+        :param captured: клетки снимаемых шашек — нужны, только если цепочек взятий из start в end несколько
+        :return:
+        """
+        moves = self.find_moves(start, end)
+        if captured is not None:
+            moves = [move for move in moves if set(move[2]) == set(captured)]
+        if len(moves) > 1:
+            variants = "; ".join(self.captured_text(move) for move in moves)
+            raise ValueError(f"Из {self.coords_to_algebraic(start)} в {self.coords_to_algebraic(end)} "
+                             f"можно бить по-разному, укажите снимаемые шашки: {variants}.")
+        return moves[0] if moves else None
+
     def is_valid_move(self, start, end):
-        piece = self.board.get_piece(start[0], start[1])
-        if not piece or piece.color != self.current_turn:
-            return False
-        return end in piece.get_valid_moves(self.board, start[0], start[1])
+        return bool(self.find_moves(start, end))
+
+    @staticmethod
+    def coords_to_algebraic(pos):
+        return chr(ord('a') + pos[1]) + str(8 - pos[0])
+
+    def captured_text(self, move):
+        return " ".join(self.coords_to_algebraic(pos) for pos in move[2])
+
+    def play_move(self, start, end, captured=None):
+        """
+        Проверяет и делает ход текущего игрока, без ввода-вывода (для консоли и для server.py).
+        :param captured: клетки снимаемых шашек, если цепочек взятий из start в end несколько
+        :return: (True, "") или (False, причина)
+        """
+        try:
+            move = self.find_move(start, end, captured) if start and end else None
+        except ValueError as error:
+            return False, str(error)
+        if move is None:
+            return False, "Некорректный ход."
+        self.board.make_move(*move)
+        self.switch_turn()
+        return True, ""
+
+    def choose_capture(self, moves):
+        """
+        Спрашивает, какие шашки снять, если из одной клетки в другую можно бить по-разному.
+        :param moves: ходы с одинаковыми началом и концом
+        :return: клетки снимаемых шашек или None, если ввод не совпал ни с одним вариантом
+        """
+        print("Можно бить по-разному:")
+        for number, move in enumerate(moves, 1):
+            print(f"  {number}) снять {self.captured_text(move)}")
+        answer = input("Выберите номер варианта или перечислите снимаемые шашки (например, d4 f6): ").split()
+        if len(answer) == 1 and answer[0].isdigit() and 1 <= int(answer[0]) <= len(moves):
+            return moves[int(answer[0]) - 1][2]
+        captured = [self.algebraic_to_coords(text) for text in answer]
+        if not captured or None in captured:
+            return None
+        return captured
+
+    def status(self):
+        """
+        Состояние партии для текущего игрока: 'no_moves' (проиграл), 'capture' (взятие обязательно) или 'play'.
+        """
+        moves = self.board.generate_moves(self.current_turn)
+        if not moves:
+            return 'no_moves'
+        return 'capture' if moves[0][2] else 'play'
+
+    def show_hint(self, time_limit=2.0):
+        """
+        Анализирует позицию не дольше time_limit секунд и печатает лучший ход.
+        Решённые окончания берутся из кэша поисковика мгновенно.
+        :param time_limit:
+        :return:
+        """
+        from checkers_engine import Engine, format_move, format_score
+
+        if self.engine is None:
+            self.engine = Engine()
+        self.board.turn = self.current_turn
+        result = self.engine.search(self.board, time_limit)
+        if result.move is None:
+            print("Допустимых ходов нет.")
+            return result
+        self.board.print_board(highlight_moves=[result.move[1]], renderer=self.renderer)
+        print(f"Подсказка: {format_move(result.move)} (оценка {format_score(result.score)}, "
+              f"глубина {result.depth}, {result.nodes} узлов, {result.elapsed:.2f} с)")
+        if len(result.pv) > 1:
+            print("Главная линия: " + ", ".join(format_move(move) for move in result.pv))
+        return result
 
     def play(self):
         while True:
-            self.board.print_board()
+            self.board.print_board(renderer=self.renderer)
+            status = self.status()
+            if status == 'no_moves':
+                winner = 'чёрные' if self.current_turn == 'white' else 'белые'
+                print(f"Ходов нет. Победили {winner}. Игра завершена.")
+                self.renderer.close()
+                break
             print(f"Ходит {'белый' if self.current_turn == 'white' else 'чёрный'}.")
-
-            start_pos = input("Введите позицию шашки (например, b6): ")
+            if status == 'capture':
+                print("Взятие обязательно.")
+
+            start_pos = input("Введите позицию шашки (например, b6; 'hint [сек]' - подсказка): ")
+            if start_pos.lower().startswith('hint'):
+                parts = start_pos.split()
+                try:
+                    time_limit = float(parts[1]) if len(parts) == 2 else 2.0
+                except ValueError:
+                    print("Неверный формат команды (пример: hint 3).")
+                    continue
+                self.show_hint(time_limit)
+                continue
             end_pos = input("Введите конечную позицию (например, c5): ")
 
             start = self.algebraic_to_coords(start_pos)
             end = self.algebraic_to_coords(end_pos)
-
-            if start and end and self.is_valid_move(start, end):
-                self.board.move_piece(start, end)
-                self.switch_turn()
-            else:
+            captured = None
+            if start and end:
+                moves = self.find_moves(start, end)
+                if len(moves) > 1:
+                    captured = self.choose_capture(moves)
+                    if captured is None:
+                        print("Неверный выбор, попробуйте снова.")
+                        continue
+
+            valid, _ = self.play_move(start, end, captured)
+            if not valid:
                 print("Некорректный ход, попробуйте снова.")
 
 
 if __name__ == "__main__":
-    game = Game()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Шашки в консоли.")
+    parser.add_argument('--render', choices=MODES, default='full',
+                        help="вывод доски: целиком, только изменения (ANSI) или без вывода")
+    game = Game(render=parser.parse_args().render)
     game.play()
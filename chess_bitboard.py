@@ -0,0 +1,356 @@
+"""
+Битбордовое представление шахматной доски (с новыми фигурами) для быстрой генерации ходов.
+
+Клетка (row, col) соответствует биту номер row * 8 + col, как и индексу в chess_my.Board.squares
+(row=0 — 8-я горизонталь). Для каждого цвета и типа фигуры хранится целое число-битборд.
+Правила ходов совпадают с get_valid_moves из chess_my; это проверяет режим сверки
+(cross_check / python chess_bitboard.py --cross-check).
+"""
+import argparse
+import random
+import time
+
+from chess_my import (Board, Knight, King, Kamikaze, Commander, Champion,
+                      COORDS, COLORS, PIECE_TYPES, leap_table, ray_table)
+
+WHITE, BLACK = 0, 1
+
+# Номер типа фигуры в битбордах — её индекс в chess_my.PIECE_TYPES
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, KAMIKAZE, COMMANDER, CHAMPION = range(len(PIECE_TYPES))
+NUM_TYPES = len(PIECE_TYPES)
+TYPE_INDEX = {piece_type: index for index, piece_type in enumerate(PIECE_TYPES)}
+
+FULL = (1 << 64) - 1
+FILE_A = sum(1 << (row * 8) for row in range(8))
+FILE_H = FILE_A << 7
+NOT_FILE_A = FULL ^ FILE_A
+NOT_FILE_H = FULL ^ FILE_H
+ROW_MASKS = tuple(0xFF << (row * 8) for row in range(8))
+
+
+def _mask_table(index_table):
+    """
+    Переводит таблицу индексов из chess_my (кортеж целей для каждой клетки) в битовые маски.
+    :param index_table:
+    :return:
+    """
+    return tuple(sum(1 << target for target in targets) for targets in index_table)
+
+
+# Маски прыжков для фигур-"прыгунов" берутся из тех же смещений, что и в chess_my
+KNIGHT_ATTACKS = _mask_table(leap_table(Knight.offsets))
+KING_ATTACKS = _mask_table(leap_table(King.offsets))
+COMMANDER_ATTACKS = _mask_table(leap_table(Commander.offsets))
+CHAMPION_ATTACKS = _mask_table(leap_table(Champion.offsets))
+KAMIKAZE_STEPS = _mask_table(leap_table(Kamikaze.offsets))
+
+# Лучи для классической генерации атак дальнобойных фигур.
+# "Положительные" направления увеличивают индекс клетки: первую фигуру на луче
+# даёт младший бит, для "отрицательных" — старший.
+POSITIVE_DIRECTIONS = ((1, 0), (0, 1), (1, 1), (1, -1))
+NEGATIVE_DIRECTIONS = ((-1, 0), (0, -1), (-1, -1), (-1, 1))
+RAYS = {direction: _mask_table(ray_table(direction))
+        for direction in POSITIVE_DIRECTIONS + NEGATIVE_DIRECTIONS}
+
+ROOK_DIRECTIONS = ((1, 0), (0, 1), (-1, 0), (0, -1))
+BISHOP_DIRECTIONS = ((1, 1), (1, -1), (-1, -1), (-1, 1))
+
+
+def ray_attacks(square, direction, occupied):
+    """
+    Клетки вдоль луча direction от square до первой фигуры включительно.
+    :param square:
+    :param direction:
+    :param occupied: битборд всех фигур
+    :return:
+    """
+    rays = RAYS[direction]
+    attacks = rays[square]
+    blockers = attacks & occupied
+    if blockers:
+        if direction in POSITIVE_DIRECTIONS:
+            blocker = (blockers & -blockers).bit_length() - 1
+        else:
+            blocker = blockers.bit_length() - 1
+        attacks ^= rays[blocker]
+    return attacks
+
+
+def slider_attacks(square, directions, occupied):
+    attacks = 0
+    for direction in directions:
+        attacks |= ray_attacks(square, direction, occupied)
+    return attacks
+
+
+def iter_bits(bitboard):
+    """
+    Перебирает номера установленных битов от младшего к старшему.
+    :param bitboard:
+    :return:
+    """
+    while bitboard:
+        bit = bitboard & -bitboard
+        yield bit.bit_length() - 1
+        bitboard ^= bit
+
+
+class BitboardBoard:
+    """
+    Доска из битбордов: pieces[color][type] — битборд фигур, occupied[color] — все фигуры цвета,
+    mailbox[square] — код фигуры (color * NUM_TYPES + type) или -1 для пустой клетки.
+    """
+    def __init__(self):
+        self.pieces = [[0] * NUM_TYPES, [0] * NUM_TYPES]
+        self.occupied = [0, 0]
+        self.mailbox = [-1] * 64
+
+    @classmethod
+    def from_board(cls, board):
+        """
+        Строит битбордовую доску по chess_my.Board.
+        :param board:
+        :return:
+        """
+        bitboard_board = cls()
+        for square, piece in enumerate(board.squares):
+            if piece is not None:
+                bitboard_board.put(square, COLORS.index(piece.color), TYPE_INDEX[type(piece)])
+        return bitboard_board
+
+    def to_board(self):
+        """
+        Обратное преобразование в chess_my.Board.
+        :return:
+        """
+        board = Board(setup=False)
+        grid = {}
+        for square, code in enumerate(self.mailbox):
+            if code >= 0:
+                color, piece_type = divmod(code, NUM_TYPES)
+                grid[COORDS[square]] = PIECE_TYPES[piece_type](COLORS[color])
+        board.grid = grid
+        return board
+
+    def put(self, square, color, piece_type):
+        bit = 1 << square
+        self.pieces[color][piece_type] |= bit
+        self.occupied[color] |= bit
+        self.mailbox[square] = color * NUM_TYPES + piece_type
+
+    def targets(self, square):
+        """
+        Битборд клеток, куда может пойти фигура с клетки square (то же, что get_valid_moves).
+        :param square:
+        :return:
+        """
+        code = self.mailbox[square]
+        if code < 0:
+            return 0
+        color, piece_type = divmod(code, NUM_TYPES)
+        own = self.occupied[color]
+        enemy = self.occupied[1 - color]
+        occupied = own | enemy
+
+        if piece_type == PAWN:
+            bit = 1 << square
+            return self._pawn_pushes(bit, color, occupied) | (self._pawn_captures(bit, color) & enemy)
+        if piece_type == KNIGHT:
+            return KNIGHT_ATTACKS[square] & ~own
+        if piece_type == KING:
+            return KING_ATTACKS[square] & ~own
+        if piece_type == COMMANDER:
+            return COMMANDER_ATTACKS[square] & ~own
+        if piece_type == CHAMPION:
+            return CHAMPION_ATTACKS[square] & ~own
+        if piece_type == ROOK:
+            return slider_attacks(square, ROOK_DIRECTIONS, occupied) & ~own
+        if piece_type == BISHOP:
+            return slider_attacks(square, BISHOP_DIRECTIONS, occupied) & ~own
+        if piece_type == QUEEN:
+            return slider_attacks(square, ROOK_DIRECTIONS + BISHOP_DIRECTIONS, occupied) & ~own
+        # Камикадзе: шаг вбок и луч вперёд до первой фигуры (чужую можно взорвать)
+        forward = (-1, 0) if color == WHITE else (1, 0)
+        return (KAMIKAZE_STEPS[square] | ray_attacks(square, forward, occupied)) & ~own
+
+    @staticmethod
+    def _pawn_pushes(pawns, color, occupied):
+        empty = FULL ^ occupied
+        if color == WHITE:
+            single = (pawns >> 8) & empty
+            # Ход на 2 клетки — только из начальной позиции (row=6 -> row=4)
+            return single | (((single & ROW_MASKS[5]) >> 8) & empty)
+        single = (pawns << 8) & empty
+        return single | (((single & ROW_MASKS[2]) << 8) & empty)
+
+    @staticmethod
+    def _pawn_captures(pawns, color):
+        if color == WHITE:
+            return ((pawns & NOT_FILE_A) >> 9) | ((pawns & NOT_FILE_H) >> 7)
+        return (((pawns & NOT_FILE_A) << 7) | ((pawns & NOT_FILE_H) << 9)) & FULL
+
+    def generate_moves(self, color):
+        """
+        Все ходы цвета color списком (from_square, to_square).
+        Пешки обрабатываются сразу все сдвигами битбордов, остальные фигуры — по одной.
+        :param color: 'white'/'black' или WHITE/BLACK
+        :return:
+        """
+        if isinstance(color, str):
+            color = COLORS.index(color)
+        own = self.occupied[color]
+        enemy = self.occupied[1 - color]
+        occupied = own | enemy
+        empty = FULL ^ occupied
+        pieces = self.pieces[color]
+        moves = []
+
+        pawns = pieces[PAWN]
+        if pawns:
+            if color == WHITE:
+                single = (pawns >> 8) & empty
+                double = ((single & ROW_MASKS[5]) >> 8) & empty
+                left = ((pawns & NOT_FILE_A) >> 9) & enemy
+                right = ((pawns & NOT_FILE_H) >> 7) & enemy
+                shifts = ((single, 8), (double, 16), (left, 9), (right, 7))
+            else:
+                single = (pawns << 8) & empty
+                double = ((single & ROW_MASKS[2]) << 8) & empty
+                left = ((pawns & NOT_FILE_A) << 7) & enemy
+                right = ((pawns & NOT_FILE_H) << 9) & enemy
+                shifts = ((single, -8), (double, -16), (left, -7), (right, -9))
+            for targets, back in shifts:
+                for to_square in iter_bits(targets):
+                    moves.append((to_square + back, to_square))
+
+        for piece_type in (KNIGHT, BISHOP, ROOK, QUEEN, KING, KAMIKAZE, COMMANDER, CHAMPION):
+            for from_square in iter_bits(pieces[piece_type]):
+                for to_square in iter_bits(self.targets(from_square)):
+                    moves.append((from_square, to_square))
+        return moves
+
+    def make_move(self, from_square, to_square):
+        """
+        Делает ход и возвращает кортеж для unmake_move.
+        Если Камикадзе ходит на занятую клетку, он взрывается вместе с фигурой противника.
+        :param from_square:
+        :param to_square:
+        :return:
+        """
+        mailbox = self.mailbox
+        code = mailbox[from_square]
+        captured = mailbox[to_square]
+        color, piece_type = divmod(code, NUM_TYPES)
+        from_bit = 1 << from_square
+        to_bit = 1 << to_square
+        if captured >= 0:
+            captured_color, captured_type = divmod(captured, NUM_TYPES)
+            self.pieces[captured_color][captured_type] ^= to_bit
+            self.occupied[captured_color] ^= to_bit
+            mailbox[to_square] = -1
+            if piece_type == KAMIKAZE:
+                self.pieces[color][piece_type] ^= from_bit
+                self.occupied[color] ^= from_bit
+                mailbox[from_square] = -1
+                return from_square, to_square, code, captured, True
+        self.pieces[color][piece_type] ^= from_bit | to_bit
+        self.occupied[color] ^= from_bit | to_bit
+        mailbox[from_square] = -1
+        mailbox[to_square] = code
+        return from_square, to_square, code, captured, False
+
+    def unmake_move(self, undo):
+        from_square, to_square, code, captured, exploded = undo
+        color, piece_type = divmod(code, NUM_TYPES)
+        from_bit = 1 << from_square
+        to_bit = 1 << to_square
+        if exploded:
+            self.pieces[color][piece_type] ^= from_bit
+            self.occupied[color] ^= from_bit
+        else:
+            self.pieces[color][piece_type] ^= from_bit | to_bit
+            self.occupied[color] ^= from_bit | to_bit
+            self.mailbox[to_square] = -1
+        self.mailbox[from_square] = code
+        if captured >= 0:
+            captured_color, captured_type = divmod(captured, NUM_TYPES)
+            self.pieces[captured_color][captured_type] ^= to_bit
+            self.occupied[captured_color] ^= to_bit
+            self.mailbox[to_square] = captured
+
+
+def cross_check(board, bitboard_board=None):
+    """
+    Сравнивает ходы каждой фигуры из get_valid_moves с битбордовым генератором.
+    Возвращает список расхождений (square, ожидаемые клетки, клетки битбордов); пустой — всё совпало.
+    :param board: chess_my.Board
+    :param bitboard_board: BitboardBoard той же позиции (по умолчанию строится из board)
+    :return:
+    """
+    if bitboard_board is None:
+        bitboard_board = BitboardBoard.from_board(board)
+    mismatches = []
+    for square, piece in enumerate(board.squares):
+        if piece is None:
+            continue
+        row, col = COORDS[square]
+        expected = set(piece.get_valid_moves(board, row, col))
+        actual = {COORDS[target] for target in iter_bits(bitboard_board.targets(square))}
+        if expected != actual:
+            mismatches.append((COORDS[square], sorted(expected), sorted(actual)))
+        # Маска клеток назначения chess_my (target_mask) должна совпасть с битбордом
+        elif piece.target_mask(board, square) != bitboard_board.targets(square):
+            mismatches.append((COORDS[square], sorted(expected), 'target_mask'))
+    # Набор ходов на сторону, собранный сдвигами, тоже должен совпасть
+    for color in COLORS:
+        expected = {(square, target) for square, piece in enumerate(board.squares)
+                    if piece is not None and piece.color == color
+                    for target in iter_bits(bitboard_board.targets(square))}
+        if set(bitboard_board.generate_moves(color)) != expected:
+            mismatches.append((color, sorted(expected), sorted(bitboard_board.generate_moves(color))))
+    return mismatches
+
+
+def random_cross_check(games=100, max_plies=200, seed=0):
+    """
+    Играет случайные партии одновременно на chess_my.Board и BitboardBoard
+    и после каждого хода сверяет генераторы и расстановку.
+    :return: количество проверенных позиций
+    """
+    rng = random.Random(seed)
+    positions = 0
+    for game in range(games):
+        board = Board()
+        bitboard_board = BitboardBoard.from_board(board)
+        color = 'white'
+        for ply in range(max_plies):
+            mismatches = cross_check(board, bitboard_board)
+            if mismatches:
+                raise AssertionError(f"Партия {game}, полуход {ply}: {mismatches[0]}")
+            positions += 1
+            moves = bitboard_board.generate_moves(color)
+            if not moves:
+                break
+            from_square, to_square = rng.choice(moves)
+            board.make_move(COORDS[from_square], COORDS[to_square])
+            bitboard_board.make_move(from_square, to_square)
+            if BitboardBoard.from_board(board).mailbox != bitboard_board.mailbox:
+                raise AssertionError(f"Партия {game}, полуход {ply}: расстановка разошлась")
+            color = 'black' if color == 'white' else 'white'
+    return positions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Битбордовый генератор ходов chess_my.")
+    parser.add_argument('--cross-check', action='store_true',
+                        help="сверить генератор с get_valid_moves на случайных партиях")
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.cross_check:
+        started = time.perf_counter()
+        checked = random_cross_check(args.games, seed=args.seed)
+        print(f"Сверка пройдена: {checked} позиций за {time.perf_counter() - started:.2f} с.")
+    else:
+        parser.print_help()
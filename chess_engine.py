@@ -0,0 +1,355 @@
+"""
+Анализ позиций chess_my: альфа-бета поиск с итеративным углублением и контролем времени.
+
+Поиск ходит по доске через make_move/unmake_move и берёт ходы из Board.legal_moves
+(то есть из get_valid_moves каждой фигуры с учётом шаха). Порядок ходов: ход из таблицы
+транспозиций, взятия по MVV-LVA (жертва подороже, нападающий подешевле), ходы-киллеры
+и история отсечений. На листьях — поиск взятий (quiescence), включая взрывы Камикадзе.
+"""
+import time
+
+from chess_my import (Pawn, Knight, Bishop, Rook, Queen, King,
+                      Kamikaze, Commander, Champion, COORDS, Board)
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+
+# Ценность фигур в сотых пешки; для неизвестных новых фигур — DEFAULT_PIECE_VALUE
+PIECE_VALUES = {
+    Pawn: 100,
+    Knight: 320,
+    Bishop: 330,
+    Rook: 500,
+    Queen: 900,
+    King: 0,
+    Kamikaze: 250,
+    Commander: 350,
+    Champion: 250,
+}
+DEFAULT_PIECE_VALUE = 300
+
+MATE_SCORE = 100000
+INFINITY = MATE_SCORE + 1
+MAX_PLY = 64
+
+# Небольшой бонус за фигуры ближе к центру: 0 на краю, до 3 * CENTER_WEIGHT в центре
+CENTER_WEIGHT = 4
+CENTER_BONUS = tuple(CENTER_WEIGHT * min(row, 7 - row, col, 7 - col) for row, col in COORDS)
+
+
+def piece_value(piece):
+    return PIECE_VALUES.get(type(piece), DEFAULT_PIECE_VALUE)
+
+
+def _to_table(score, ply):
+    """
+    Оценка мата на глубине ply -> оценка относительно самого узла (для таблицы транспозиций):
+    одна и та же позиция встречается на разных глубинах, а счёт полуходов до мата — от корня.
+    """
+    if score >= MATE_SCORE - MAX_PLY:
+        return score + ply
+    if score <= -(MATE_SCORE - MAX_PLY):
+        return score - ply
+    return score
+
+
+def _from_table(score, ply):
+    if score >= MATE_SCORE - MAX_PLY:
+        return score - ply
+    if score <= -(MATE_SCORE - MAX_PLY):
+        return score + ply
+    return score
+
+
+def evaluate(board):
+    """
+    Статическая оценка позиции с точки зрения того, чей ход (board.turn):
+    материал плюс бонус за централизацию (кроме короля).
+    :param board:
+    :return:
+    """
+    score = 0
+    for index, piece in enumerate(board.squares):
+        if piece is None:
+            continue
+        value = PIECE_VALUES.get(type(piece), DEFAULT_PIECE_VALUE)
+        if not isinstance(piece, King):
+            value += CENTER_BONUS[index]
+        score += value if piece.color == 'white' else -value
+    return score if board.turn == 'white' else -score
+
+
+class SearchTimeout(Exception):
+    """
+    Время на поиск вышло: прерывает текущую итерацию углубления.
+    """
+
+
+class SearchResult:
+    """
+    Итог анализа: лучший ход (start, end), оценка с точки зрения ходящего,
+    завершённая глубина, число узлов и время.
+    """
+    __slots__ = ('move', 'score', 'depth', 'nodes', 'elapsed', 'pv')
+
+    def __init__(self, move, score, depth, nodes, elapsed, pv=()):
+        self.move = move
+        self.score = score
+        self.depth = depth
+        self.nodes = nodes
+        self.elapsed = elapsed
+        self.pv = pv # главная линия: ходы (start, end)
+
+    @property
+    def nps(self):
+        return self.nodes / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __repr__(self):
+        return (f"SearchResult(move={self.move}, score={self.score}, depth={self.depth}, "
+                f"nodes={self.nodes}, nps={self.nps:.0f})")
+
+
+class Engine:
+    """
+    Поисковик. Таблица транспозиций, киллеры и история сохраняются между вызовами search,
+    поэтому повторный анализ той же партии быстрее.
+    """
+    # Как часто (в узлах) проверять, не вышло ли время
+    CHECK_EVERY = 1024
+
+    def __init__(self, tt_size=1 << 18, tablebase=None, book=None):
+        self.tt = TranspositionTable(tt_size)
+        # tablebase.Tablebase: в позициях с малым материалом ответ берётся из эндшпильной базы
+        self.tablebase = tablebase
+        # book.OpeningBook: известные позиции начала партии не анализируются заново
+        self.book = book
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        self.history = {}
+        self.nodes = 0
+        self.deadline = None
+
+    def search(self, board, time_limit=1.0, max_depth=MAX_PLY - 1, on_iteration=None, root_moves=None):
+        """
+        Итеративное углубление до max_depth или пока не выйдет time_limit секунд.
+        Возвращает результат последней полностью завершённой итерации
+        (если не успели ни одной — первый допустимый ход).
+        :param board: chess_my.Board, ходит board.turn
+        :param time_limit: бюджет времени в секундах (None — без ограничения)
+        :param max_depth:
+        :param on_iteration: вызывается с SearchResult после каждой завершённой глубины
+        :param root_moves: искать только среди этих ходов (по умолчанию — все допустимые)
+        :return: SearchResult; move = None, если ходов нет
+        """
+        if root_moves is None:
+            for source in (self.book, self.tablebase):
+                result = source.search(board) if source is not None else None
+                if result is not None:
+                    return result
+        started = time.perf_counter()
+        self.deadline = started + time_limit if time_limit is not None else None
+        self.nodes = 0
+        self.tt.new_search()
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+
+        legal = board.legal_moves()
+        root_moves = legal if root_moves is None else [move for move in root_moves if move in legal]
+        if not root_moves:
+            score = -MATE_SCORE if board.is_check() else 0
+            return SearchResult(None, score, 0, 0, 0.0)
+        result = SearchResult(root_moves[0], 0, 0, 0, 0.0, (root_moves[0],))
+
+        for depth in range(1, max_depth + 1):
+            try:
+                score, move = self._root(board, root_moves, depth)
+            except SearchTimeout:
+                break
+            elapsed = time.perf_counter() - started
+            result = SearchResult(move, score, depth, self.nodes, elapsed,
+                                  self.principal_variation(board, depth, move))
+            if on_iteration is not None:
+                on_iteration(result)
+            # Найден форсированный мат — глубже искать незачем
+            if abs(score) >= MATE_SCORE - MAX_PLY:
+                break
+            # Лучший ход предыдущей итерации ищем первым
+            root_moves.remove(move)
+            root_moves.insert(0, move)
+
+        result.nodes = self.nodes
+        result.elapsed = time.perf_counter() - started
+        return result
+
+    def _root(self, board, moves, depth):
+        alpha, beta = -INFINITY, INFINITY
+        best_move = moves[0]
+        for move in moves:
+            record = board.make_move(*move)
+            try:
+                score = -self._alpha_beta(board, depth - 1, -beta, -alpha, 1)
+            finally:
+                board.unmake_move(record)
+            if score > alpha:
+                alpha = score
+                best_move = move
+        return alpha, best_move
+
+    def _tick(self):
+        self.nodes += 1
+        if self.deadline is not None and self.nodes % self.CHECK_EVERY == 0 \
+                and time.perf_counter() >= self.deadline:
+            raise SearchTimeout()
+
+    def _alpha_beta(self, board, depth, alpha, beta, ply):
+        self._tick()
+        if depth <= 0 or ply >= MAX_PLY - 1:
+            return self._quiescence(board, alpha, beta, ply)
+
+        key = board.zobrist_key
+        original_alpha = alpha
+        entry = self.tt.probe(key)
+        tt_move = None
+        if entry is not None:
+            tt_move = entry[4]
+            if entry[1] >= depth:
+                value, flag = _from_table(entry[2], ply), entry[3]
+                if flag == EXACT:
+                    return value
+                if flag == LOWER and value >= beta:
+                    return value
+                if flag == UPPER and value <= alpha:
+                    return value
+
+        moves = board.legal_moves()
+        if not moves:
+            # Мат (чем ближе, тем хуже для проигрывающего) или пат
+            return -MATE_SCORE + ply if board.is_check() else 0
+
+        best_score = -INFINITY
+        best_move = None
+        for move in self._ordered(board, moves, tt_move, ply):
+            record = board.make_move(*move)
+            try:
+                score = -self._alpha_beta(board, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                board.unmake_move(record)
+            if score > best_score:
+                best_score = score
+                best_move = move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                if not record.captured:
+                    self._remember_cutoff(move, depth, ply)
+                break
+
+        if best_score <= original_alpha:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt.store(key, depth, _to_table(best_score, ply), flag, best_move)
+        return best_score
+
+    def _quiescence(self, board, alpha, beta, ply):
+        """
+        Доигрывает только взятия (и взрывы Камикадзе), пока позиция не станет спокойной.
+        """
+        self._tick()
+        stand_pat = evaluate(board)
+        if stand_pat >= beta or ply >= MAX_PLY - 1:
+            return stand_pat
+        if stand_pat > alpha:
+            alpha = stand_pat
+
+        captures = board.legal_captures()
+        captures.sort(key=lambda move: self._mvv_lva(board, move), reverse=True)
+        for move in captures:
+            record = board.make_move(*move)
+            try:
+                score = -self._quiescence(board, -beta, -alpha, ply + 1)
+            finally:
+                board.unmake_move(record)
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+        return alpha
+
+    @staticmethod
+    def _mvv_lva(board, move):
+        """
+        Ключ сортировки взятий: сначала самая ценная жертва, при равных — самый дешёвый нападающий.
+        Взрыв Камикадзе стоит ему самого себя, поэтому из ценности жертвы вычитается его полная цена.
+        """
+        (start_row, start_col), (end_row, end_col) = move
+        attacker = board.squares[start_row * 8 + start_col]
+        victim = board.squares[end_row * 8 + end_col]
+        if isinstance(attacker, Kamikaze):
+            return (piece_value(victim) - piece_value(attacker)) * 16
+        return piece_value(victim) * 16 - piece_value(attacker) // 16
+
+    def _ordered(self, board, moves, tt_move, ply):
+        squares = board.squares
+        killers = self.killers[ply]
+        history = self.history
+
+        def priority(move):
+            if move == tt_move:
+                return 1 << 30
+            end = move[1]
+            if squares[end[0] * 8 + end[1]] is not None:
+                return (1 << 24) + self._mvv_lva(board, move)
+            if move == killers[0]:
+                return 1 << 23
+            if move == killers[1]:
+                return (1 << 23) - 1
+            return history.get(move, 0)
+
+        return sorted(moves, key=priority, reverse=True)
+
+    def _remember_cutoff(self, move, depth, ply):
+        """
+        Тихий ход вызвал отсечение: запоминаем его как киллер этого уровня и поднимаем в истории.
+        """
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        self.history[move] = min(self.history.get(move, 0) + depth * depth, (1 << 22))
+
+    def principal_variation(self, board, depth, first_move):
+        """
+        Главная линия: first_move и продолжение из таблицы транспозиций (всего не длиннее depth ходов).
+        """
+        pv = [first_move]
+        records = [board.make_move(*first_move)]
+        seen = set()
+        for _ in range(depth - 1):
+            key = board.zobrist_key
+            entry = self.tt.probe(key)
+            if entry is None or entry[4] is None or key in seen:
+                break
+            move = entry[4]
+            if move not in board.legal_moves():
+                break
+            seen.add(key)
+            pv.append(move)
+            records.append(board.make_move(*move))
+        for record in reversed(records):
+            board.unmake_move(record)
+        return tuple(pv)
+
+
+def format_score(score):
+    """
+    Оценка для вывода: '+1.25' в пешках или 'мат в N' (N — число своих ходов).
+    """
+    if abs(score) >= MATE_SCORE - MAX_PLY:
+        plies = MATE_SCORE - abs(score)
+        moves = (plies + 1) // 2
+        return f"мат в {moves}" if score > 0 else f"получаем мат в {moves}"
+    return f"{score / 100:+.2f}"
+
+
+def format_move(move):
+    start, end = move
+    return Board.coords_to_algebraic(start) + Board.coords_to_algebraic(end)
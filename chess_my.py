@@ -1,20 +1,289 @@
+import random
+from collections.abc import MutableMapping
+
+from render import MODES, Renderer, mark_threat
+
+
+# Координаты клеток по индексу row * 8 + col. Кортежи создаются один раз,
+# и генераторы ходов возвращают именно их, а не новые (row, col).
+COORDS = tuple((row, col) for row in range(8) for col in range(8))
+
+# Бит клетки по её индексу: маски клеток назначения строятся из них
+BITS = tuple(1 << index for index in range(64))
+
+# Упакованный ход — целое число: from | to << 6 | флаги << 12 (индексы клеток row * 8 + col)
+MOVE_CAPTURE = 1 # ход снимает фигуру соперника
+MOVE_EXPLOSION = 2 # Камикадзе взрывается вместе с целью
+MOVE_PROMOTION = 4 # превращение (в текущих правилах пешка не превращается; флаг для совместимости форматов)
+
+def encode_move(from_index, to_index, flags=0):
+    return from_index | to_index << 6 | flags << 12
+
+def decode_move(move):
+    """
+    Упакованный ход -> (start, end, flags), где start и end — (row, col).
+    :param move:
+    :return:
+    """
+    return COORDS[move & 63], COORDS[(move >> 6) & 63], move >> 12
+
+_LEAP_TABLES = {}
+_RAY_TABLES = {}
+
+def leap_table(offsets):
+    """
+    Таблица прыжков: для каждой из 64 клеток — кортеж индексов клеток, куда можно
+    прыгнуть со смещениями offsets, не выходя за доску. Строится один раз на набор смещений.
+    :param offsets: последовательность (d_row, d_col)
+    :return:
+    """
+    offsets = tuple(offsets)
+    table = _LEAP_TABLES.get(offsets)
+    if table is None:
+        table = tuple(
+            tuple((row + dr) * 8 + col + dc for dr, dc in offsets
+                  if 0 <= row + dr < 8 and 0 <= col + dc < 8)
+            for row, col in COORDS
+        )
+        _LEAP_TABLES[offsets] = table
+    return table
+
+def ray_table(direction):
+    """
+    Таблица лучей: для каждой клетки — кортеж индексов клеток вдоль направления
+    (d_row, d_col) от ближней к дальней, до края доски.
+    :param direction:
+    :return:
+    """
+    direction = tuple(direction)
+    table = _RAY_TABLES.get(direction)
+    if table is None:
+        dr, dc = direction
+        rays = []
+        for row, col in COORDS:
+            ray = []
+            r, c = row + dr, col + dc
+            while 0 <= r < 8 and 0 <= c < 8:
+                ray.append(r * 8 + c)
+                r += dr
+                c += dc
+            rays.append(tuple(ray))
+        table = tuple(rays)
+        _RAY_TABLES[direction] = table
+    return table
+
+
+def attack_table(offsets=(), directions=()):
+    """
+    Таблица атак: для каждой клетки — словарь {клетка-цель: клетки между ними}.
+    Для прыжка между клетками ничего нет, для луча — все клетки луча до цели.
+    Фигура бьёт цель, если все клетки "между" пусты.
+    :param offsets:
+    :param directions:
+    :return:
+    """
+    leaps = leap_table(offsets)
+    rays = [ray_table(direction) for direction in directions]
+    table = []
+    for index in range(64):
+        paths = {target: () for target in leaps[index]}
+        for ray_list in rays:
+            ray = ray_list[index]
+            for distance, target in enumerate(ray):
+                paths[target] = ray[:distance]
+        table.append(paths)
+    return tuple(table)
+
+def zobrist_table(name, color):
+    """
+    64 случайных 64-битных ключа Zobrist для фигуры name цвета color (по ключу на клетку).
+    Генератор инициализируется строкой, поэтому ключи одинаковы при каждом запуске
+    и во всех процессах — хеши можно хранить на диске и передавать между процессами.
+    :param name:
+    :param color:
+    :return:
+    """
+    rng = random.Random(f"zobrist:{name}:{color}")
+    return tuple(rng.getrandbits(64) for _ in range(64))
+
+# Ключ "ходят чёрные": входит в хеш позиции вместе с ключами фигур
+ZOBRIST_BLACK_TO_MOVE = random.Random("zobrist:side").getrandbits(64)
+
+
 class Piece:
     """
     Базовый класс для фигур.
+    Фигуре-"прыгуну" достаточно задать offsets, дальнобойной фигуре — directions:
+    таблицы ходов для них строятся автоматически при объявлении класса,
+    а get_valid_moves базового класса ходит по этим таблицам.
+
+    Фигуры неизменяемы и существуют в одном экземпляре на (тип, цвет): Pawn('white')
+    всегда возвращает один и тот же объект. Поэтому копии доски, история и превращения
+    не создают новых фигур. Потомкам нужно объявить __slots__ = () и symbols.
     """
+    __slots__ = ('color', 'symbol')
+    letter = None # буква фигуры в FEN (у белых заглавная, у чёрных строчная)
+    symbols = ('?', '?') # как печатается фигура: (белая, чёрная)
+    offsets = () # смещения (d_row, d_col) для прыжков на одну позицию
+    directions = () # направления (d_row, d_col) для ходов по линии
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Для каждой клетки: индексы целей прыжков и лучи во всех направлениях
+        cls.leap_targets = leap_table(cls.offsets)
+        ray_tables = [ray_table(direction) for direction in cls.directions]
+        cls.ray_lines = tuple(tuple(table[index] for table in ray_tables) for index in range(64))
+        # Атаки по цветам: attack_paths[color][index] = {цель: клетки между}.
+        # Фигуры, которые бьют не так, как ходят, задают attack_paths в теле класса.
+        if 'attack_paths' not in cls.__dict__:
+            paths = attack_table(cls.offsets, cls.directions)
+            cls.attack_paths = {'white': paths, 'black': paths}
+        # Бьёт ли фигура по лучам (атаки зависят от того, что стоит между ней и целью)
+        cls.slides = any(between for paths in cls.attack_paths.values()
+                         for targets in paths for between in targets.values())
+        # Ключи Zobrist по цветам: zobrist_keys[color][index]
+        cls.zobrist_keys = {color: zobrist_table(cls.__name__, color) for color in ('white', 'black')}
+
+    # Общие экземпляры фигур: {(класс, цвет): фигура}
+    _instances = {}
+
+    def __new__(cls, color):
+        piece = Piece._instances.get((cls, color))
+        if piece is None:
+            piece = object.__new__(cls)
+            object.__setattr__(piece, 'color', color) # color: 'white' или 'black'
+            object.__setattr__(piece, 'symbol', cls.symbols[0] if color == 'white' else cls.symbols[1])
+            Piece._instances[(cls, color)] = piece
+        return piece
+
     def __init__(self, color):
-        self.color = color # color: 'white' или 'black'
-        self.symbol = '?' # Переопределяется в потомках
+        # Всё уже задано в __new__: повторный вызов для общего экземпляра ничего не меняет
+        pass
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Фигуры неизменяемы: один экземпляр используется на всех досках.")
+
+    def __reduce__(self):
+        # При pickle/copy восстанавливается тот же общий экземпляр
+        return type(self), (self.color,)
 
     def get_valid_moves(self, board, start_row, start_col):
         """
         Возвращает список (row, col), куда может пойти фигура с начального положения(start_row, start_col).
+        По умолчанию ходы берутся из таблиц offsets/directions: прыжок допустим на пустую клетку
+        или на фигуру соперника, луч идёт до первой фигуры (чужую можно взять).
         :param board:
         :param start_row:
         :param start_col:
         :return:
         """
-        raise NotImplementedError("Этот метод нужно переопределить в дочерних классах.")
+        if not self.offsets and not self.directions:
+            raise NotImplementedError("Этот метод нужно переопределить в дочерних классах.")
+        squares = board.squares
+        color = self.color
+        index = start_row * 8 + start_col
+        moves = []
+        for target in self.leap_targets[index]:
+            piece = squares[target]
+            # Если клетка свободна или занята противником, ход допустим
+            if piece is None or piece.color != color:
+                moves.append(COORDS[target])
+        for ray in self.ray_lines[index]:
+            for target in ray:
+                piece = squares[target]
+                if piece is None:
+                    moves.append(COORDS[target])
+                else:
+                    # Фигуру соперника можно "съесть", дальше идти нельзя
+                    if piece.color != color:
+                        moves.append(COORDS[target])
+                    break
+        return moves
+
+    def target_mask(self, board, index):
+        """
+        Те же ходы, что get_valid_moves, но битовой маской клеток назначения (бит row * 8 + col).
+        Не создаёт списков и кортежей, а проверка "можно ли пойти на клетку" — один сдвиг.
+        :param board:
+        :param index: клетка фигуры, row * 8 + col
+        :return:
+        """
+        squares = board.squares
+        mask = 0
+        if not self.offsets and not self.directions:
+            # Фигура со своим get_valid_moves без таблиц
+            row, col = COORDS[index]
+            for target_row, target_col in self.get_valid_moves(board, row, col):
+                mask |= BITS[target_row * 8 + target_col]
+            return mask
+        color = self.color
+        for target in self.leap_targets[index]:
+            piece = squares[target]
+            if piece is None or piece.color != color:
+                mask |= BITS[target]
+        for ray in self.ray_lines[index]:
+            for target in ray:
+                piece = squares[target]
+                if piece is None:
+                    mask |= BITS[target]
+                else:
+                    if piece.color != color:
+                        mask |= BITS[target]
+                    break
+        return mask
+
+    def can_reach(self, board, start_index, end_index):
+        """
+        Может ли фигура пойти с клетки start_index на end_index. Проверяется только нужный
+        прыжок или луч (до первой помехи), без генерации всех ходов.
+        :param board:
+        :param start_index:
+        :param end_index:
+        :return:
+        """
+        squares = board.squares
+        target = squares[end_index]
+        if target is not None and target.color == self.color:
+            return False
+        if not self.offsets and not self.directions:
+            return bool((self.target_mask(board, start_index) >> end_index) & 1)
+        # У фигур с таблицами ходы совпадают с атаками: цель и клетки между ней и фигурой
+        return self.attacks_square(board, start_index, end_index)
+
+    def attacks_square(self, board, start_index, target_index):
+        """
+        Бьёт ли фигура с клетки start_index клетку target_index (индексы row * 8 + col).
+        :param board:
+        :param start_index:
+        :param target_index:
+        :return:
+        """
+        between = self.attack_paths[self.color][start_index].get(target_index)
+        if between is None:
+            return False
+        squares = board.squares
+        for index in between:
+            if squares[index] is not None:
+                return False
+        return True
+
+    def attack_mask(self, board, index):
+        """
+        Битовая маска клеток, которые фигура с клетки index бьёт при текущей расстановке
+        (включая клетки со своими фигурами — их она защищает).
+        :param board:
+        :param index:
+        :return:
+        """
+        squares = board.squares
+        mask = 0
+        for target, between in self.attack_paths[self.color][index].items():
+            for square in between:
+                if squares[square] is not None:
+                    break
+            else:
+                mask |= BITS[target]
+        return mask
 
     def __str__(self):
         """
@@ -24,162 +293,161 @@ class Piece:
         return self.symbol
 
 class Pawn(Piece): # пешка
-    def __init__(self, color):
-        super().__init__(color)
-        self.symbol = '♙' if color == 'white' else '♟'
+    __slots__ = ()
+    letter = 'P'
+    symbols = ('♙', '♟')
+    # Взятия по диагонали вперёд: у каждого цвета своя таблица
+    capture_targets = {
+        'white': leap_table(((-1, -1), (-1, 1))),
+        'black': leap_table(((1, -1), (1, 1))),
+    }
+    # Пешка бьёт только по диагонали вперёд, а не туда, куда ходит
+    attack_paths = {
+        'white': attack_table(((-1, -1), (-1, 1))),
+        'black': attack_table(((1, -1), (1, 1))),
+    }
 
     def get_valid_moves(self, board, start_row, start_col):
+        squares = board.squares
         moves = []
-        # У белых пешка движется "вверх" (row уменьшается), у чёрных — "вниз" (row увеличивается).
-        # Но как именно – зависит от того, как вы решили считать координаты.
-        # Допустим, row=0 вверху, row=7 внизу, тогда белая пешка ходит от row=6 к row=5 и т.д.
+        # row=0 вверху, row=7 внизу: белая пешка ходит от row=6 к row=5 и т.д.
         direction = -1 if self.color == 'white' else 1
 
         # 1) Ход вперёд на 1 клетку (если она свободна)
         forward_row = start_row + direction
-        if board.is_on_board(forward_row, start_col) and not board.get_piece(forward_row, start_col):
-            moves.append((forward_row, start_col))
-
-            # 2) Если пешка в начальной позиции, может сделать ход на 2 клетки (если свободно)
-            if self.color == 'white' and start_row == 6:
-                two_forward = start_row + 2 * direction
-                if not board.get_piece(two_forward, start_col):
-                    moves.append((two_forward, start_col))
-            if self.color == 'black' and start_row == 1:
-                two_forward = start_row + 2 * direction
-                if not board.get_piece(two_forward, start_col):
-                    moves.append((two_forward, start_col))
-
-        # 3) Съесть фигуру по диагоналям
-        for dc in [-1, 1]:
-            diag_row = start_row + direction
-            diag_col = start_col + dc
-            if board.is_on_board(diag_row, diag_col):
-                piece = board.get_piece(diag_row, diag_col)
-                # Если там фигура противоположного цвета, можно её "съесть"
-                if piece and piece.color != self.color:
-                    moves.append((diag_row, diag_col))
+        if 0 <= forward_row < 8:
+            forward = forward_row * 8 + start_col
+            if squares[forward] is None:
+                moves.append(COORDS[forward])
+
+                # 2) Если пешка в начальной позиции, может сделать ход на 2 клетки (если свободно)
+                if start_row == (6 if self.color == 'white' else 1):
+                    two_forward = forward + 8 * direction
+                    if squares[two_forward] is None:
+                        moves.append(COORDS[two_forward])
+
+        # 3) Съесть фигуру соперника по диагонали
+        for target in self.capture_targets[self.color][start_row * 8 + start_col]:
+            piece = squares[target]
+            if piece is not None and piece.color != self.color:
+                moves.append(COORDS[target])
 
         return moves
 
-class Rook(Piece): # ладья
-    def __init__(self, color):
-        super().__init__(color)
-        self.symbol = '♖' if color == 'white' else '♜'
+    def can_reach(self, board, start_index, end_index):
+        squares = board.squares
+        target = squares[end_index]
+        if target is not None:
+            # Занятую клетку пешка может только взять по диагонали
+            return target.color != self.color and end_index in self.capture_targets[self.color][start_index]
+        direction = -8 if self.color == 'white' else 8
+        if end_index == start_index + direction and start_index % 8 == end_index % 8:
+            return True
+        return (end_index == start_index + 2 * direction
+                and start_index // 8 == (6 if self.color == 'white' else 1)
+                and squares[start_index + direction] is None)
+
+    def target_mask(self, board, index):
+        squares = board.squares
+        mask = 0
+        direction = -8 if self.color == 'white' else 8
+        forward = index + direction
+        if 0 <= forward < 64 and squares[forward] is None:
+            mask |= BITS[forward]
+            if index // 8 == (6 if self.color == 'white' else 1) and squares[forward + direction] is None:
+                mask |= BITS[forward + direction]
+        for target in self.capture_targets[self.color][index]:
+            piece = squares[target]
+            if piece is not None and piece.color != self.color:
+                mask |= BITS[target]
+        return mask
 
-    def get_valid_moves(self, board, start_row, start_col):
-        moves = []
-        # Ладья ходит по вертикали и горизонтали
-        directions = [(1, 0),(-1, 0),(0, 1),(0, -1)]
-        for d_row, d_col in directions:
-            # Для каждого направления получаем все ходы вдоль линии
-            line_moves = board.get_line_moves(self, start_row, start_col, d_row, d_col)
-            moves.extend(line_moves)
-        return moves
+class Rook(Piece): # ладья
+    __slots__ = ()
+    letter = 'R'
+    symbols = ('♖', '♜')
+    # Ладья ходит по вертикали и горизонтали
+    directions = ((1, 0), (-1, 0), (0, 1), (0, -1))
 
 class Knight(Piece):
-    def __init__(self, color):
-        super().__init__(color)
-        self.symbol = '♘' if color == 'white' else '♞'
-
-    def get_valid_moves(self, board, start_row, start_col):
-        moves = []
-        # Возможные ходы коня (две клетки в одном направлении и одна в перпендикулярном)
-        knight_moves = [
-            (2, 1), (2, -1), (-2, 1), (-2, -1),
-            (1, 2), (1, -2), (-1, 2), (-1, -2)
-        ]
-        for dr, dc in knight_moves:
-            r = start_row + dr
-            c = start_col + dc
-            # Проверяем, что клетка (r, c) находится внутри доски
-            if board.is_on_board(r, c):
-                piece = board.get_piece(r, c)
-                # Если клетка свободна или занята противником, ход допустим
-                if not piece or piece.color != self.color:
-                    moves.append((r, c))
-        return moves
+    __slots__ = ()
+    letter = 'N'
+    symbols = ('♘', '♞')
+    # Возможные ходы коня (две клетки в одном направлении и одна в перпендикулярном)
+    offsets = (
+        (2, 1), (2, -1), (-2, 1), (-2, -1),
+        (1, 2), (1, -2), (-1, 2), (-1, -2)
+    )
 
 class Bishop(Piece):
-    def __init__(self, color):
-        super().__init__(color)
-        self.symbol = '♗' if color == 'white' else '♝'
-
-    def get_valid_moves(self, board, start_row, start_col):
-        moves = []
-        # Слон движется по диагоналям: 4 диагональных направления
-        directions = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
-        for d_row, d_col in directions:
-            moves.extend(board.get_line_moves(self, start_row, start_col, d_row, d_col))
-        return moves
+    __slots__ = ()
+    letter = 'B'
+    symbols = ('♗', '♝')
+    # Слон движется по диагоналям: 4 диагональных направления
+    directions = ((1, 1), (1, -1), (-1, 1), (-1, -1))
 
 class Queen(Piece):
-    def __init__(self, color):
-        super().__init__(color)
-        self.symbol = '♕' if color == 'white' else '♛'
-
-    def get_valid_moves(self, board, start_row, start_col):
-        moves = []
-        # Ферзь может двигаться как ладья (вертикаль/горизонталь) и как слон (диагонали)
-        directions = [
-            (1, 0), (-1, 0), (0, 1), (0, -1), # вертикальные и горизонтальные направления
-            (1, 1), (1, -1), (-1, 1), (-1, -1) # диагональные направления
-        ]
-        for d_row, d_col in directions:
-            moves.extend(board.get_line_moves(self, start_row, start_col, d_row, d_col))
-        return moves
+    __slots__ = ()
+    letter = 'Q'
+    symbols = ('♕', '♛')
+    # Ферзь может двигаться как ладья (вертикаль/горизонталь) и как слон (диагонали)
+    directions = (
+        (1, 0), (-1, 0), (0, 1), (0, -1), # вертикальные и горизонтальные направления
+        (1, 1), (1, -1), (-1, 1), (-1, -1) # диагональные направления
+    )
 
 class King(Piece):
-    def __init__(self, color):
-        super().__init__(color)
-        self.symbol = '♔' if color == 'white' else '♚'
-
-    def get_valid_moves(self, board, start_row, start_col):
-        moves = []
-        # Король перемещается на одну клетку во всех 8 направлениях
-        king_moves = [
-            (1, 0), (-1, 0), (0, 1), (0, -1),
-            (1, 1), (1, -1), (-1, 1), (-1, -1)
-        ]
-        for dr, dc in king_moves:
-            r = start_row + dr
-            c = start_col + dc
-            if board.is_on_board(r, c):
-                piece = board.get_piece(r, c)
-                # Король может пойти, если клетка свободна или там фигура противника
-                if not piece or piece.color != self.color:
-                    moves.append((r, c))
-        return moves
+    __slots__ = ()
+    letter = 'K'
+    symbols = ('♔', '♚')
+    # Король перемещается на одну клетку во всех 8 направлениях
+    offsets = (
+        (1, 0), (-1, 0), (0, 1), (0, -1),
+        (1, 1), (1, -1), (-1, 1), (-1, -1)
+    )
 
 class Kamikaze(Piece):
-    def __init__(self, color):
-        super().__init__(color)
-        self.symbol = '⸱K⸱' if color == 'white' else '⸱k⸱'
+    __slots__ = ()
+    letter = 'X'
+    symbols = ('⸱K⸱', '⸱k⸱')
+    # 1. Ход влево и вправо на одну клетку
+    offsets = ((0, -1), (0, 1))
+    # 2. Ход вперед до конца: направление зависит от цвета
+    forward_rays = {
+        'white': ray_table((-1, 0)),
+        'black': ray_table((1, 0)),
+    }
+    attack_paths = {
+        'white': attack_table(offsets, ((-1, 0),)),
+        'black': attack_table(offsets, ((1, 0),)),
+    }
 
     def get_valid_moves(self, board, start_row, start_col):
-        moves = []
-        # 1. Ход влево и вправо на одну клетку
-        for dc in [-1, 1]:
-            r, c = start_row, start_col + dc
-            if board.is_on_board(r, c):
-                piece = board.get_piece(r, c)
-                if not piece or piece.color != self.color:  # Свободная клетка или чужая фигура
-                    moves.append((r, c))
-
-        # 2. Ход вперед до конца
-        direction = -1 if self.color == 'white' else 1
-        r, c = start_row + direction, start_col
-        while board.is_on_board(r, c):
-            piece = board.get_piece(r, c)
-            if piece:  # Если встретилась фигура
+        moves = super().get_valid_moves(board, start_row, start_col)
+
+        squares = board.squares
+        for target in self.forward_rays[self.color][start_row * 8 + start_col]:
+            piece = squares[target]
+            if piece is not None:  # Если встретилась фигура
                 if piece.color != self.color:  # Взорвем фигуру противника
-                    moves.append((r, c))
+                    moves.append(COORDS[target])
                 break  # Взорвемся или остановимся
-            moves.append((r, c))
-            r += direction  # Идем дальше
+            moves.append(COORDS[target])
 
         return moves
 
+    def target_mask(self, board, index):
+        mask = super().target_mask(board, index)
+        squares = board.squares
+        for target in self.forward_rays[self.color][index]:
+            piece = squares[target]
+            if piece is not None:
+                if piece.color != self.color:
+                    mask |= BITS[target]
+                break
+            mask |= BITS[target]
+        return mask
+
     def explode(self, board, start_row, start_col, end_row, end_col):
         """
         Метод для подрыва фигуры. Уничтожает себя и фигуру противника.
@@ -198,47 +466,289 @@ class Kamikaze(Piece):
         return
 
 class Commander(Piece):
-    def __init__(self, color):
-        super().__init__(color)
-        self.symbol = '⬭' if color == 'white' else '⬬'
-
-    def get_valid_moves(self, board, start_row, start_col):
-        moves = []
-        directions = [(2, 0), (-2, 0), (0, 2), (0, -2),  # Ход как ферзь на 2 клетки
-                      (2, 2), (2, -2), (-2, 2), (-2, -2)]
-        for dr, dc in directions:
-            r, c = start_row + dr, start_col + dc
-            if board.is_on_board(r, c):
-                piece = board.get_piece(r, c)
-                if not piece or piece.color != self.color:
-                    moves.append((r, c))
-
-        # Взятие на проходе (отслеживание хода противника нужно реализовать отдельно)
-        return moves
+    __slots__ = ()
+    letter = 'C'
+    symbols = ('⬭', '⬬')
+    # Ход как ферзь ровно на 2 клетки (с перепрыгиванием)
+    offsets = ((2, 0), (-2, 0), (0, 2), (0, -2),
+               (2, 2), (2, -2), (-2, 2), (-2, -2))
 
 class Champion(Piece):
-    def __init__(self, color):
-        super().__init__(color)
-        self.symbol = '⛉' if color == 'white' else '⛊'
+    __slots__ = ()
+    letter = 'H'
+    symbols = ('⛉', '⛊')
+    # Прыжки через одну клетку по диагонали
+    offsets = ((2, 2), (2, -2), (-2, 2), (-2, -2))
+
+# Порядок типов фигур задаёт их коды в компактной записи доски (Board.pack) и в битбордах
+PIECE_TYPES = (Pawn, Knight, Bishop, Rook, Queen, King, Kamikaze, Commander, Champion)
+COLORS = ('white', 'black')
+# Фигуры по буквам FEN; новую фигуру достаточно добавить сюда со своей буквой
+FEN_PIECES = {piece_type.letter: piece_type for piece_type in PIECE_TYPES}
+# Начальная расстановка setup_pieces в FEN: X — Камикадзе, C — Командир, H — Чемпион
+START_FEN = "rnbqkbnr/pppppppp/3ch2x/8/8/X2CH3/PPPPPPPP/RNBQKBNR w"
+
+class MoveBuffer:
+    """
+    Заранее выделенный буфер для упакованных ходов (см. Board.generate_packed_moves).
+    Один буфер на уровень поиска/perft переиспользуется, поэтому на узел не создаётся новый список.
+    """
+    __slots__ = ('moves', 'count')
+
+    def __init__(self, capacity=256):
+        self.moves = [0] * capacity
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        moves = self.moves
+        for index in range(self.count):
+            yield moves[index]
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        return self.moves[index]
+
+class MoveRecord:
+    """
+    Запись о сделанном ходе, достаточная для его отката (см. Board.make_move/unmake_move).
+    Хранит не копию доски, а только изменения: какая фигура ходила, какие фигуры
+    были сняты с доски (в том числе жертвы взрыва Камикадзе) и флаги хода.
+    """
+    __slots__ = ('start', 'end', 'piece', 'captured', 'exploded', 'key')
+
+    def __init__(self, start, end, piece, captured=(), exploded=False, key=0):
+        self.start = start # (row, col) откуда ходили
+        self.end = end # (row, col) куда ходили
+        self.piece = piece # фигура, которая ходила
+        self.captured = captured # кортеж ((row, col), Piece) снятых с доски фигур
+        self.exploded = exploded # True, если Камикадзе взорвался вместо обычного хода
+        self.key = key # Zobrist-ключ расстановки до хода
+
+    def __repr__(self):
+        return f"MoveRecord({self.start} -> {self.end}, {self.piece}, captured={len(self.captured)})"
+
+class Grid(MutableMapping):
+    """
+    Плоский массив на 64 клетки с интерфейсом словаря {(row, col): Piece}.
+    Клетка (row, col) хранится под индексом row * 8 + col, поэтому доступ к ней
+    не требует хеширования кортежа. Пустая клетка хранит None и считается
+    отсутствующей в "словаре".
+    Попутно поддерживается Zobrist-ключ расстановки key: любая запись через
+    интерфейс словаря (в том числе взрыв Камикадзе) обновляет его.
+    """
+    __slots__ = ('squares', 'key')
+
+    def __init__(self, items=None):
+        self.squares = [None] * 64
+        self.key = 0
+        if items:
+            for pos, piece in dict(items).items():
+                self[pos] = piece
+
+    @staticmethod
+    def _index(pos):
+        """
+        Переводит (row, col) в индекс массива или возвращает None, если клетка вне доски.
+        :param pos:
+        :return:
+        """
+        try:
+            row, col = pos
+        except (TypeError, ValueError):
+            return None
+        if 0 <= row < 8 and 0 <= col < 8:
+            return row * 8 + col
+        return None
+
+    def __getitem__(self, pos):
+        index = self._index(pos)
+        piece = self.squares[index] if index is not None else None
+        if piece is None:
+            raise KeyError(pos)
+        return piece
+
+    def __setitem__(self, pos, piece):
+        index = self._index(pos)
+        if index is None:
+            raise KeyError(f"Клетка {pos} находится вне доски.")
+        old_piece = self.squares[index]
+        if old_piece is not None:
+            self.key ^= old_piece.zobrist_keys[old_piece.color][index]
+        if piece is not None:
+            self.key ^= piece.zobrist_keys[piece.color][index]
+        self.squares[index] = piece
+
+    def __delitem__(self, pos):
+        index = self._index(pos)
+        if index is None or self.squares[index] is None:
+            raise KeyError(pos)
+        old_piece = self.squares[index]
+        self.key ^= old_piece.zobrist_keys[old_piece.color][index]
+        self.squares[index] = None
+
+    def __contains__(self, pos):
+        index = self._index(pos)
+        return index is not None and self.squares[index] is not None
+
+    def get(self, pos, default=None):
+        index = self._index(pos)
+        piece = self.squares[index] if index is not None else None
+        return default if piece is None else piece
+
+    def __iter__(self):
+        for index, piece in enumerate(self.squares):
+            if piece is not None:
+                yield divmod(index, 8)
+
+    def __len__(self):
+        return 64 - self.squares.count(None)
+
+    def copy(self):
+        new_grid = Grid()
+        new_grid.squares[:] = self.squares
+        new_grid.key = self.key
+        return new_grid
+
+    def compute_key(self):
+        """
+        Считает Zobrist-ключ расстановки с нуля (для проверки и после прямой записи в squares).
+        :return:
+        """
+        key = 0
+        for index, piece in enumerate(self.squares):
+            if piece is not None:
+                key ^= piece.zobrist_keys[piece.color][index]
+        return key
+
+class AttackMaps:
+    """
+    Карты атак обеих сторон, которые доска поддерживает по ходу партии (Board.enable_attack_maps).
+    counts[color][index] — сколько фигур цвета color бьют клетку index, masks[color] — битовая
+    маска клеток, побитых хотя бы одной фигурой, attacks[index] — маска атак фигуры с клетки index.
+
+    После хода пересчитываются только фигуры на изменившихся клетках и дальнобойные фигуры,
+    чьи лучи доходили до этих клеток: только у них луч мог открыться или перекрыться.
+    """
+    __slots__ = ('counts', 'masks', 'attacks', 'owners', 'sliders', 'updates')
+
+    def __init__(self, board):
+        self.counts = {'white': [0] * 64, 'black': [0] * 64}
+        self.masks = {'white': 0, 'black': 0}
+        self.attacks = [0] * 64 # маска атак фигуры, стоящей на клетке (0 для пустой)
+        self.owners = [None] * 64 # цвет фигуры, для которой посчитана attacks[index]
+        self.sliders = set() # клетки фигур, бьющих по лучам: только их атаки зависят от других клеток
+        self.updates = 0 # сколько фигур пересчитано после ходов (для оценки выигрыша)
+        for index, piece in enumerate(board.squares):
+            if piece is not None:
+                self._add(index, piece, piece.attack_mask(board, index))
+
+    def _add(self, index, piece, mask):
+        color = piece.color
+        self.attacks[index] = mask
+        self.owners[index] = color
+        if piece.slides:
+            self.sliders.add(index)
+        counts = self.counts[color]
+        while mask:
+            bit = mask & -mask
+            target = bit.bit_length() - 1
+            if counts[target] == 0:
+                self.masks[color] |= bit
+            counts[target] += 1
+            mask ^= bit
+
+    def _remove(self, index):
+        color = self.owners[index]
+        if color is None:
+            return
+        mask = self.attacks[index]
+        counts = self.counts[color]
+        while mask:
+            bit = mask & -mask
+            target = bit.bit_length() - 1
+            counts[target] -= 1
+            if counts[target] == 0:
+                self.masks[color] &= ~bit
+            mask ^= bit
+        self.attacks[index] = 0
+        self.owners[index] = None
+        self.sliders.discard(index)
+
+    def update(self, board, changed):
+        """
+        Обновляет карты после того, как изменились клетки changed (ход, откат, взрыв).
+        :param board:
+        :param changed: индексы изменившихся клеток
+        :return:
+        """
+        changed_mask = 0
+        for index in changed:
+            changed_mask |= BITS[index]
+        attacks = self.attacks
+        affected = set(changed)
+        # Прыгуны бьют одни и те же клетки при любой расстановке, поэтому ищем только лучи,
+        # которые доходили до изменившихся клеток
+        for index in self.sliders:
+            if attacks[index] & changed_mask:
+                affected.add(index)
+        squares = board.squares
+        for index in affected:
+            self._remove(index)
+        for index in affected:
+            piece = squares[index]
+            if piece is not None:
+                self._add(index, piece, piece.attack_mask(board, index))
+        self.updates += len(affected)
+
+    def is_attacked(self, index, by_color):
+        return self.counts[by_color][index] > 0
 
-    def get_valid_moves(self, board, start_row, start_col):
-        moves = []
-        knight_moves = [  # Прыжки через одну клетку
-            (2, 2), (2, -2), (-2, 2), (-2, -2)
-        ]
-        for dr, dc in knight_moves:
-            r, c = start_row + dr, start_col + dc
-            if board.is_on_board(r, c):
-                piece = board.get_piece(r, c)
-                if not piece or piece.color != self.color:
-                    moves.append((r, c))
-        return moves
 
 class Board:
-    def __init__(self):
-        # Словарь: ключ = (row, col), значение = объект Piece или None
-        self.grid = {}
-        self.setup_pieces()
+    def __init__(self, setup=True):
+        # Карты атак (AttackMaps) ведутся, только если их включили: enable_attack_maps
+        self.attack_maps = None
+        # Доска хранится плоским массивом (см. Grid), grid даёт к нему доступ как к словарю
+        self.grid = Grid()
+        self.turn = 'white' # чей ход; make_move/unmake_move переключают его
+        # Кэш масок ходов по клеткам для текущей расстановки (см. cached_destination_mask)
+        self._move_cache_key = None
+        self._move_cache = {}
+        # setup=False — пустая доска, например чтобы сразу заполнить её копией или из pack()
+        if setup:
+            self.setup_pieces()
+
+    @property
+    def grid(self):
+        """
+        Словарь-представление доски: ключ = (row, col), значение = объект Piece.
+        :return:
+        """
+        return self._grid
+
+    @grid.setter
+    def grid(self, value):
+        self._grid = value if isinstance(value, Grid) else Grid(value)
+        # Прямая ссылка на массив клеток для быстрых обращений внутри Board
+        self.squares = self._grid.squares
+        if self.attack_maps is not None:
+            self.attack_maps = AttackMaps(self)
+
+    @property
+    def zobrist_key(self):
+        """
+        Zobrist-хеш позиции: расстановка фигур и очередь хода.
+        Одинаковые позиции дают одинаковый ключ, поэтому он годится для поиска
+        повторений, кэширования ходов и таблицы транспозиций.
+        :return:
+        """
+        if self.turn == 'black':
+            return self._grid.key ^ ZOBRIST_BLACK_TO_MOVE
+        return self._grid.key
 
     def setup_pieces(self):
         """
@@ -290,7 +800,9 @@ class Board:
 
     def get_piece(self, row, col):
         # Возвращаем фигуру, если есть, иначе None
-        return self.grid.get((row, col))
+        if 0 <= row < 8 and 0 <= col < 8:
+            return self.squares[row * 8 + col]
+        return None
 
     def move_piece(self, start, end):
         """
@@ -298,46 +810,204 @@ class Board:
         Предполагается, что ход уже проверен (is_valid_move).
         :param start:
         :param end:
+        :return: MoveRecord для отката хода (см. make_move)
+        """
+        return self.make_move(start, end)
+
+    def make_move(self, start, end):
+        """
+        Делает ход и возвращает MoveRecord, по которому unmake_move вернёт доску назад.
+        Если на клетке start нет фигуры, ничего не делает и возвращает None.
+        :param start:
+        :param end:
         :return:
         """
-        piece = self.grid.get(start)
-        if piece:
-            target = self.grid.get(end)
-            # Если ходит Камикадзе и там есть враг — он взрывается
-            if isinstance(piece, Kamikaze) and target:
-                piece.explode(self, start[0], start[1], end[0], end[1])
-            else:
-                # Обычный ход
-                self.grid[end] = piece
-                del self.grid[start]
+        squares = self.squares
+        grid = self._grid
+        start_index = start[0] * 8 + start[1]
+        end_index = end[0] * 8 + end[1]
+        piece = squares[start_index]
+        if not piece:
+            return None
+        key = grid.key
+        target = squares[end_index]
+        self.turn = 'black' if self.turn == 'white' else 'white'
+        # Если ходит Камикадзе и там есть враг — он взрывается (ключ обновит сама grid)
+        if isinstance(piece, Kamikaze) and target:
+            piece.explode(self, start[0], start[1], end[0], end[1])
+            captured = ((end, target),) if squares[end_index] is None else ()
+            if self.attack_maps is not None:
+                self.attack_maps.update(self, (start_index, end_index))
+            return MoveRecord(start, end, piece, captured, exploded=True, key=key)
+
+        # Обычный ход
+        keys = piece.zobrist_keys[piece.color]
+        if target:
+            grid.key ^= target.zobrist_keys[target.color][end_index]
+        grid.key ^= keys[start_index] ^ keys[end_index]
+        squares[end_index] = piece
+        squares[start_index] = None
+        if self.attack_maps is not None:
+            self.attack_maps.update(self, (start_index, end_index))
+        return MoveRecord(start, end, piece, ((end, target),) if target else (), key=key)
+
+    def unmake_move(self, record):
+        """
+        Откатывает ход, сделанный make_move: возвращает ходившую фигуру на место
+        и ставит обратно все снятые фигуры.
+        :param record:
+        :return:
+        """
+        squares = self.squares
+        start, end = record.start, record.end
+        # При взрыве Камикадзе на клетку end не вставал — её не очищаем
+        if not record.exploded:
+            squares[end[0] * 8 + end[1]] = None
+        squares[start[0] * 8 + start[1]] = record.piece
+        for (row, col), piece in record.captured:
+            squares[row * 8 + col] = piece
+        self._grid.key = record.key
+        self.turn = 'black' if self.turn == 'white' else 'white'
+        if self.attack_maps is not None:
+            # Снятые фигуры стоят на start или end, поэтому изменились только эти две клетки
+            self.attack_maps.update(self, (start[0] * 8 + start[1], end[0] * 8 + end[1]))
+
+    def enable_attack_maps(self):
+        """
+        Включает карты атак (AttackMaps): дальше make_move/unmake_move обновляют их по ходу,
+        а is_square_attacked, is_check и attack_count отвечают по ним без перебора фигур.
+        При прямой записи в grid[...] карты надо пересчитать повторным вызовом.
+        :return: AttackMaps
+        """
+        self.attack_maps = AttackMaps(self)
+        return self.attack_maps
 
-    def print_board(self, highlight_moves=None):
+    def attack_count(self, index, color):
+        """
+        Сколько фигур цвета color бьют клетку index.
+        :param index:
+        :param color:
+        :return:
+        """
+        if self.attack_maps is not None:
+            return self.attack_maps.counts[color][index]
+        return sum(1 for start_index, piece in enumerate(self.squares)
+                   if piece is not None and piece.color == color and piece.attacks_square(self, start_index, index))
+
+    def attacked_mask(self, color):
+        """
+        Битовая маска клеток, которые бьёт хотя бы одна фигура цвета color.
+        :param color:
+        :return:
+        """
+        if self.attack_maps is not None:
+            return self.attack_maps.masks[color]
+        mask = 0
+        for index, piece in enumerate(self.squares):
+            if piece is not None and piece.color == color:
+                mask |= piece.attack_mask(self, index)
+        return mask
+
+    def threatened_pieces(self, color):
+        """
+        Клетки (row, col) фигур цвета color, которые бьёт соперник.
+        :param color:
+        :return:
+        """
+        enemy_mask = self.attacked_mask('black' if color == 'white' else 'white')
+        return [COORDS[index] for index, piece in enumerate(self.squares)
+                if piece is not None and piece.color == color and (enemy_mask >> index) & 1]
+
+    # Буквы столбцов над и под доской
+    FILES_HEADER = "   a  b c  d  e  f g  h"
+
+    def cells(self, highlight_moves=None, threats=None):
+        """
+        Кадр для рендерера: 64 символа клеток (индекс row*8+col), клетки из highlight_moves помечены '▬'.
+        :param highlight_moves: список (row, col)
+        :param threats: список (row, col) фигур под боем — выделяются фоном (render.mark_threat)
+        :return:
+        """
+        cells = [str(piece) if piece else '▭' for piece in self.squares]
+        for row, col in highlight_moves or ():
+            cells[row * 8 + col] = '▬'  # Показываем возможный ход
+        for row, col in threats or ():
+            cells[row * 8 + col] = mark_threat(cells[row * 8 + col])
+        return cells
+
+    def print_board(self, highlight_moves=None, renderer=None, threats=None):
         """
         Печатает доску в консоль.
         Сверху - 8-я горизонталь (row=0), снизу - 1-я (row=7).
         Слева направо - столбцы a..h (col=0..7).
+        Кадр пишется одним вызовом; renderer (render.Renderer) задаёт режим вывода,
+        по умолчанию доска печатается целиком.
         :return:
         """
-        highlight_moves = highlight_moves or []  # Если передали None, заменяем на пустой список
-
-        print("   a  b c  d  e  f g  h")
-        for row in range(8):
-            print(8 - row, end="  ")
-            for col in range(8):
-                if (row, col) in highlight_moves:
-                    print('▬', end=" ")  # Показываем возможный ход
-                else:
-                    piece = self.get_piece(row, col)
-                    print(str(piece) if piece else '▭', end=" ")
-            print("", 8 - row)
-        print("   a  b c  d  e  f g  h")
+        if renderer is None:
+            renderer = Renderer()
+        renderer.draw(self.cells(highlight_moves, threats), self.FILES_HEADER)
 
-    def show_valid_moves(self, piece, row, col):
+    def show_valid_moves(self, piece, row, col, renderer=None):
         """
         Отображает возможные ходы фигуры на доске.
+        Ходы фигуры, стоящей на доске, берутся из кэша позиции, и последующая
+        проверка хода (is_valid_move) их не пересчитывает.
         """
-        valid_moves = piece.get_valid_moves(self, row, col)
-        self.print_board(highlight_moves=valid_moves)  # Отображаем доску с подсвеченными ходами
+        if self.get_piece(row, col) is piece:
+            valid_moves = self.valid_moves(row, col)
+        else:
+            valid_moves = piece.get_valid_moves(self, row, col)
+        self.print_board(highlight_moves=valid_moves, renderer=renderer)  # Отображаем доску с подсвеченными ходами
+
+    def cached_destination_mask(self, start):
+        """
+        Маска ходов фигуры с клетки start, посчитанная не больше одного раза на расстановку.
+        Кэш сбрасывается, когда меняется Zobrist-ключ расстановки.
+        :param start:
+        :return:
+        """
+        key = self._grid.key
+        if key != self._move_cache_key:
+            self._move_cache = {}
+            self._move_cache_key = key
+        index = start[0] * 8 + start[1]
+        mask = self._move_cache.get(index)
+        if mask is None:
+            mask = self.destination_mask(start)
+            self._move_cache[index] = mask
+        return mask
+
+    def valid_moves(self, row, col):
+        """
+        Список (row, col) ходов фигуры с клетки (row, col) из кэша позиции.
+        :param row:
+        :param col:
+        :return:
+        """
+        mask = self.cached_destination_mask((row, col))
+        moves = []
+        while mask:
+            bit = mask & -mask
+            moves.append(COORDS[bit.bit_length() - 1])
+            mask ^= bit
+        return moves
+
+    def can_move(self, start, end):
+        """
+        Может ли фигура с клетки start пойти на end по своим правилам (без учёта шаха).
+        Проверяет только нужный луч или прыжок с ранним выходом, список ходов не строится.
+        :param start:
+        :param end:
+        :return:
+        """
+        if not (0 <= end[0] < 8 and 0 <= end[1] < 8):
+            return False
+        start_index = start[0] * 8 + start[1]
+        piece = self.squares[start_index]
+        if piece is None:
+            return False
+        return piece.can_reach(self, start_index, end[0] * 8 + end[1])
 
     def get_line_moves(self, piece, start_row, start_col, d_row, d_col):
         """
@@ -352,28 +1022,266 @@ class Board:
         :return:
         """
         moves = []
-        r = start_row + d_row
-        c = start_col + d_col
-        while self.is_on_board(r, c):
-            existing_piece = self.get_piece(r, c)
+        squares = self.squares
+        for target in ray_table((d_row, d_col))[start_row * 8 + start_col]:
+            existing_piece = squares[target]
             if existing_piece:
                 # Если это фигура соперника, её можно "съесть" и остановиться
                 if existing_piece.color != piece.color:
-                    moves.append((r, c))
+                    moves.append(COORDS[target])
                 # Если своя или чужая, дальше идти нельзя
                 break
             else:
                 # Пустая клетка — можем туда пойти
-                moves.append((r, c))
-            r += d_row
-            c += d_col
+                moves.append(COORDS[target])
         return moves
 
+    def generate_moves(self, color):
+        """
+        Все ходы фигур цвета color списком (start, end), без учёта шаха.
+        :param color:
+        :return:
+        """
+        moves = []
+        for index, piece in enumerate(self.squares):
+            if piece is not None and piece.color == color:
+                start = COORDS[index]
+                for end in piece.get_valid_moves(self, start[0], start[1]):
+                    moves.append((start, end))
+        return moves
+
+    def destination_mask(self, start):
+        """
+        Битовая маска клеток, куда может пойти фигура с клетки start (0, если клетка пуста).
+        :param start:
+        :return:
+        """
+        index = start[0] * 8 + start[1]
+        piece = self.squares[index]
+        return piece.target_mask(self, index) if piece is not None else 0
+
+    def generate_packed_moves(self, color, buffer):
+        """
+        Заполняет buffer (MoveBuffer) упакованными ходами фигур цвета color (без учёта шаха).
+        :param color:
+        :param buffer:
+        :return: число ходов
+        """
+        squares = self.squares
+        moves = buffer.moves
+        count = 0
+        for index, piece in enumerate(squares):
+            if piece is None or piece.color != color:
+                continue
+            mask = piece.target_mask(self, index)
+            capture_flags = MOVE_CAPTURE | MOVE_EXPLOSION if isinstance(piece, Kamikaze) else MOVE_CAPTURE
+            while mask:
+                bit = mask & -mask
+                target = bit.bit_length() - 1
+                mask ^= bit
+                move = index | target << 6
+                if squares[target] is not None:
+                    move |= capture_flags << 12
+                if count == len(moves):
+                    moves.append(move)
+                else:
+                    moves[count] = move
+                count += 1
+        buffer.count = count
+        return count
+
+    def make_packed_move(self, move):
+        """
+        Делает упакованный ход, возвращает MoveRecord (как make_move).
+        :param move:
+        :return:
+        """
+        return self.make_move(COORDS[move & 63], COORDS[(move >> 6) & 63])
+
+    def find_king(self, color):
+        """
+        Индекс клетки короля цвета color или None, если короля нет на доске.
+        :param color:
+        :return:
+        """
+        for index, piece in enumerate(self.squares):
+            if piece is not None and piece.color == color and isinstance(piece, King):
+                return index
+        return None
+
+    def is_square_attacked(self, index, by_color):
+        """
+        Бьёт ли хоть одна фигура цвета by_color клетку index. Учитываются все фигуры,
+        включая новые: каждая проверяется по своей таблице атак, без генерации ходов.
+        :param index:
+        :param by_color:
+        :return:
+        """
+        if self.attack_maps is not None:
+            return self.attack_maps.counts[by_color][index] > 0
+        for start_index, piece in enumerate(self.squares):
+            if piece is not None and piece.color == by_color and piece.attacks_square(self, start_index, index):
+                return True
+        return False
+
+    def king_threats(self, color):
+        """
+        Один проход по фигурам соперника: кто шахует короля цвета color и какие фигуры связаны.
+        :param color:
+        :return: (king_index, checkers, pins), где checkers — список (индекс шахующей фигуры, клетки между),
+                 pins — {индекс связанной фигуры: множество клеток, куда ей можно ходить}.
+                 Если короля нет, king_index = None.
+        """
+        king_index = self.find_king(color)
+        checkers = []
+        pins = {}
+        if king_index is None:
+            return None, checkers, pins
+        squares = self.squares
+        for index, piece in enumerate(squares):
+            if piece is None or piece.color == color:
+                continue
+            between = piece.attack_paths[piece.color][index].get(king_index)
+            if between is None:
+                continue
+            blockers = [square for square in between if squares[square] is not None]
+            if not blockers:
+                checkers.append((index, between))
+            elif len(blockers) == 1 and squares[blockers[0]].color == color:
+                # Единственная своя фигура на линии атаки связана: уйти с линии она не может
+                allowed = frozenset(between) | {index}
+                pinned = blockers[0]
+                pins[pinned] = pins[pinned] & allowed if pinned in pins else allowed
+        return king_index, checkers, pins
+
+    def legal_moves(self, color=None):
+        """
+        Ходы цвета color (по умолчанию — чей ход), после которых свой король не под боем.
+        Шахи и связки считаются один раз на позицию; обычные ходы фильтруются по ним,
+        и только ходы короля и взрывы Камикадзе проверяются пробным make_move/unmake_move
+        (без копирования доски).
+        :param color:
+        :return: список (start, end)
+        """
+        color = color or self.turn
+        return self._legal(self.generate_moves(color), color)
+
+    def legal_captures(self, color=None):
+        """
+        Только взятия (и взрывы Камикадзе) цвета color, после которых свой король не под боем.
+        Тихие ходы не генерируются: взять фигуру можно там, где её бьют, поэтому каждая
+        фигура соперника проверяется по таблице атак (attack_paths) своей фигуры. Для поиска взятий.
+        :param color:
+        :return: список (start, end)
+        """
+        color = color or self.turn
+        squares = self.squares
+        own = []
+        enemies = []
+        for index, piece in enumerate(squares):
+            if piece is not None:
+                if piece.color == color:
+                    own.append(index)
+                else:
+                    enemies.append(index)
+        moves = []
+        for index in own:
+            paths = squares[index].attack_paths[color][index]
+            for target in enemies:
+                between = paths.get(target)
+                if between is None:
+                    continue
+                for square in between:
+                    if squares[square] is not None:
+                        break
+                else:
+                    moves.append((COORDS[index], COORDS[target]))
+        return self._legal(moves, color) if moves else moves
+
+    def _legal(self, moves, color):
+        """
+        Оставляет из ходов цвета color (без учёта шаха) те, после которых король не под боем.
+        :param moves:
+        :param color:
+        :return:
+        """
+        enemy = 'black' if color == 'white' else 'white'
+        king_index, checkers, pins = self.king_threats(color)
+        if king_index is None:
+            return moves
+
+        # При шахе обычный ход должен взять шахующую фигуру или закрыться от неё; от двойного — только ход королём
+        if len(checkers) == 1:
+            checker_index, between = checkers[0]
+            evasions = frozenset(between) | {checker_index}
+        elif checkers:
+            evasions = frozenset()
+        else:
+            evasions = None
+
+        squares = self.squares
+        legal = []
+        for move in moves:
+            start, end = move
+            start_index = start[0] * 8 + start[1]
+            end_index = end[0] * 8 + end[1]
+            piece = squares[start_index]
+            if start_index == king_index or (isinstance(piece, Kamikaze) and squares[end_index] is not None):
+                # Король уходит с линий атаки, а взрыв убирает сразу две фигуры — проверяем ход на доске
+                record = self.make_move(start, end)
+                safe = not self.is_square_attacked(end_index if start_index == king_index else king_index, enemy)
+                self.unmake_move(record)
+                if safe:
+                    legal.append(move)
+                continue
+            if evasions is not None and end_index not in evasions:
+                continue
+            if start_index in pins and end_index not in pins[start_index]:
+                continue
+            legal.append(move)
+        return legal
+
+    def is_legal_move(self, start, end, color=None):
+        """
+        Не оставляет ли ход start -> end своего короля под боем (сам ход должен быть допустим для фигуры).
+        :param start:
+        :param end:
+        :param color:
+        :return:
+        """
+        color = color or self.turn
+        enemy = 'black' if color == 'white' else 'white'
+        record = self.make_move(start, end)
+        king_index = self.find_king(color)
+        safe = king_index is None or not self.is_square_attacked(king_index, enemy)
+        self.unmake_move(record)
+        return safe
+
+    def is_check(self, color=None):
+        """
+        Находится ли король цвета color (по умолчанию — чей ход) под шахом.
+        :param color:
+        :return:
+        """
+        color = color or self.turn
+        king_index = self.find_king(color)
+        enemy = 'black' if color == 'white' else 'white'
+        return king_index is not None and self.is_square_attacked(king_index, enemy)
+
+    def is_checkmate(self, color=None):
+        color = color or self.turn
+        return self.is_check(color) and not self.legal_moves(color)
+
+    def is_stalemate(self, color=None):
+        color = color or self.turn
+        return not self.is_check(color) and not self.legal_moves(color)
+
     def is_valid_move(self, start, end, current_color):
         """
         Проверяет, что на клетке start стоит фигура нужного цвета,
-        и что ход в end входит в список допустимых ходов для этой фигуры.
-        (Без учёта шаха/мата, рокировки и т.д.)
+        что ход в end входит в список допустимых ходов для этой фигуры
+        и что после него свой король не остаётся под шахом.
+        (Без рокировки и т.д.)
         :param start:
         :param end:
         :param current_color:
@@ -385,21 +1293,119 @@ class Board:
         if piece.color != current_color:
             return False, "Фигура не принадлежит текущему игроку."
 
-        # Показываем возможные ходы
-        print(f"Возможные ходы для {piece}:")
-        self.show_valid_moves(piece, start[0], start[1])
-
-        valid_positions = piece.get_valid_moves(self, start[0], start[1])
-        if end not in valid_positions:
+        # Если ходы фигуры уже посчитаны (например, для подсветки) — берём их из кэша,
+        # иначе проверяем только сам ход
+        start_index = start[0] * 8 + start[1]
+        cached = self._move_cache.get(start_index) if self._move_cache_key == self._grid.key else None
+        if cached is not None:
+            reachable = (cached >> (end[0] * 8 + end[1])) & 1
+        else:
+            reachable = self.can_move(start, end)
+        if not reachable:
             return False, "Недопустимый ход для выбранной фигуры."
+        if not self.is_legal_move(start, end, current_color):
+            return False, "После этого хода король остаётся под шахом."
 
         return True, ""
 
     def copy(self):
-        new_board = Board()
+        new_board = Board(setup=False)
         new_board.grid = self.grid.copy()  # Копируем текущие фигуры
+        new_board.turn = self.turn
         return new_board
 
+    def pack(self):
+        """
+        Компактная запись позиции: 64 байта (код фигуры на каждой клетке, 0 — пусто)
+        и байт очереди хода. Удобна для передачи позиции в другой процесс вместо
+        сериализации объектов Board/Piece.
+        :return: bytes длиной 65
+        """
+        codes = bytearray(65)
+        for index, piece in enumerate(self.squares):
+            if piece is not None:
+                codes[index] = 1 + 2 * PIECE_TYPES.index(type(piece)) + COLORS.index(piece.color)
+        codes[64] = COLORS.index(self.turn)
+        return bytes(codes)
+
+    @classmethod
+    def unpack(cls, data):
+        """
+        Восстанавливает доску из pack().
+        :param data:
+        :return:
+        """
+        board = cls(setup=False)
+        squares = board.squares
+        for index in range(64):
+            code = data[index]
+            if code:
+                piece_type, color = divmod(code - 1, 2)
+                squares[index] = PIECE_TYPES[piece_type](COLORS[color])
+        board._grid.key = board._grid.compute_key()
+        board.turn = COLORS[data[64]]
+        return board
+
+    def to_fen(self):
+        """
+        Позиция в расширенном FEN: расстановка (от 8-й горизонтали к 1-й) и очередь хода ('w'/'b').
+        Новые фигуры обозначаются своими буквами (см. FEN_PIECES).
+        :return:
+        """
+        rows = []
+        for row in range(8):
+            text = ""
+            empty = 0
+            for piece in self.squares[row * 8:row * 8 + 8]:
+                if piece is None:
+                    empty += 1
+                    continue
+                if empty:
+                    text += str(empty)
+                    empty = 0
+                if piece.letter is None:
+                    raise ValueError(f"У фигуры {type(piece).__name__} нет буквы для FEN.")
+                text += piece.letter if piece.color == 'white' else piece.letter.lower()
+            if empty:
+                text += str(empty)
+            rows.append(text)
+        return "/".join(rows) + (" w" if self.turn == 'white' else " b")
+
+    @classmethod
+    def from_fen(cls, fen):
+        """
+        Строит доску сразу из FEN, без начальной расстановки. Поля после очереди хода
+        (рокировки и т.п. из обычного FEN) допускаются и игнорируются.
+        :param fen:
+        :return:
+        """
+        fields = fen.split()
+        if not fields:
+            raise ValueError("Пустая строка FEN.")
+        rows = fields[0].split("/")
+        if len(rows) != 8:
+            raise ValueError(f"В FEN должно быть 8 горизонталей, а не {len(rows)}.")
+        board = cls(setup=False)
+        squares = board.squares
+        for row, text in enumerate(rows):
+            col = 0
+            for char in text:
+                if char.isdigit():
+                    col += int(char)
+                    continue
+                piece_type = FEN_PIECES.get(char.upper())
+                if piece_type is None or col >= 8:
+                    raise ValueError(f"Неверная горизонталь FEN: {text!r}.")
+                squares[row * 8 + col] = piece_type('white' if char.isupper() else 'black')
+                col += 1
+            if col != 8:
+                raise ValueError(f"Неверная длина горизонтали FEN: {text!r}.")
+        if len(fields) > 1 and fields[1] not in ('w', 'b'):
+            raise ValueError(f"Неверная очередь хода в FEN: {fields[1]!r}.")
+        board.turn = 'black' if len(fields) > 1 and fields[1] == 'b' else 'white'
+        board._grid.key = board._grid.compute_key()
+        return board
+
     @staticmethod
     def algebraic_to_coords(pos_str):
         """
@@ -421,58 +1427,448 @@ class Board:
         row = 8 - int(row_digit) # '1'->7, '8'->0
         return (row, col)
 
+    @staticmethod
+    def coords_to_algebraic(pos):
+        """
+        Переводит (7, 0) -> 'a1', (6, 4) -> 'e2' (обратно к algebraic_to_coords).
+        :param pos:
+        :return:
+        """
+        row, col = pos
+        return f"{chr(ord('a') + col)}{8 - row}"
+
 class MoveHistory:
+    """
+    История партии: список MoveRecord (изменений), а не копий доски.
+    """
     def __init__(self):
         self.history = []
 
-    def add_move(self, board_state):
-        self.history.append(board_state)
+    def add_move(self, record):
+        self.history.append(record)
 
     def undo_move(self):
         if self.history:
             return self.history.pop()
         return None
 
-class Game:
+class TreeNode:
+    """
+    Узел дерева партии: ход, который к нему привёл (MoveRecord — только изменения доски),
+    и ссылка на родителя. Общее начало вариантов хранится один раз — в общих узлах.
+    """
+    __slots__ = ('record', 'parent', 'children', 'ply', 'id', 'last_child')
+
+    def __init__(self, record=None, parent=None, node_id=0):
+        self.record = record # None у корня (начальная позиция)
+        self.parent = parent
+        self.children = [] # продолжения в порядке появления; первое — главное
+        self.ply = parent.ply + 1 if parent is not None else 0
+        self.id = node_id
+        self.last_child = None # куда вести redo: последнее посещённое продолжение
+
+    @property
+    def move(self):
+        return (self.record.start, self.record.end) if self.record is not None else None
+
+    def child(self, move):
+        for node in self.children:
+            if node.move == move:
+                return node
+        return None
+
+    def __repr__(self):
+        return f"TreeNode(#{self.id}, ply={self.ply}, move={self.move})"
+
+
+class GameTree:
+    """
+    Дерево вариантов партии. Узел хранит только MoveRecord хода и родителя, поэтому память
+    растёт на один небольшой объект за полуход, а не на копию доски. undo не удаляет ветку:
+    к ней можно вернуться через redo или goto. Переход к любому узлу делает unmake_move
+    до общего предка и make_move от него — работа пропорциональна длине пути.
+    Варианты можно называть (name) и переходить к ним по имени.
+    Методы add_move/undo_move совместимы с MoveHistory.
+    """
     def __init__(self):
+        self.root = TreeNode()
+        self.current = self.root
+        self.nodes = {0: self.root} # {номер узла: узел} для перехода по номеру
+        self.names = {} # {имя варианта: узел}
+
+    def add_move(self, record):
+        """
+        Добавляет уже сделанный на доске ход как продолжение текущего узла.
+        Если такой ход уже есть среди продолжений, используется существующий узел.
+        :param record: MoveRecord из Board.make_move
+        :return: новый текущий узел
+        """
+        move = (record.start, record.end)
+        node = self.current.child(move)
+        if node is None:
+            node = TreeNode(record, self.current, len(self.nodes))
+            self.current.children.append(node)
+            self.nodes[node.id] = node
+        self.current.last_child = node
+        self.current = node
+        return node
+
+    def play(self, board, start, end):
+        """
+        Делает ход на доске и переходит в соответствующий узел дерева.
+        :return: узел хода
+        """
+        node = self.current.child((start, end))
+        if node is not None:
+            # Ход уже есть в дереве: повторяем его, запись в узле остаётся прежней
+            board.make_move(start, end)
+            self.current.last_child = node
+            self.current = node
+            return node
+        return self.add_move(board.make_move(start, end))
+
+    def undo_move(self):
+        """
+        Переходит к родителю и возвращает MoveRecord для отката (доску откатывает вызывающий).
+        :return: MoveRecord или None в начале партии
+        """
+        node = self.current
+        if node.parent is None:
+            return None
+        node.parent.last_child = node
+        self.current = node.parent
+        return node.record
+
+    def undo(self, board, count=1):
+        """
+        Откатывает count ходов на доске. Возвращает число откаченных ходов.
+        """
+        undone = 0
+        for _ in range(count):
+            record = self.undo_move()
+            if record is None:
+                break
+            board.unmake_move(record)
+            undone += 1
+        return undone
+
+    def redo(self, board, count=1):
+        """
+        Повторяет count ходов по последнему посещённому продолжению (или главному).
+        Возвращает число повторённых ходов.
+        """
+        done = 0
+        for _ in range(count):
+            node = self.current.last_child or (self.current.children[0] if self.current.children else None)
+            if node is None:
+                break
+            board.make_move(node.record.start, node.record.end)
+            self.current = node
+            done += 1
+        return done
+
+    def goto(self, board, node):
+        """
+        Переводит доску в позицию узла node (узел, его номер или имя варианта).
+        :return: узел
+        """
+        node = self.find(node)
+        # Поднимаемся от текущего узла и от цели до общего предка
+        path = []
+        target = node
+        current = self.current
+        while target.ply > current.ply:
+            path.append(target)
+            target = target.parent
+        while current.ply > target.ply:
+            board.unmake_move(current.record)
+            current = current.parent
+        while current is not target:
+            board.unmake_move(current.record)
+            current = current.parent
+            path.append(target)
+            target = target.parent
+        for step in reversed(path):
+            board.make_move(step.record.start, step.record.end)
+            step.parent.last_child = step
+        self.current = node
+        return node
+
+    def find(self, node):
+        """
+        Узел по самому узлу, номеру или имени варианта.
+        """
+        if isinstance(node, TreeNode):
+            return node
+        if node in self.names:
+            return self.names[node]
+        if isinstance(node, str) and node.lstrip('#').isdigit():
+            node = int(node.lstrip('#'))
+        if node in self.nodes:
+            return self.nodes[node]
+        raise ValueError(f"Нет узла или варианта {node!r}.")
+
+    def name(self, label, node=None):
+        """
+        Называет вариант: имя указывает на узел (по умолчанию текущий).
+        """
+        self.names[label] = self.find(node) if node is not None else self.current
+        return self.names[label]
+
+    def path(self, node=None):
+        """
+        Ходы (start, end) от начала партии до узла (по умолчанию текущего).
+        """
+        node = self.find(node) if node is not None else self.current
+        moves = []
+        while node.parent is not None:
+            moves.append(node.move)
+            node = node.parent
+        moves.reverse()
+        return moves
+
+    def leaves(self):
+        """
+        Концы всех вариантов в порядке обхода в глубину (главная линия первой).
+        """
+        leaves = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if not node.children:
+                leaves.append(node)
+            stack.extend(reversed(node.children))
+        return leaves
+
+    def format(self):
+        """
+        Варианты дерева по строке на вариант: номер конечного узла, имена и ходы.
+        Текущий вариант отмечен '*', текущая позиция в нём — '[...]'.
+        """
+        labels = {}
+        for label, node in self.names.items():
+            labels.setdefault(node.id, []).append(label)
+        lines = []
+        for leaf in self.leaves():
+            chain = []
+            node = leaf
+            while node.parent is not None:
+                chain.append(node)
+                node = node.parent
+            chain.reverse()
+            parts = []
+            for node in chain:
+                text = Board.coords_to_algebraic(node.record.start) + Board.coords_to_algebraic(node.record.end)
+                if node is self.current:
+                    text = f"[{text}]"
+                if node.id in labels:
+                    text += "(" + ",".join(labels[node.id]) + ")"
+                parts.append(f"{node.id}.{text}" if node.parent.children[0] is not node else text)
+            # Текущая позиция лежит на этом варианте (или ещё ничего не сыграно)
+            marker = "*" if self.current is self.root or self.current in chain else " "
+            lines.append(f"{marker} #{leaf.id}: " + (" ".join(parts) or "(начало)"))
+        return "\n".join(lines)
+
+    def __len__(self):
+        return len(self.nodes) - 1
+
+
+class Game:
+    def __init__(self, workers=1, render='full', tablebase=None, book=None):
         self.board = Board()
+        # Вывод доски: 'full', 'diff' (перерисовка только изменившихся клеток) или 'headless'
+        self.renderer = Renderer(render)
         self.current_player = 'white'
         self.move_count = 0
-        self.history = MoveHistory()
+        self.history = GameTree() # дерево вариантов: undo не теряет ветки, есть redo и goto
+        self.engine = None # Создаётся при первом запросе подсказки
+        self.workers = workers # Больше 1 — подсказка считается параллельно на нескольких процессах
+        self.executor = None
+        # Каталог эндшпильных баз (tablebase.py): в малом материале подсказка точная, без поиска
+        self.tablebase = None
+        if tablebase:
+            from tablebase import Tablebase
+
+            self.tablebase = Tablebase(tablebase)
+        # Книга позиций (book.py): в известных позициях начала партии подсказка берётся из неё
+        self.book = None
+        if book:
+            from book import OpeningBook
+
+            self.book = OpeningBook(book)
 
     def switch_player(self):
         self.current_player = 'black' if self.current_player == 'white' else 'white'
 
+    def play_move(self, start, end):
+        """
+        Проверяет и делает ход текущего игрока, без ввода-вывода (для консоли и для server.py).
+        :param start:
+        :param end:
+        :return: (True, "") или (False, причина)
+        """
+        valid, message = self.board.is_valid_move(start, end, self.current_player)
+        if not valid:
+            return False, message
+        # Ход добавляется в дерево вариантов
+        self.history.play(self.board, start, end)
+        self.move_count += 1
+        self.switch_player()
+        return True, ""
+
+    def status(self):
+        """
+        Состояние партии для текущего игрока: 'checkmate', 'stalemate', 'check' или 'play'.
+        :return:
+        """
+        in_check = self.board.is_check(self.current_player)
+        if not self.board.legal_moves(self.current_player):
+            return 'checkmate' if in_check else 'stalemate'
+        return 'check' if in_check else 'play'
+
+    def sync_with_tree(self):
+        """
+        После перемещения по дереву вариантов: номер хода и очередь берутся из текущего узла и доски.
+        """
+        self.move_count = self.history.current.ply
+        self.current_player = self.board.turn
+
+    def tree_command(self, parts):
+        """
+        Команды дерева вариантов: 'redo [N]', 'goto <номер|имя>', 'name <имя>', 'tree'.
+        :param parts: слова команды
+        :return:
+        """
+        command = parts[0].lower()
+        if command == 'redo':
+            count = int(parts[1]) if len(parts) == 2 and parts[1].isdigit() else 1
+            done = self.history.redo(self.board, count)
+            print(f"Повторено ходов: {done}." if done else "Нечего повторять.")
+        elif command == 'goto' and len(parts) == 2:
+            try:
+                node = self.history.goto(self.board, parts[1])
+            except ValueError as error:
+                print(error)
+                return
+            print(f"Переход к узлу #{node.id} (полуход {node.ply}).")
+        elif command == 'name' and len(parts) == 2:
+            node = self.history.name(parts[1])
+            print(f"Вариант '{parts[1]}' -> узел #{node.id}.")
+        elif command == 'tree':
+            print(self.history.format())
+        else:
+            print("Команды дерева: redo [N], goto <номер|имя>, name <имя>, tree.")
+        self.sync_with_tree()
+
+    def show_hint(self, time_limit=2.0, threats=False):
+        """
+        Анализирует текущую позицию не дольше time_limit секунд и печатает лучший ход.
+        :param time_limit:
+        :param threats: выделить свои фигуры, которые бьёт соперник (по картам атак)
+        :return:
+        """
+        from chess_engine import Engine, format_move, format_score
+
+        # Сначала книга позиций и эндшпильные базы, поиск — только если там позиции нет
+        result = source = source_table = None
+        for name, table in (("книге позиций", self.book), ("базе эндшпилей", self.tablebase)):
+            result = table.search(self.board) if table is not None else None
+            if result is not None:
+                source, source_table = name, table
+                break
+        if result is None and self.workers > 1:
+            from chess_parallel import make_executor, parallel_search
+
+            if self.executor is None:
+                self.executor = make_executor(self.workers)
+            result = parallel_search(self.board, self.executor, self.workers, time_limit)
+        elif result is None:
+            if self.engine is None:
+                self.engine = Engine()
+            # Поиск делает сотни тысяч ходов: карты атак доски ему не нужны, ищем на копии без них
+            board = self.board if self.board.attack_maps is None else self.board.copy()
+            result = self.engine.search(board, time_limit)
+        if result.move is None:
+            print("Допустимых ходов нет.")
+            return result
+        threatened = None
+        if threats:
+            if self.board.attack_maps is None:
+                self.board.enable_attack_maps()
+            threatened = self.board.threatened_pieces(self.current_player)
+        self.board.print_board(highlight_moves=[result.move[1]], renderer=self.renderer, threats=threatened)
+        line = " ".join(format_move(move) for move in result.pv)
+        if source is None:
+            print(f"Подсказка: {format_move(result.move)} (оценка {format_score(result.score)}, "
+                  f"глубина {result.depth}, {result.nodes} узлов, {result.nps:,.0f} узлов/с)")
+        elif source_table is self.book:
+            # Книга знает только, что ход часто играли и он не проигрывал, — оценки у неё нет
+            print(f"Подсказка по {source}: {format_move(result.move)}")
+        else:
+            print(f"Подсказка по {source}: {format_move(result.move)} (оценка {format_score(result.score)})")
+        if line:
+            print(f"Главная линия: {line}")
+        if threatened:
+            print("Под боем: " + " ".join(self.board.coords_to_algebraic(pos) for pos in threatened))
+        if self.book is not None:
+            print(f"Книга позиций: {self.book.hits} попаданий из {self.book.lookups} ({self.book.hit_rate:.0%})")
+        return result
+
     def run(self):
         while True:
             # 1. Печатаем доску
-            self.board.print_board()
+            self.board.print_board(renderer=self.renderer)
             print(f"Ход номер: {self.move_count}. Сейчас ходят {self.current_player}.")
+            status = self.status()
+            if status == 'checkmate':
+                winner = 'black' if self.current_player == 'white' else 'white'
+                print(f"Мат! Победили {winner}. Игра завершена.")
+                self.renderer.close()
+                break
+            if status == 'stalemate':
+                print("Пат. Ничья. Игра завершена.")
+                self.renderer.close()
+                break
+            if status == 'check':
+                print("Шах!")
 
             # 2. Считываем начальную позицию
-            start_str = input(f"Введите позицию фигуры ({self.current_player}), например e2 (или 'exit' - для выхода из игры,\n'undo N' - для отмены N последних ходов): ")
+            start_str = input(f"Введите позицию фигуры ({self.current_player}), например e2 (или 'exit' - для выхода из игры,\n'undo N'/'redo N' - отмена/повтор ходов, 'goto <номер|имя>', 'name <имя>', 'tree' - варианты,\n'hint [сек] [threats]' - для подсказки): ")
             if start_str.lower() == 'exit':
                 print("Игра завершена.")
+                self.renderer.close()
+                if self.executor is not None:
+                    self.executor.shutdown()
                 break
+            elif start_str.lower().startswith(('hint', 'analyse')):
+                # Подсказка лучшего хода с ограничением по времени (по умолчанию 2 секунды);
+                # 'threats' в конце команды дополнительно выделяет свои фигуры под боем
+                parts = start_str.lower().split()
+                threats = parts[-1] == 'threats'
+                if threats:
+                    parts.pop()
+                try:
+                    time_limit = float(parts[1]) if len(parts) == 2 else 2.0
+                except ValueError:
+                    print("Неверный формат команды (пример: hint 3 или hint 3 threats).")
+                    continue
+                self.show_hint(time_limit, threats)
+                continue
             elif start_str.lower().startswith('undo'):
                 # Разбираем команду для отката нескольких ходов
                 parts = start_str.split()
                 if len(parts) == 2 and parts[1].isdigit():
                     undo_moves = int(parts[1])
-                    success = False  # Флаг, который проверяет, был ли откат хотя бы одного хода
-                    for _ in range(undo_moves):
-                        last_state = self.history.undo_move()
-                        if last_state:
-                            self.board = last_state
-                            self.move_count -= 1
-                            self.switch_player()
-                            success = True
-                        else:
-                            print("Нет хода для отката.")
-
-                    if success:
-                        print(f"Откат на {undo_moves} ход(ов).")
+                    undone = self.history.undo(self.board, undo_moves)
+                    if undone < undo_moves:
+                        print("Нет хода для отката.")
+                    if undone:
+                        print(f"Откат на {undone} ход(ов). Вернуть: 'redo N'.")
+                    self.sync_with_tree()
                     continue
+            elif start_str.lower().startswith(('redo', 'goto', 'name', 'tree')):
+                self.tree_command(start_str.split())
+                continue
 
             start = self.board.algebraic_to_coords(start_str)
             if not start:
@@ -482,7 +1878,8 @@ class Game:
             # Подсветка возможных ходов для выбранной фигуры
             piece = self.board.get_piece(start[0], start[1])
             if piece and piece.color == self.current_player:
-                self.board.show_valid_moves(piece, start[0], start[1])
+                print(f"Возможные ходы для {piece}:")
+                self.board.show_valid_moves(piece, start[0], start[1], renderer=self.renderer)
 
             # 3. Считываем конечную позицию
             end_str = input("Введите целевую позицию, например e4 (или 'exit'): ")
@@ -494,22 +1891,20 @@ class Game:
                 print("Неверный формат ввода (пример: e4). Попробуйте ещё раз.")
                 continue
 
-            # 4. Проверяем ход
-            valid, message = self.board.is_valid_move(start, end, self.current_player)
+            # 4. Проверяем и делаем ход
+            valid, message = self.play_move(start, end)
             if not valid:
                 print(f"Ход некорректен: {message}")
-                continue
-
-            # Сохраняем текущее состояние доски в историю перед выполнением хода
-            self.history.add_move(self.board.copy())  # предполагаем, что нужно реализовать метод copy()
-
-            # 5. Если ход корректен, двигаем фигуру
-            self.board.move_piece(start, end)
-
-            # 6. Увеличиваем счётчик, переключаем игрока
-            self.move_count += 1
-            self.switch_player()
 
 if __name__ == "__main__":
-    game = Game()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Шахматы с новыми фигурами в консоли.")
+    parser.add_argument('--render', choices=MODES, default='full',
+                        help="вывод доски: целиком, только изменения (ANSI) или без вывода")
+    parser.add_argument('--workers', type=int, default=1, help="процессов для подсказки")
+    parser.add_argument('--tablebase', help="каталог эндшпильных баз (см. tablebase.py)")
+    parser.add_argument('--book', help="файл книги позиций (см. book.py)")
+    args = parser.parse_args()
+    game = Game(workers=args.workers, render=args.render, tablebase=args.tablebase, book=args.book)
     game.run()
\ No newline at end of file
@@ -0,0 +1,158 @@
+"""
+Параллельный анализ позиций chess_my на нескольких процессах.
+
+Корневые ходы делятся между процессами пула (ProcessPoolExecutor), каждый процесс
+ищет итеративным углублением только среди своих ходов. Позиция передаётся в процесс
+как Board.pack() (65 байт), а не как граф объектов Board/Piece. Итог собирается по
+самой большой глубине, которую завершили все процессы.
+
+Замер ускорения на наборе позиций:
+    python chess_parallel.py --workers 1 2 4 --depth 3
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from chess_engine import MATE_SCORE, Engine, SearchResult, format_move, format_score
+from chess_my import Board
+
+# Поисковик процесса-исполнителя: создаётся один раз на процесс и хранит свою таблицу транспозиций
+_worker_engine = None
+
+# Позиции для замера: ходы от начальной расстановки
+BENCHMARK_LINES = (
+    (),
+    ('b2b4', 'g7g5'),
+    ('g1f3', 'b8c6', 'a3a5', 'h6h4'),
+    ('e3g5', 'e6c4', 'd3d5', 'd6d4'),
+    ('b1c3', 'g8f6', 'f2f4', 'c7c5', 'f4f5'),
+)
+
+
+def _init_worker():
+    global _worker_engine
+    _worker_engine = Engine()
+
+
+def _search_moves(packed, moves, time_limit, max_depth):
+    """
+    Задача для процесса пула: поиск среди части корневых ходов.
+    :return: ([(depth, score, move, pv), ...] по завершённым итерациям, число узлов)
+    """
+    engine = _worker_engine if _worker_engine is not None else Engine()
+    board = Board.unpack(packed)
+    iterations = []
+    result = engine.search(board, time_limit, max_depth, root_moves=moves,
+                           on_iteration=lambda r: iterations.append((r.depth, r.score, r.move, r.pv)))
+    return iterations, result.nodes
+
+
+def split_moves(moves, parts):
+    """
+    Раздаёт ходы по parts частям через один, чтобы взятия и тихие ходы распределились равномерно.
+    :param moves:
+    :param parts:
+    :return:
+    """
+    return [chunk for chunk in (moves[index::parts] for index in range(parts)) if chunk]
+
+
+def parallel_search(board, executor, workers, time_limit=1.0, max_depth=63):
+    """
+    Ищет лучший ход, разделив корневые ходы между workers задачами пула executor.
+    :param board: chess_my.Board, ходит board.turn
+    :param executor: ProcessPoolExecutor (см. make_executor)
+    :param workers:
+    :param time_limit:
+    :param max_depth:
+    :return: SearchResult (nodes — сумма по всем процессам)
+    """
+    started = time.perf_counter()
+    moves = board.legal_moves()
+    if not moves:
+        # Как Engine.search: мат — проигрыш для ходящего, пат — ничья
+        return SearchResult(None, -MATE_SCORE if board.is_check() else 0, 0, 0, 0.0)
+    # Сначала взятия, чтобы каждой части достались самые важные ходы
+    squares = board.squares
+    moves.sort(key=lambda move: squares[move[1][0] * 8 + move[1][1]] is None)
+
+    packed = board.pack()
+    futures = [executor.submit(_search_moves, packed, chunk, time_limit, max_depth)
+               for chunk in split_moves(moves, workers)]
+    results = [future.result() for future in futures]
+
+    nodes = sum(part_nodes for _, part_nodes in results)
+    elapsed = time.perf_counter() - started
+    # Сравнивать оценки можно только на одной глубине: берём наибольшую, завершённую всеми
+    depth = min((iterations[-1][0] if iterations else 0) for iterations, _ in results)
+    if depth == 0:
+        return SearchResult(moves[0], 0, 0, nodes, elapsed, (moves[0],))
+    best = max((entry for iterations, _ in results for entry in iterations if entry[0] == depth),
+               key=lambda entry: entry[1])
+    # Главная линия — из того процесса, чей ход оказался лучшим
+    return SearchResult(best[2], best[1], depth, nodes, elapsed, best[3])
+
+
+def make_executor(workers):
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+
+
+def benchmark_positions():
+    boards = []
+    for line in BENCHMARK_LINES:
+        board = Board()
+        for text in line:
+            start = Board.algebraic_to_coords(text[:2])
+            end = Board.algebraic_to_coords(text[2:])
+            if (start, end) not in board.legal_moves():
+                raise ValueError(f"Ход {text} недопустим в позиции замера.")
+            board.make_move(start, end)
+        boards.append(board)
+    return boards
+
+
+def benchmark(worker_counts, depth):
+    """
+    Поиск на фиксированную глубину по набору BENCHMARK_LINES для каждого числа процессов.
+    Печатает время, узлы/с и ускорение относительно первого варианта из worker_counts.
+    :param worker_counts:
+    :param depth:
+    :return: список словарей с результатами
+    """
+    boards = benchmark_positions()
+    rows = []
+    for workers in worker_counts:
+        with make_executor(workers) as executor:
+            started = time.perf_counter()
+            nodes = 0
+            for board in boards:
+                result = parallel_search(board, executor, workers, time_limit=None, max_depth=depth)
+                nodes += result.nodes
+            elapsed = time.perf_counter() - started
+        rows.append({'workers': workers, 'seconds': elapsed, 'nodes': nodes,
+                     'nps': nodes / elapsed if elapsed > 0 else 0.0})
+    base = rows[0]['seconds']
+    print(f"Позиций: {len(boards)}, глубина {depth}, ядер в системе: {os.cpu_count()}")
+    for row in rows:
+        row['speedup'] = base / row['seconds'] if row['seconds'] > 0 else 0.0
+        print(f"{row['workers']:>3} проц.: {row['seconds']:7.2f} с, {row['nodes']:>9} узлов, "
+              f"{row['nps']:>10,.0f} узлов/с, ускорение x{row['speedup']:.2f}")
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Параллельный анализ chess_my.")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--analyse', type=float, metavar='SECONDS',
+                        help="вместо замера проанализировать начальную позицию")
+    args = parser.parse_args()
+
+    if args.analyse:
+        with make_executor(args.workers[-1]) as pool:
+            found = parallel_search(Board(), pool, args.workers[-1], time_limit=args.analyse)
+        print(f"{format_move(found.move)} ({format_score(found.score)}, глубина {found.depth}, "
+              f"{found.nps:,.0f} узлов/с)")
+    else:
+        benchmark(args.workers, args.depth)
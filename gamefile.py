@@ -0,0 +1,338 @@
+"""
+Компактный двоичный формат архива партий chess_my.
+
+Ход хранится в двух байтах (little-endian) — это упакованный ход chess_my:
+from | to << 6 | флаги << 12, где флаги — MOVE_CAPTURE, MOVE_EXPLOSION и MOVE_PROMOTION.
+Ходы фиксированной длины, поэтому полуход ply партии лежит по смещению offset + 2 * ply
+и читается без разбора остальных ходов.
+
+Устройство файла:
+    заголовок (16 байт): MAGIC, число партий (uint32), смещение индекса (uint64);
+    партии подряд: [65 байт Board.pack() начальной позиции, если она не стандартная] + ходы;
+    индекс в конце: на каждую партию смещение ходов (uint64), число полуходов (uint32), флаги (uint32).
+Файл читается через mmap: открытие архива не читает партии, а только индекс.
+
+Пример:
+    python gamefile.py pack games.jsonl games.cmg
+    python gamefile.py info games.cmg
+    python gamefile.py show games.cmg --game 12 --ply 40
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+
+from chess_my import MOVE_CAPTURE, MOVE_EXPLOSION, Board, GameTree, decode_move, encode_move
+
+MAGIC = b"CMG1"
+HEADER = struct.Struct("<4sIQ")
+INDEX_ENTRY = struct.Struct("<QII")
+MOVE = struct.Struct("<H")
+# Размер записи начальной позиции (Board.pack)
+POSITION_SIZE = 65
+# Флаги партии в индексе
+GAME_CUSTOM_START = 1 # перед ходами записана начальная позиция
+
+
+def record_to_move(record):
+    """
+    MoveRecord (из Board.make_move) -> упакованный ход с флагами взятия и взрыва.
+    :param record:
+    :return:
+    """
+    flags = 0
+    if record.exploded:
+        flags |= MOVE_EXPLOSION | MOVE_CAPTURE
+    elif record.captured:
+        flags |= MOVE_CAPTURE
+    start, end = record.start, record.end
+    return encode_move(start[0] * 8 + start[1], end[0] * 8 + end[1], flags)
+
+
+def tree_to_moves(tree, node=None):
+    """
+    Упакованные ходы от начала партии до узла дерева вариантов Game (по умолчанию текущего).
+    :param tree: GameTree
+    :param node: узел, его номер или имя варианта
+    :return:
+    """
+    node = tree.find(node) if node is not None else tree.current
+    moves = []
+    while node.parent is not None:
+        moves.append(record_to_move(node.record))
+        node = node.parent
+    moves.reverse()
+    return moves
+
+
+def moves_to_tree(moves, board=None):
+    """
+    Проигрывает упакованные ходы на доске и строит по ним дерево вариантов.
+    Ходы не проверяются: архив пишется из уже сыгранных партий.
+    :param moves:
+    :param board: начальная позиция (по умолчанию стандартная)
+    :return: (доска после последнего хода, GameTree)
+    """
+    board = board if board is not None else Board()
+    tree = GameTree()
+    for move in moves:
+        start, end, _ = decode_move(move)
+        tree.play(board, start, end)
+    return board, tree
+
+
+def restore_game(game, moves, start=None):
+    """
+    Загружает партию в Game: доска, дерево вариантов, номер хода и очередь.
+    :param game: chess_my.Game
+    :param moves: упакованные ходы
+    :param start: начальная позиция (Board) или None для стандартной
+    :return:
+    """
+    game.board, game.history = moves_to_tree(moves, start)
+    game.renderer.invalidate()
+    game.sync_with_tree()
+    return game
+
+
+class GameWriter:
+    """
+    Пишет партии в файл по одной; индекс дописывается в close().
+    Память не зависит от числа ходов: в ней держится только индекс.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'wb')
+        self.index = []
+        self.file.write(HEADER.pack(MAGIC, 0, 0))
+        self.offset = HEADER.size
+
+    def add_game(self, moves, start=None):
+        """
+        Добавляет партию.
+        :param moves: упакованные ходы или MoveRecord
+        :param start: начальная позиция (Board) или None для стандартной
+        :return: номер партии в архиве
+        """
+        flags = 0
+        if start is not None:
+            self.file.write(start.pack())
+            self.offset += POSITION_SIZE
+            flags |= GAME_CUSTOM_START
+        data = bytearray()
+        for move in moves:
+            if not isinstance(move, int):
+                move = record_to_move(move)
+            data += MOVE.pack(move)
+        self.file.write(data)
+        self.index.append((self.offset, len(data) // MOVE.size, flags))
+        self.offset += len(data)
+        return len(self.index) - 1
+
+    def add_tree(self, tree, node=None, start=None):
+        """
+        Добавляет партию из дерева вариантов Game (путь до узла node, по умолчанию текущего).
+        """
+        return self.add_game(tree_to_moves(tree, node), start)
+
+    def close(self):
+        if self.file is None:
+            return
+        for entry in self.index:
+            self.file.write(INDEX_ENTRY.pack(*entry))
+        self.file.seek(0)
+        self.file.write(HEADER.pack(MAGIC, len(self.index), self.offset))
+        self.file.close()
+        self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class GameArchive:
+    """
+    Архив партий только для чтения через mmap. archive[i] — упакованные ходы партии i,
+    archive.move(i, ply) — один ход, archive.board(i, ply) — позиция после ply полуходов.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.data = None
+        # Пустой файл mmap не отобразит, поэтому длина проверяется до отображения
+        if os.fstat(self.file.fileno()).st_size < HEADER.size:
+            self.close()
+            raise ValueError(f"{path}: файл слишком короткий для архива партий.")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, self.index_offset = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or self.index_offset + self.count * INDEX_ENTRY.size > len(self.data):
+            self.close()
+            raise ValueError(f"{path}: это не архив партий или он не дописан.")
+
+    def entry(self, game):
+        """
+        (смещение ходов, число полуходов, флаги) партии game.
+        """
+        if not 0 <= game < self.count:
+            raise IndexError(f"Нет партии с номером {game}.")
+        return INDEX_ENTRY.unpack_from(self.data, self.index_offset + game * INDEX_ENTRY.size)
+
+    def plies(self, game):
+        return self.entry(game)[1]
+
+    def move(self, game, ply):
+        """
+        Упакованный ход номер ply (с 0) партии game.
+        """
+        offset, plies, _ = self.entry(game)
+        if not 0 <= ply < plies:
+            raise IndexError(f"В партии {game} нет полухода {ply}.")
+        return MOVE.unpack_from(self.data, offset + ply * MOVE.size)[0]
+
+    def moves(self, game, stop=None):
+        """
+        Первые stop упакованных ходов партии (по умолчанию все).
+        """
+        offset, plies, _ = self.entry(game)
+        stop = plies if stop is None else max(0, min(stop, plies))
+        return [move for move, in MOVE.iter_unpack(self.data[offset:offset + stop * MOVE.size])]
+
+    def start_board(self, game):
+        """
+        Начальная позиция партии.
+        """
+        offset, _, flags = self.entry(game)
+        if flags & GAME_CUSTOM_START:
+            return Board.unpack(self.data[offset - POSITION_SIZE:offset])
+        return Board()
+
+    def board(self, game, ply=None):
+        """
+        Позиция партии game после ply полуходов (по умолчанию — конечная).
+        """
+        board = self.start_board(game)
+        for move in self.moves(game, ply):
+            start, end, _ = decode_move(move)
+            board.make_move(start, end)
+        return board
+
+    def tree(self, game, ply=None):
+        """
+        Партия как (доска, GameTree) — в том виде, в каком её хранит Game.
+        """
+        return moves_to_tree(self.moves(game, ply), self.start_board(game))
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, game):
+        return self.moves(game)
+
+    def __iter__(self):
+        for game in range(self.count):
+            yield self.moves(game)
+
+    def close(self):
+        if self.data is not None:
+            self.data.close()
+            self.data = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def encode_text_game(texts):
+    """
+    Ходы вида 'e2e4' -> упакованные ходы, с проверкой по правилам.
+    :param texts:
+    :return: (упакованные ходы, None) или (None, сообщение об ошибке)
+    """
+    from replay import parse_move
+
+    board = Board()
+    moves = []
+    for ply, text in enumerate(texts):
+        move = parse_move(text)
+        if move is None:
+            return None, f"полуход {ply}: не удалось разобрать '{text}'"
+        valid, reason = board.is_valid_move(move[0], move[1], board.turn)
+        if not valid:
+            return None, f"полуход {ply} '{text}': {reason}"
+        moves.append(record_to_move(board.make_move(*move)))
+    return moves, None
+
+
+def pack_archive(source, path):
+    """
+    Переводит текстовый архив (формат replay.py) в двоичный. Недопустимые партии пропускаются.
+    :param source: строки архива
+    :param path: файл результата
+    :return: (записано партий, пропущено партий)
+    """
+    from replay import iter_games
+
+    written = skipped = 0
+    with GameWriter(path) as writer:
+        for index, line_number, texts in iter_games(source):
+            moves, error = (None, texts) if isinstance(texts, Exception) else encode_text_game(texts)
+            if moves is None:
+                print(f"Строка {line_number}: партия пропущена ({error}).", file=sys.stderr)
+                skipped += 1
+                continue
+            writer.add_game(moves)
+            written += 1
+    return written, skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Двоичный архив партий chess_my.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    pack = commands.add_parser('pack', help="текстовый архив или JSONL selfplay -> двоичный")
+    pack.add_argument('source', help="файл с партиями ('-' — stdin)")
+    pack.add_argument('archive')
+    info = commands.add_parser('info', help="число партий и ходов")
+    info.add_argument('archive')
+    show = commands.add_parser('show', help="позиция партии после заданного полухода")
+    show.add_argument('archive')
+    show.add_argument('--game', type=int, default=0)
+    show.add_argument('--ply', type=int, default=None, help="по умолчанию — конечная позиция")
+    show.add_argument('--moves', action='store_true', help="напечатать ходы партии")
+    args = parser.parse_args(argv)
+
+    if args.command == 'pack':
+        source = sys.stdin if args.source == '-' else open(args.source, encoding='utf-8')
+        try:
+            written, skipped = pack_archive(source, args.archive)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+        print(f"Записано партий: {written}, пропущено: {skipped}.", file=sys.stderr)
+        return
+
+    with GameArchive(args.archive) as archive:
+        if args.command == 'info':
+            plies = sum(archive.plies(game) for game in range(len(archive)))
+            size = len(archive.data)
+            print(json.dumps({'games': len(archive), 'plies': plies, 'bytes': size,
+                              'bytes_per_ply': round(size / plies, 3) if plies else None}))
+            return
+        if args.moves:
+            print(" ".join(Board.coords_to_algebraic(start) + Board.coords_to_algebraic(end)
+                           for start, end, _ in map(decode_move, archive.moves(args.game, args.ply))))
+        board = archive.board(args.game, args.ply)
+        board.print_board()
+        print(board.to_fen())
+
+
+if __name__ == "__main__":
+    main()
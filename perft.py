@@ -0,0 +1,242 @@
+"""
+Perft: подсчёт листьев дерева ходов до заданной глубины.
+
+Служит и тестом корректности генераторов ходов (число узлов для известной позиции
+не должно меняться), и эталонным замером скорости для разных представлений доски.
+Работает с любой доской, у которой есть generate_moves(color), make_move(*move) и unmake_move(record):
+chess_my.Board, chess_bitboard.BitboardBoard, checkers_my.Board и checkers_bitboard.CheckersBitboard.
+
+Пример:
+    python perft.py chess --depth 3 --divide --json perft_chess.json
+    python perft.py chess --depth 3 --legal
+    python perft.py checkers --depth 6
+    python perft.py checkers --board bitboard --depth 8
+    python perft.py chess --depth 4 --fen "4k3/8/8/8/8/8/3C4/4K3 w"
+"""
+import argparse
+import json
+import time
+
+import checkers_my
+import chess_my
+from checkers_bitboard import CheckersBitboard
+from chess_bitboard import BitboardBoard
+from chess_my import COORDS, MoveBuffer
+
+OPPOSITE = {'white': 'black', 'black': 'white'}
+
+
+def perft(board, depth, color):
+    """
+    Количество листьев дерева ходов глубины depth из текущей позиции, первым ходит color.
+    :param board:
+    :param depth:
+    :param color:
+    :return:
+    """
+    if depth == 0:
+        return 1
+    moves = board.generate_moves(color)
+    if depth == 1:
+        return len(moves)
+    other = OPPOSITE[color]
+    nodes = 0
+    for move in moves:
+        record = board.make_move(*move)
+        nodes += perft(board, depth - 1, other)
+        board.unmake_move(record)
+    return nodes
+
+
+def perft_legal(board, depth, color):
+    """
+    Perft только по допустимым ходам chess_my.Board.legal_moves (свой король не остаётся под боем).
+    Этим числам соответствуют эталонные значения; perft без этого ограничения считает
+    и ходы, оставляющие короля под шахом.
+    :param board:
+    :param depth:
+    :param color:
+    :return:
+    """
+    if depth == 0:
+        return 1
+    moves = board.legal_moves(color)
+    if depth == 1:
+        return len(moves)
+    other = OPPOSITE[color]
+    nodes = 0
+    for move in moves:
+        record = board.make_move(*move)
+        nodes += perft_legal(board, depth - 1, other)
+        board.unmake_move(record)
+    return nodes
+
+
+def perft_packed(board, depth, color, buffers=None):
+    """
+    Perft для chess_my.Board на упакованных ходах: на каждый уровень один заранее
+    выделенный MoveBuffer, поэтому в узлах не создаются списки ходов.
+    :param board:
+    :param depth:
+    :param color:
+    :param buffers: буферы по уровням (создаются при первом вызове)
+    :return:
+    """
+    if depth == 0:
+        return 1
+    if buffers is None:
+        buffers = [MoveBuffer() for _ in range(depth + 1)]
+    buffer = buffers[depth]
+    count = board.generate_packed_moves(color, buffer)
+    if depth == 1:
+        return count
+    other = OPPOSITE[color]
+    moves = buffer.moves
+    nodes = 0
+    for index in range(count):
+        record = board.make_packed_move(moves[index])
+        nodes += perft_packed(board, depth - 1, other, buffers)
+        board.unmake_move(record)
+    return nodes
+
+
+def divide(board, depth, color, counter=perft):
+    """
+    Perft с разбивкой по первым ходам: словарь {ход в нотации 'e2e4': число листьев}.
+    :param board:
+    :param depth:
+    :param color:
+    :param counter: функция подсчёта для поддеревьев (perft, perft_legal или perft_packed)
+    :return:
+    """
+    result = {}
+    other = OPPOSITE[color]
+    coords = getattr(board, 'SQUARE_COORDS', COORDS)
+    moves = board.legal_moves(color) if counter is perft_legal else board.generate_moves(color)
+    for move in moves:
+        record = board.make_move(*move)
+        # В шашках разные цепочки взятий могут иметь одни и те же начало и конец
+        text = move_to_str(move, coords)
+        result[text] = result.get(text, 0) + counter(board, depth - 1, other)
+        board.unmake_move(record)
+    return result
+
+
+def move_to_str(move, coords=COORDS):
+    """
+    Ход (start, end) в виде 'e2e4'. Клетки могут быть (row, col) или номерами клеток доски.
+    :param move:
+    :param coords: (row, col) по номеру клетки: COORDS для 0..63, у битбордов шашек — свои 0..31
+    :return:
+    """
+    start, end = move[0], move[1]
+    if isinstance(start, int):
+        start, end = coords[start], coords[end]
+    return chess_my.Board.coords_to_algebraic(start) + chess_my.Board.coords_to_algebraic(end)
+
+
+def make_board(game, representation='array', fen=None):
+    """
+    Позиция для perft: начальная или из FEN.
+    :param game: 'chess' или 'checkers'
+    :param representation: 'array' (chess_my.Board / checkers_my.Board), 'packed' (только шахматы)
+                           или 'bitboard' (BitboardBoard / CheckersBitboard)
+    :param fen:
+    :return: (доска, цвет стороны, которая ходит)
+    """
+    module = checkers_my if game == 'checkers' else chess_my
+    board = module.Board.from_fen(fen) if fen else module.Board()
+    if representation == 'bitboard':
+        bitboard_type = CheckersBitboard if game == 'checkers' else BitboardBoard
+        return bitboard_type.from_board(board), board.turn
+    return board, board.turn
+
+
+def apply_moves(board, moves, color='white'):
+    """
+    Доигрывает ходы вида 'e2e4' от текущей позиции, возвращает цвет, чей теперь ход.
+    Так в perft можно передать произвольную позицию, достижимую из начальной.
+    :param board:
+    :param moves:
+    :param color:
+    :return:
+    """
+    coords = getattr(board, 'SQUARE_COORDS', COORDS)
+    for text in moves:
+        for move in board.generate_moves(color):
+            if move_to_str(move, coords) == text:
+                board.make_move(*move)
+                break
+        else:
+            raise ValueError(f"Ход {text} недопустим в текущей позиции.")
+        color = OPPOSITE[color]
+    return color
+
+
+def run(board, max_depth, color, show_divide=False, label='', counter=perft):
+    """
+    Считает perft для глубин 1..max_depth, печатает узлы и скорость.
+    Возвращает список результатов по глубинам (для JSON-файла).
+    :return:
+    """
+    results = []
+    for depth in range(1, max_depth + 1):
+        started = time.perf_counter()
+        if show_divide and depth == max_depth:
+            split = divide(board, depth, color, counter)
+            nodes = sum(split.values())
+        else:
+            split = None
+            nodes = counter(board, depth, color)
+        elapsed = time.perf_counter() - started
+        nps = nodes / elapsed if elapsed > 0 else 0.0
+        if split:
+            for move, count in split.items():
+                print(f"{move}: {count}")
+        print(f"{label} depth {depth}: {nodes} узлов, {elapsed:.3f} с, {nps:,.0f} узлов/с")
+        result = {'depth': depth, 'nodes': nodes, 'seconds': elapsed, 'nps': nps}
+        if split:
+            result['divide'] = split
+        results.append(result)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perft для chess_my и checkers_my.")
+    parser.add_argument('game', choices=('chess', 'checkers'))
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--board', choices=('array', 'packed', 'bitboard'), default='array',
+                        help="представление доски ('packed' — только для шахмат)")
+    parser.add_argument('--fen', help="исследуемая позиция в FEN (по умолчанию — начальная)")
+    parser.add_argument('--moves', nargs='*', default=(),
+                        help="ходы от начальной позиции (или от --fen) до исследуемой, например b2b4 g7g5")
+    parser.add_argument('--legal', action='store_true',
+                        help="только допустимые ходы (Board.legal_moves); для шашек все ходы и так допустимы")
+    parser.add_argument('--divide', action='store_true', help="разбивка по первым ходам")
+    parser.add_argument('--json', help="файл для результатов в JSON")
+    args = parser.parse_args(argv)
+    if args.game == 'checkers' and args.board == 'packed':
+        parser.error("упакованные ходы есть только у шахматной доски")
+    if args.legal and args.game == 'chess' and args.board != 'array':
+        parser.error("--legal доступен только для шахматной доски 'array'")
+
+    board, color = make_board(args.game, args.board, args.fen)
+    color = apply_moves(board, args.moves, color)
+    label = f"{args.game}/{args.board}" + ("/legal" if args.legal else "")
+    if args.game == 'chess' and args.board == 'packed':
+        counter = perft_packed
+    elif args.game == 'chess' and args.legal:
+        counter = perft_legal
+    else:
+        counter = perft
+    results = run(board, args.depth, color, args.divide, label, counter)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'game': args.game, 'board': args.board, 'legal': args.legal, 'fen': args.fen,
+                       'moves': list(args.moves),
+                       'side_to_move': color, 'results': results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Вывод доски в консоль для chess_my и checkers_my.
+
+Кадр собирается в одну строку и пишется в поток одним вызовом write, а не отдельным
+print на каждую клетку. Режимы Renderer:
+    'full'     — каждый кадр печатается целиком (как раньше print_board);
+    'diff'     — доска закрепляется вверху экрана, а при следующих кадрах перерисовываются
+                 только изменившиеся клетки через ANSI-перемещения курсора; диалог с
+                 пользователем прокручивается под доской;
+    'headless' — ничего не печатается, последний кадр доступен в Renderer.cells
+                 (для скриптов и пакетной игры).
+Доска отдаёт кадр как 64 строки-клетки (Board.cells), поэтому рендерер не зависит от игры.
+Клетки бывают разной ширины (у Камикадзе '⸱K⸱'), поэтому столбец клетки в режиме 'diff'
+считается по ширинам клеток уже нарисованного кадра.
+"""
+import re
+import sys
+import unicodedata
+
+MODES = ('full', 'diff', 'headless')
+
+# Кадр: строка букв, 8 строк доски, строка букв
+FRAME_LINES = 10
+# ANSI-последовательности
+CLEAR_SCREEN = "\x1b[H\x1b[2J"
+RESET_SCROLL_REGION = "\x1b[r"
+THREAT_STYLE = "\x1b[41m"
+RESET_STYLE = "\x1b[0m"
+CLEAR_TO_END_OF_LINE = "\x1b[K"
+# Оформление (цвет, фон) не занимает места на экране
+STYLE_PATTERN = re.compile(r"\x1b\[[0-9;]*m")
+
+
+def frame_text(cells, header):
+    """
+    Весь кадр одной строкой: '8  ♜ ♞ ... ♜  8' для каждой горизонтали, сверху и снизу — буквы.
+    :param cells: 64 символа клеток, индекс row*8+col
+    :param header: строка с буквами столбцов
+    :return:
+    """
+    lines = [header]
+    lines.extend(rank_line(cells, row) for row in range(8))
+    lines.append(header)
+    return "\n".join(lines) + "\n"
+
+
+def rank_line(cells, row):
+    """
+    Строка кадра для горизонтали row (0 — восьмая): '8  ♜ ♞ ... ♜  8'.
+    :param cells:
+    :param row:
+    :return:
+    """
+    rank = 8 - row
+    return f"{rank}  " + "".join(cell + " " for cell in cells[row * 8:row * 8 + 8]) + f" {rank}"
+
+
+def cell_width(cell):
+    """
+    Сколько столбцов экрана занимает клетка: без ANSI-оформления, широкие символы — по два.
+    :param cell:
+    :return:
+    """
+    width = 0
+    for char in STYLE_PATTERN.sub("", cell):
+        if unicodedata.combining(char):
+            continue
+        width += 2 if unicodedata.east_asian_width(char) in ('W', 'F') else 1
+    return width
+
+
+def mark_threat(cell):
+    """
+    Клетка под боем соперника: символ на красном фоне (ширина клетки не меняется).
+    :param cell:
+    :return:
+    """
+    return f"{THREAT_STYLE}{cell}{RESET_STYLE}"
+
+
+def cursor_to(line, column):
+    return f"\x1b[{line};{column}H"
+
+
+def cell_position(index, cells):
+    """
+    Позиция клетки в кадре, закреплённом в левом верхнем углу экрана: (строка, столбец) с 1.
+    Столбец зависит от ширины клеток левее на той же горизонтали.
+    :param index:
+    :param cells: нарисованный кадр
+    :return:
+    """
+    row_start = index - index % 8
+    return index // 8 + 2, 4 + sum(cell_width(cell) + 1 for cell in cells[row_start:index])
+
+
+class Renderer:
+    """
+    Печатает кадры доски в поток out в одном из режимов MODES.
+    Считает число кадров и записанных символов (для сравнения режимов).
+    """
+    def __init__(self, mode='full', out=None):
+        if mode not in MODES:
+            raise ValueError(f"Неизвестный режим вывода: {mode}. Допустимы: {', '.join(MODES)}.")
+        self.mode = mode
+        self.out = out if out is not None else sys.stdout
+        self.cells = None # последний нарисованный кадр
+        self.header = None
+        self.frames = 0
+        self.written = 0
+
+    def draw(self, cells, header):
+        """
+        Рисует кадр. В режиме 'diff' после первого кадра пишутся только изменившиеся клетки.
+        :param cells: 64 строки-клетки (см. Board.cells)
+        :param header: строка с буквами столбцов
+        :return:
+        """
+        cells = list(cells)
+        if self.mode == 'headless':
+            text = ""
+        elif self.mode == 'diff':
+            text = self._diff_text(cells, header)
+        else:
+            text = frame_text(cells, header)
+        self.cells = cells
+        self.header = header
+        self.frames += 1
+        if text:
+            self.out.write(text)
+            self.out.flush()
+            self.written += len(text)
+
+    def _diff_text(self, cells, header):
+        if self.cells is None or header != self.header:
+            # Первый кадр: очищаем экран, рисуем доску вверху и оставляем под ней
+            # прокручиваемую область, чтобы ввод и сообщения не сдвигали доску
+            return (CLEAR_SCREEN + frame_text(cells, header)
+                    + f"\x1b[{FRAME_LINES + 1}r" + cursor_to(FRAME_LINES + 1, 1))
+        parts = []
+        for row in range(8):
+            old_row = self.cells[row * 8:row * 8 + 8]
+            new_row = cells[row * 8:row * 8 + 8]
+            if old_row == new_row:
+                continue
+            if any(cell_width(old) != cell_width(new) for old, new in zip(old_row, new_row)):
+                # Ширина клетки изменилась — клетки правее сдвинулись, перерисовываем горизонталь целиком
+                parts.append(cursor_to(row + 2, 1) + rank_line(cells, row) + CLEAR_TO_END_OF_LINE)
+                continue
+            for index in range(row * 8, row * 8 + 8):
+                if self.cells[index] != cells[index]:
+                    parts.append(cursor_to(*cell_position(index, cells)) + cells[index])
+        if not parts:
+            return ""
+        # Сохраняем и восстанавливаем курсор, чтобы не сбить строку ввода под доской
+        return "\x1b7" + "".join(parts) + "\x1b8"
+
+    def invalidate(self):
+        """
+        Следующий кадр будет нарисован целиком (например, если экран очищен извне).
+        :return:
+        """
+        self.cells = None
+
+    def close(self):
+        """
+        Возвращает терминал в обычный режим прокрутки (нужно только для 'diff').
+        :return:
+        """
+        if self.mode == 'diff' and self.cells is not None:
+            # Сброс области прокрутки переносит курсор в начало экрана — возвращаем его вниз
+            self.out.write(RESET_SCROLL_REGION + cursor_to(999, 1) + "\n")
+            self.out.flush()
+        self.cells = None
@@ -0,0 +1,245 @@
+"""
+Потоковая проверка архивов записанных партий chess_my.
+
+Архив читается построчно, по партии на строку, и целиком в памяти не держится:
+    - строка ходов в алгебраической нотации через пробел: 'b2b4 g7g5 c1a3'
+      (допускаются 'b2-b4', 'b2xb4', номера ходов '1.' и результат '1-0' в конце);
+    - строка JSON с полем "moves" (как пишет selfplay.py).
+Пустые строки, строки, начинающиеся с '#', и записи JSON других игр ("type": "checkers") пропускаются.
+Каждый ход проверяется Board.is_valid_move и делается move_piece, доска не печатается.
+Партии раздаются процессам пачками, в работе одновременно не больше max_pending пачек,
+поэтому память не растёт с размером архива. Результаты пишутся по строке JSON на партию
+в порядке архива, в конце печатается скорость в партиях и ходах в секунду.
+
+Пример:
+    python selfplay.py chess --games 10000 --out games.jsonl
+    python replay.py games.jsonl --out checked.jsonl
+    python replay.py archive.txt --workers 4 --chunk 256 --invalid-only
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from chess_my import Board
+
+# Токены, которые не являются ходами: результат партии
+RESULTS = ('1-0', '0-1', '1/2-1/2', '*')
+
+
+def parse_line(line):
+    """
+    Список ходов-строк из строки архива или None, если строка не содержит шахматной партии
+    (записи JSON других игр пропускаются). ValueError — если строка JSON испорчена.
+    :param line:
+    :return:
+    """
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+    if line.startswith(('{', '[')):
+        record = json.loads(line)
+        if not isinstance(record, dict):
+            raise ValueError("Строка JSON должна быть объектом.")
+        if game_type(record) != 'chess':
+            return None
+        moves = record.get('moves', ())
+        if not isinstance(moves, list) or not all(isinstance(move, str) for move in moves):
+            raise ValueError("Поле 'moves' должно быть списком строк.")
+        return moves
+    return [token for token in line.split()
+            if token not in RESULTS and not token.endswith('.')]
+
+
+def game_type(record):
+    """
+    Игра записи JSON: поле "type" (selfplay.py) или строковое "game" (server.py); по умолчанию 'chess'.
+    :param record:
+    :return:
+    """
+    kind = record.get('type')
+    if kind is None and isinstance(record.get('game'), str):
+        kind = record['game']
+    return 'chess' if kind is None else kind
+
+
+def parse_move(text):
+    """
+    'e2e4', 'e2-e4' или 'e2xe4' -> ((6, 4), (4, 4)); None, если запись не разобрать.
+    :param text:
+    :return:
+    """
+    text = text.replace('-', '').replace('x', '')
+    if len(text) != 4:
+        return None
+    start = Board.algebraic_to_coords(text[:2])
+    end = Board.algebraic_to_coords(text[2:])
+    if start is None or end is None:
+        return None
+    return start, end
+
+
+def iter_games(lines):
+    """
+    Генератор (номер партии, номер строки, ходы) по строкам архива.
+    Номер партии — порядковый среди непустых строк, номер строки — с 1.
+    :param lines: любой итерируемый источник строк (например, открытый файл)
+    :return:
+    """
+    index = 0
+    for line_number, line in enumerate(lines, 1):
+        try:
+            moves = parse_line(line)
+        except ValueError as error:
+            yield index, line_number, error
+            index += 1
+            continue
+        if moves is None:
+            continue
+        yield index, line_number, moves
+        index += 1
+
+
+def replay_game(moves, with_fen=False):
+    """
+    Проигрывает ходы от начальной позиции и проверяет каждый.
+    :param moves: ходы-строки
+    :param with_fen: добавить в результат FEN итоговой позиции
+    :return: словарь: valid, plies (сколько ходов принято), status и при ошибке error
+    """
+    board = Board()
+    result = {'valid': True, 'plies': 0}
+    for ply, text in enumerate(moves):
+        move = parse_move(text)
+        if move is None:
+            valid, reason = False, "Не удалось разобрать запись хода."
+        else:
+            valid, reason = board.is_valid_move(move[0], move[1], board.turn)
+        if not valid:
+            result['valid'] = False
+            result['error'] = {'ply': ply, 'move': text, 'reason': reason}
+            break
+        board.move_piece(*move)
+        result['plies'] = ply + 1
+    if result['valid']:
+        if not board.legal_moves():
+            result['status'] = 'checkmate' if board.is_check() else 'stalemate'
+        else:
+            result['status'] = 'ongoing'
+    if with_fen:
+        result['fen'] = board.to_fen()
+    return result
+
+
+def replay_chunk(task):
+    """
+    Задача для процесса пула: (пачка партий, with_fen). Пачка — список (номер, строка, ходы).
+    :return: список словарей с результатами
+    """
+    chunk, with_fen = task
+    results = []
+    for index, line_number, moves in chunk:
+        if isinstance(moves, Exception):
+            results.append({'game': index, 'line': line_number, 'valid': False, 'plies': 0,
+                            'error': {'ply': None, 'move': None, 'reason': f"Ошибка разбора строки: {moves}"}})
+            continue
+        record = {'game': index, 'line': line_number}
+        record.update(replay_game(moves, with_fen))
+        results.append(record)
+    return results
+
+
+def chunked(items, size):
+    """
+    Генератор списков по size элементов из items (последний может быть короче).
+    :param items:
+    :param size:
+    :return:
+    """
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def replay_archive(lines, workers=None, chunksize=64, max_pending=None, with_fen=False):
+    """
+    Генератор результатов проверки партий в порядке архива.
+    Строки читаются по мере освобождения места в очереди: в работе не больше
+    max_pending пачек (по умолчанию — по 4 на процесс).
+    :param lines: источник строк архива
+    :param workers: число процессов (1 — без пула, None — все ядра)
+    :param chunksize: партий в пачке
+    :param max_pending:
+    :param with_fen:
+    :return:
+    """
+    if chunksize < 1:
+        raise ValueError("Размер пачки должен быть положительным.")
+    tasks = ((chunk, with_fen) for chunk in chunked(iter_games(lines), chunksize))
+    if workers == 1:
+        for task in tasks:
+            yield from replay_chunk(task)
+        return
+    if max_pending is None:
+        max_pending = 4 * (workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for task in tasks:
+            pending.append(executor.submit(replay_chunk, task))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Проверка и воспроизведение архива партий chess_my.")
+    parser.add_argument('archive', help="файл с партиями ('-' — stdin)")
+    parser.add_argument('--out', help="файл для результатов (JSON по строке на партию); по умолчанию stdout")
+    parser.add_argument('--workers', type=int, default=None, help="число процессов (по умолчанию — все ядра)")
+    parser.add_argument('--chunk', type=int, default=64, help="партий в одной задаче для процесса")
+    parser.add_argument('--max-pending', type=int, default=None, help="сколько пачек может быть в работе")
+    parser.add_argument('--fen', action='store_true', help="добавлять FEN итоговой позиции")
+    parser.add_argument('--invalid-only', action='store_true', help="писать только партии с ошибками")
+    args = parser.parse_args(argv)
+    if args.chunk < 1:
+        parser.error("--chunk должен быть положительным")
+
+    source = sys.stdin if args.archive == '-' else open(args.archive, encoding='utf-8')
+    out = open(args.out, 'w', encoding='utf-8') if args.out else sys.stdout
+    games = invalid = plies = 0
+    statuses = {'checkmate': 0, 'stalemate': 0, 'ongoing': 0}
+    started = time.perf_counter()
+    try:
+        for record in replay_archive(source, args.workers, args.chunk, args.max_pending, args.fen):
+            games += 1
+            plies += record['plies']
+            if record['valid']:
+                statuses[record['status']] += 1
+            else:
+                invalid += 1
+            if record['valid'] and args.invalid_only:
+                continue
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - started
+    rate = (lambda count: count / elapsed if elapsed else 0.0)
+    print(f"{games} партий, {plies} ходов за {elapsed:.2f} с ({rate(games):.1f} партий/с, "
+          f"{rate(plies):,.0f} ходов/с): с ошибками {invalid}, мат {statuses['checkmate']}, "
+          f"пат {statuses['stalemate']}, не закончено {statuses['ongoing']}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
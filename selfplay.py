@@ -0,0 +1,189 @@
+"""
+Пакетная игра без консоли: N партий между стратегиями выбора хода, распределённых по процессам.
+
+Стратегия (policy) — функция policy(board, moves, color, rng) -> ход из moves.
+Результаты и ходы каждой партии пишутся потоком, по строке JSON на партию,
+в конце печатается скорость в партиях в секунду.
+
+Пример:
+    python selfplay.py chess --white greedy --black random --games 10000 --out games.jsonl
+    python selfplay.py checkers --games 1000 --workers 4
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import checkers_my
+import chess_my
+from chess_engine import Engine, piece_value
+
+OPPOSITE = {'white': 'black', 'black': 'white'}
+
+# Поисковики процесса для стратегии 'engine' (создаются при первом ходе)
+_engine = None
+_checkers_engine = None
+
+
+def coords_to_algebraic(pos):
+    return chess_my.Board.coords_to_algebraic(pos)
+
+
+def random_policy(board, moves, color, rng):
+    return rng.choice(moves)
+
+
+def _captured_value(board, move):
+    """
+    Ценность фигуры, снимаемой ходом (0 для тихого хода). В шашках — число шашек,
+    снятых цепочкой взятий (третий элемент хода).
+    """
+    if isinstance(board, checkers_my.Board):
+        return len(move[2])
+    end_row, end_col = move[1]
+    target = board.get_piece(end_row, end_col)
+    return piece_value(target) if target else 0
+
+
+def greedy_policy(board, moves, color, rng):
+    """
+    Берёт самую ценную фигуру, если можно что-то взять, иначе ходит случайно.
+    """
+    best_value = max(_captured_value(board, move) for move in moves)
+    if best_value == 0:
+        return rng.choice(moves)
+    return rng.choice([move for move in moves if _captured_value(board, move) == best_value])
+
+
+def engine_policy(board, moves, color, rng, depth=2):
+    """
+    Ход поисковика на фиксированную глубину: chess_engine для шахмат, checkers_engine для шашек.
+    """
+    global _engine, _checkers_engine
+    if isinstance(board, checkers_my.Board):
+        if _checkers_engine is None:
+            import checkers_engine
+
+            _checkers_engine = checkers_engine.Engine(tt_size=1 << 16)
+        start, end, captured = _checkers_engine.search(board, time_limit=None, max_depth=depth).move
+        # Порядок снятых шашек у поисковика может отличаться от generate_moves
+        for move in moves:
+            if move[0] == start and move[1] == end and set(move[2]) == set(captured):
+                return move
+        raise ValueError(f"Поисковик вернул недопустимый ход {start} -> {end}.")
+    if _engine is None:
+        _engine = Engine(tt_size=1 << 16)
+    return _engine.search(board, time_limit=None, max_depth=depth, root_moves=moves).move
+
+
+POLICIES = {
+    'random': random_policy,
+    'greedy': greedy_policy,
+    'engine': engine_policy,
+}
+
+
+def play_chess(white, black, rng, max_plies):
+    """
+    Одна партия в шахматы. Возвращает (результат, причина, ходы).
+    """
+    board = chess_my.Board()
+    policies = {'white': POLICIES[white], 'black': POLICIES[black]}
+    moves_played = []
+    for _ in range(max_plies):
+        color = board.turn
+        moves = board.legal_moves()
+        if not moves:
+            if board.is_check():
+                return ('0-1' if color == 'white' else '1-0'), 'checkmate', moves_played
+            return '1/2-1/2', 'stalemate', moves_played
+        move = policies[color](board, moves, color, rng)
+        moves_played.append(coords_to_algebraic(move[0]) + coords_to_algebraic(move[1]))
+        board.make_move(*move)
+    return '1/2-1/2', 'max_plies', moves_played
+
+
+def play_checkers(white, black, rng, max_plies):
+    """
+    Одна партия в шашки: проигрывает тот, кому нечем ходить.
+    """
+    board = checkers_my.Board()
+    policies = {'white': POLICIES[white], 'black': POLICIES[black]}
+    moves_played = []
+    color = 'white'
+    for _ in range(max_plies):
+        moves = board.generate_moves(color)
+        if not moves:
+            return ('0-1' if color == 'white' else '1-0'), 'no_moves', moves_played
+        move = policies[color](board, moves, color, rng)
+        moves_played.append(coords_to_algebraic(move[0]) + coords_to_algebraic(move[1]))
+        board.make_move(*move)
+        color = OPPOSITE[color]
+    return '1/2-1/2', 'max_plies', moves_played
+
+
+GAMES = {
+    'chess': play_chess,
+    'checkers': play_checkers,
+}
+
+
+def play_one(task):
+    """
+    Задача для процесса пула: (номер партии, игра, стратегия белых, стратегия чёрных, seed, max_plies).
+    :return: словарь с результатом партии
+    """
+    index, game, white, black, seed, max_plies = task
+    rng = random.Random(seed * 1000003 + index)
+    result, reason, moves = GAMES[game](white, black, rng, max_plies)
+    return {'game': index, 'type': game, 'white': white, 'black': black,
+            'result': result, 'reason': reason, 'plies': len(moves), 'moves': moves}
+
+
+def run_games(game, white, black, count, workers=None, seed=0, max_plies=200, chunksize=16):
+    """
+    Генератор результатов партий (в порядке номеров), которые играются в пуле процессов.
+    :return:
+    """
+    tasks = ((index, game, white, black, seed, max_plies) for index in range(count))
+    if workers == 1:
+        yield from map(play_one, tasks)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(play_one, tasks, chunksize=chunksize)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пакетная игра chess_my / checkers_my без консоли.")
+    parser.add_argument('game', choices=tuple(GAMES))
+    parser.add_argument('--white', choices=tuple(POLICIES), default='random')
+    parser.add_argument('--black', choices=tuple(POLICIES), default='random')
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=None, help="число процессов (по умолчанию — все ядра)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-plies', type=int, default=200)
+    parser.add_argument('--out', help="файл для результатов (JSON по строке на партию); по умолчанию stdout")
+    args = parser.parse_args(argv)
+
+    out = open(args.out, 'w', encoding='utf-8') if args.out else sys.stdout
+    scores = {'1-0': 0, '0-1': 0, '1/2-1/2': 0}
+    started = time.perf_counter()
+    played = 0
+    try:
+        for record in run_games(args.game, args.white, args.black, args.games,
+                                args.workers, args.seed, args.max_plies):
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            scores[record['result']] += 1
+            played += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - started
+    print(f"{played} партий за {elapsed:.2f} с ({played / elapsed if elapsed else 0:.1f} партий/с): "
+          f"белые {scores['1-0']}, чёрные {scores['0-1']}, ничьи {scores['1/2-1/2']}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,426 @@
+"""
+Асинхронный сервер партий chess_my / checkers_my: много сессий в одном процессе.
+
+Протокол — строки JSON через TCP или Unix-сокет, по запросу на строку и по ответу на строку.
+В ответе всегда есть "ok" и, если он был в запросе, тот же "id":
+    {"op": "new", "game": "chess"}              -> {"ok": true, "session": 1, "turn": "white", ...}
+    {"op": "move", "session": 1, "move": "b2b4"} -> {"ok": true, "status": "play", "turn": "black", ...}
+    {"op": "move", "session": 2, "move": "c1e7", "captured": ["d4", "f6"]}  (шашки: выбор цепочки взятий)
+    {"op": "moves", "session": 1}               -> {"ok": true, "moves": ["a3b3", ...]}
+    {"op": "state", "session": 1}               -> {"ok": true, "fen": "...", "status": "play", ...}
+    {"op": "hint", "session": 1, "time": 0.5}   -> {"ok": true, "move": "b1c3", "score": "+0.08", ...}
+    {"op": "close", "session": 1}               -> {"ok": true}
+Ошибки: {"ok": false, "error": "..."}.
+Сессии — объекты chess_my.Game / checkers_my.Game без консоли (Game.play_move, Game.status),
+ход обрабатывается прямо в цикле событий. Подсказки требуют поиска и считаются в пуле процессов,
+чтобы не останавливать остальные сессии. Запросы одного соединения обрабатываются по очереди.
+Сессия живёт, пока её не закроют или пока не закроется соединение, которое её создало.
+
+Пример:
+    python server.py serve --port 8765 --workers 2
+    python server.py serve --unix /tmp/chess.sock
+    python server.py load --port 8765 --clients 200 --moves 50 --hint-every 20
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import checkers_my
+import chess_my
+
+GAMES = {
+    'chess': chess_my.Game,
+    'checkers': checkers_my.Game,
+}
+# Ограничение на длину строки запроса
+LINE_LIMIT = 1 << 16
+# Очередь входящих соединений: клиенты подключаются тысячами сразу
+BACKLOG = 4096
+# Наибольшее время на подсказку, секунд
+MAX_HINT_TIME = 30.0
+
+# Поисковики процесса пула (создаются при первой подсказке) и источники для шахматного
+_worker_engines = {}
+_worker_options = {}
+
+
+def _init_worker(book=None, tablebase=None):
+    _worker_options['book'] = book
+    _worker_options['tablebase'] = tablebase
+
+
+def _worker_engine(game):
+    engine = _worker_engines.get(game)
+    if engine is None:
+        if game == 'chess':
+            from chess_engine import Engine
+
+            book = tablebase = None
+            if _worker_options.get('book'):
+                from book import OpeningBook
+
+                book = OpeningBook(_worker_options['book'])
+            if _worker_options.get('tablebase'):
+                from tablebase import Tablebase
+
+                tablebase = Tablebase(_worker_options['tablebase'])
+            engine = Engine(tablebase=tablebase, book=book)
+        else:
+            from checkers_engine import Engine
+
+            engine = Engine()
+        _worker_engines[game] = engine
+    return engine
+
+
+def hint_task(game, position, time_limit):
+    """
+    Задача для процесса пула: лучший ход в позиции. Позиция передаётся как Board.pack()
+    для шахмат и как FEN для шашек.
+    :return: словарь для ответа
+    """
+    if game == 'chess':
+        from chess_engine import format_move, format_score
+
+        board = chess_my.Board.unpack(position)
+    else:
+        from checkers_engine import format_move, format_score
+
+        board = checkers_my.Board.from_fen(position)
+    result = _worker_engine(game).search(board, time_limit)
+    if result.move is None:
+        return {'move': None}
+    return {'move': move_text(result.move), 'notation': format_move(result.move),
+            'score': format_score(result.score), 'depth': result.depth, 'nodes': result.nodes}
+
+
+def hint_time(value):
+    """
+    Время на подсказку из запроса: конечное положительное число, не больше MAX_HINT_TIME.
+    """
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value) or value <= 0:
+        raise ValueError(f"Время подсказки должно быть положительным числом секунд, получено {value!r}.")
+    return min(float(value), MAX_HINT_TIME)
+
+
+def move_text(move):
+    return chess_my.Board.coords_to_algebraic(move[0]) + chess_my.Board.coords_to_algebraic(move[1])
+
+
+def parse_move_text(text):
+    """
+    'e2e4' -> ((6, 4), (4, 4)) или None.
+    """
+    if not isinstance(text, str) or len(text) != 4:
+        return None
+    start = chess_my.Board.algebraic_to_coords(text[:2])
+    end = chess_my.Board.algebraic_to_coords(text[2:])
+    if start is None or end is None:
+        return None
+    return start, end
+
+
+class Session:
+    """
+    Партия на сервере: игра ('chess' или 'checkers') и её объект Game без консоли.
+    """
+    __slots__ = ('id', 'game', 'state', 'created')
+
+    def __init__(self, session_id, game):
+        self.id = session_id
+        self.game = game
+        self.state = GAMES[game](render='headless')
+        self.created = time.monotonic()
+
+    @property
+    def turn(self):
+        return self.state.current_player if self.game == 'chess' else self.state.current_turn
+
+    def legal_moves(self):
+        if self.game == 'chess':
+            moves = self.state.board.legal_moves(self.turn)
+        else:
+            moves = self.state.board.generate_moves(self.turn)
+        # У шашек разные цепочки взятий могут иметь одинаковые начало и конец
+        return list(dict.fromkeys(move_text(move) for move in moves))
+
+    def position(self):
+        """
+        Позиция для процесса пула (см. hint_task).
+        """
+        board = self.state.board
+        if self.game == 'chess':
+            return board.pack()
+        board.turn = self.turn
+        return board.to_fen()
+
+    def describe(self):
+        board = self.state.board
+        if self.game == 'checkers':
+            board.turn = self.turn
+        return {'session': self.id, 'game': self.game, 'turn': self.turn,
+                'status': self.state.status(), 'fen': board.to_fen()}
+
+
+class GameServer:
+    """
+    Хранит сессии и обрабатывает запросы протокола. Подсказки уходят в пул процессов executor.
+    """
+    def __init__(self, workers=None, max_sessions=100000, book=None, tablebase=None):
+        self.sessions = {}
+        self.next_id = 1
+        self.max_sessions = max_sessions
+        self.executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                            initargs=(book, tablebase))
+        self.requests = 0
+        self.connections = 0
+
+    def session(self, request):
+        session = self.sessions.get(request.get('session'))
+        if session is None:
+            raise ValueError(f"Нет сессии {request.get('session')!r}.")
+        return session
+
+    async def dispatch(self, request, owned=None):
+        """
+        Ответ на один запрос (словарь). Ошибки в запросе возвращаются как {"ok": false, "error": ...}.
+        :param request:
+        :param owned: номера сессий соединения — созданные добавляются, закрытые убираются
+        :return:
+        """
+        self.requests += 1
+        try:
+            if not isinstance(request, dict):
+                raise ValueError("Запрос должен быть объектом JSON.")
+            op = request.get('op')
+            if op == 'new':
+                game = request.get('game', 'chess')
+                if game not in GAMES:
+                    raise ValueError(f"Неизвестная игра {game!r}. Допустимы: {', '.join(GAMES)}.")
+                if len(self.sessions) >= self.max_sessions:
+                    raise ValueError("Достигнуто наибольшее число сессий.")
+                session = Session(self.next_id, game)
+                self.sessions[session.id] = session
+                self.next_id += 1
+                if owned is not None:
+                    owned.add(session.id)
+                response = session.describe()
+            elif op == 'move':
+                session = self.session(request)
+                move = parse_move_text(request.get('move'))
+                if move is None:
+                    raise ValueError("Ход записывается как 'e2e4'.")
+                captured = request.get('captured')
+                if captured is not None:
+                    # Шашки: какие шашки снять, если цепочек взятий с этими началом и концом несколько
+                    if session.game != 'checkers' or not isinstance(captured, list):
+                        raise ValueError("'captured' — список клеток снимаемых шашек (только для шашек).")
+                    captured = [chess_my.Board.algebraic_to_coords(square) if isinstance(square, str) else None
+                                for square in captured]
+                    if None in captured:
+                        raise ValueError("Клетки в 'captured' записываются как 'd4'.")
+                    move = move + (captured,)
+                # В оконченной партии play_move отклоняет любой ход
+                valid, message = session.state.play_move(*move)
+                if not valid:
+                    raise ValueError(message or "Некорректный ход.")
+                response = {'turn': session.turn, 'status': session.state.status()}
+            elif op == 'moves':
+                response = {'moves': self.session(request).legal_moves()}
+            elif op == 'state':
+                response = self.session(request).describe()
+            elif op == 'hint':
+                session = self.session(request)
+                time_limit = hint_time(request.get('time', 1.0))
+                loop = asyncio.get_running_loop()
+                try:
+                    response = await loop.run_in_executor(self.executor, hint_task, session.game,
+                                                          session.position(), time_limit)
+                except Exception as error:
+                    # Сбой в процессе пула (в том числе его падение) — ответ с ошибкой, а не обрыв соединения
+                    raise ValueError(f"Ошибка анализа: {error!r}.") from error
+            elif op == 'close':
+                self.session(request)
+                del self.sessions[request['session']]
+                if owned is not None:
+                    owned.discard(request['session'])
+                response = {}
+            elif op == 'stats':
+                response = {'sessions': len(self.sessions), 'requests': self.requests,
+                            'connections': self.connections}
+            else:
+                raise ValueError(f"Неизвестная операция {op!r}.")
+            response['ok'] = True
+        except (ValueError, TypeError) as error:
+            response = {'ok': False, 'error': str(error)}
+        if isinstance(request, dict) and 'id' in request:
+            response['id'] = request['id']
+        return response
+
+    async def handle_connection(self, reader, writer):
+        """
+        Обрабатывает запросы одного клиента. Сессии, созданные соединением и не закрытые им,
+        удаляются, когда соединение закрывается (в том числе при обрыве).
+        """
+        self.connections += 1
+        owned = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    response = {'ok': False, 'error': "Слишком длинная строка запроса."}
+                    writer.write((json.dumps(response, ensure_ascii=False) + "\n").encode())
+                    break
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    response = {'ok': False, 'error': "Запрос не является JSON."}
+                else:
+                    response = await self.dispatch(request, owned)
+                writer.write((json.dumps(response, ensure_ascii=False) + "\n").encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            for session_id in owned:
+                self.sessions.pop(session_id, None)
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8765, unix=None):
+        if unix:
+            server = await asyncio.start_unix_server(self.handle_connection, unix, limit=LINE_LIMIT,
+                                                     backlog=BACKLOG)
+            where = unix
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port, limit=LINE_LIMIT,
+                                                backlog=BACKLOG)
+            where = f"{host}:{port}"
+        print(f"Сервер партий слушает {where}", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+
+async def open_connection(host, port, unix=None):
+    if unix:
+        return await asyncio.open_unix_connection(unix, limit=LINE_LIMIT)
+    return await asyncio.open_connection(host, port, limit=LINE_LIMIT)
+
+
+async def call(reader, writer, request):
+    writer.write((json.dumps(request) + "\n").encode())
+    await writer.drain()
+    return json.loads(await reader.readline())
+
+
+async def load_client(index, args, latencies, hint_latencies, counters):
+    """
+    Один клиент нагрузки: создаёт партию и делает до args.moves случайных допустимых ходов,
+    время каждого хода (запрос 'move' до ответа) записывается в latencies.
+    """
+    rng = random.Random(args.seed * 1000003 + index)
+    reader, writer = await open_connection(args.host, args.port, args.unix)
+    try:
+        game = args.game if args.game != 'mixed' else ('chess', 'checkers')[index % 2]
+        session = (await call(reader, writer, {'op': 'new', 'game': game}))['session']
+        for ply in range(args.moves):
+            moves = (await call(reader, writer, {'op': 'moves', 'session': session}))['moves']
+            if not moves:
+                counters['finished'] += 1
+                break
+            if args.hint_every and ply % args.hint_every == args.hint_every - 1:
+                started = time.perf_counter()
+                await call(reader, writer, {'op': 'hint', 'session': session, 'time': args.hint_time})
+                hint_latencies.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            response = await call(reader, writer, {'op': 'move', 'session': session, 'move': rng.choice(moves)})
+            latencies.append(time.perf_counter() - started)
+            if not response['ok']:
+                counters['errors'] += 1
+        await call(reader, writer, {'op': 'close', 'session': session})
+    finally:
+        writer.close()
+
+
+def percentile(values, fraction):
+    """
+    Значение, ниже которого лежит доля fraction отсортированных values.
+    """
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+async def load_test(args):
+    """
+    Запускает args.clients клиентов одновременно и печатает p50/p99 задержки хода.
+    """
+    latencies = []
+    hint_latencies = []
+    counters = {'finished': 0, 'errors': 0}
+    started = time.perf_counter()
+    await asyncio.gather(*(load_client(index, args, latencies, hint_latencies, counters)
+                           for index in range(args.clients)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    hint_latencies.sort()
+    report = {'clients': args.clients, 'moves': len(latencies), 'seconds': round(elapsed, 3),
+              'moves_per_second': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+              'move_p50_ms': round(1000 * percentile(latencies, 0.5), 3),
+              'move_p99_ms': round(1000 * percentile(latencies, 0.99), 3),
+              'move_max_ms': round(1000 * latencies[-1], 3) if latencies else 0.0,
+              'finished_games': counters['finished'], 'errors': counters['errors']}
+    if hint_latencies:
+        report['hints'] = len(hint_latencies)
+        report['hint_p50_ms'] = round(1000 * percentile(hint_latencies, 0.5), 3)
+        report['hint_p99_ms'] = round(1000 * percentile(hint_latencies, 0.99), 3)
+    print(json.dumps(report, ensure_ascii=False))
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сервер партий chess_my / checkers_my и генератор нагрузки.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve = commands.add_parser('serve', help="запустить сервер")
+    serve.add_argument('--workers', type=int, default=None, help="процессов для подсказок (по умолчанию — все ядра)")
+    serve.add_argument('--max-sessions', type=int, default=100000)
+    serve.add_argument('--book', help="книга позиций для подсказок в шахматах (см. book.py)")
+    serve.add_argument('--tablebase', help="каталог эндшпильных баз (см. tablebase.py)")
+    load = commands.add_parser('load', help="нагрузка: много клиентов играют случайными ходами")
+    load.add_argument('--clients', type=int, default=100)
+    load.add_argument('--moves', type=int, default=40, help="ходов на клиента")
+    load.add_argument('--game', choices=tuple(GAMES) + ('mixed',), default='chess')
+    load.add_argument('--hint-every', type=int, default=0, help="подсказка каждые N ходов (0 — без подсказок)")
+    load.add_argument('--hint-time', type=float, default=0.2)
+    load.add_argument('--seed', type=int, default=0)
+    for command in (serve, load):
+        command.add_argument('--host', default='127.0.0.1')
+        command.add_argument('--port', type=int, default=8765)
+        command.add_argument('--unix', help="путь к Unix-сокету вместо TCP")
+    args = parser.parse_args(argv)
+
+    if args.command == 'load':
+        asyncio.run(load_test(args))
+        return
+    server = GameServer(args.workers, args.max_sessions, args.book, args.tablebase)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,568 @@
+"""
+Эндшпильные базы chess_my для малого материала (до MAX_PIECES фигур вместе с королями),
+например K+Командир против K: 'KCvK', K+Чемпион против K: 'KHvK', 'KXvK'.
+
+Позиция индексируется без потерь: клетка каждой фигуры (6 бит) в порядке материала и очередь хода,
+index = ((клетка_1 * 64 + клетка_2) * 64 + ...) * 2 + (0 — ходят белые, 1 — чёрные).
+Ходы берутся из правил фигур (Board.legal_moves), поэтому новые фигуры, взрыв Камикадзе
+и пешки без превращения учитываются так же, как в игре.
+
+Построение:
+    1. процессы пула по частям индекса строят граф ходов: для каждой позиции — её продолжения
+       с тем же материалом, а ходы со взятием сразу оцениваются по уже построенным базам
+       меньшего материала (они строятся первыми);
+    2. ретроградный анализ на обратном графе: от матов по уровням (полуходам) назад —
+       предшественник проигранной позиции выигран, а позиция, все ходы из которой ведут
+       к выигрышу соперника, проиграна. Что не решилось, — ничья.
+Результат — плоский файл <материал>.tb: заголовок и по байту на позицию (см. ниже).
+Tablebase открывает файлы через mmap, и probe стоит O(1): найти фигуры на доске и прочитать байт.
+
+Пример:
+    python tablebase.py generate KRvK --dir tables --workers 4
+    python tablebase.py info KRvK --dir tables
+    python tablebase.py probe --fen "K7/1R6/2k5/8/8/8/8/8 w" --dir tables
+    python chess_my.py --tablebase tables
+
+Не всякий материал выигрывает: Командир прыгает ровно на 2 клетки и не может ни отрезать
+короля, ни дать мат вплотную, поэтому KCvK целиком ничейная (как и KvK). В KRvK самый
+долгий мат — 31 полуход (например, "K7/1R6/2k5/8/8/8/8/8 w").
+"""
+import argparse
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+from chess_my import COLORS, FEN_PIECES, PIECE_TYPES, Board, Kamikaze, King
+
+MAGIC = b"CTB1"
+# Заголовок файла: MAGIC и название материала
+HEADER = struct.Struct("<4s12s")
+MAX_PIECES = 3
+# Значение позиции (с точки зрения того, кто ходит), один байт:
+DRAW = 0 # ничья; 1..MAX_DTM — выигрыш, мат через столько полуходов
+LOSS = 128 # LOSS + n — проигрыш, мат через n полуходов (LOSS + 0 — уже мат)
+INVALID = 255 # недостижимая позиция: фигуры на одной клетке или под шахом тот, кто не ходит
+MAX_DTM = 126
+# Состояние позиции в графе ходов при построении (кроме LOSS — мат и INVALID)
+STALEMATE = 1
+# Позиций в одной задаче для процесса пула
+CHUNK = 4096
+
+# База процесса-исполнителя с уже построенными базами меньшего материала
+_worker_tablebase = None
+
+
+def material_sort_key(item):
+    """
+    Порядок фигур в материале: сначала белые, потом чёрные; у каждого цвета король первым.
+    Удаление фигур этот порядок не меняет, поэтому индекс позиции после взятия
+    строится из того же списка клеток.
+    """
+    color, piece_type = item
+    return COLORS.index(color), 0 if piece_type is King else 1 + PIECE_TYPES.index(piece_type)
+
+
+def parse_material(name):
+    """
+    'KCvK' -> ((color, тип фигуры), ...) в порядке material_sort_key.
+    :param name:
+    :return:
+    """
+    sides = name.split('v')
+    if len(sides) != 2:
+        raise ValueError(f"Материал записывается как 'KCvK' (белые v чёрные), а не {name!r}.")
+    material = []
+    for color, letters in zip(COLORS, sides):
+        if letters.upper().count('K') != 1:
+            raise ValueError(f"У каждой стороны должен быть ровно один король: {name!r}.")
+        for letter in letters.upper():
+            piece_type = FEN_PIECES.get(letter)
+            if piece_type is None:
+                raise ValueError(f"Неизвестная фигура {letter!r} в материале {name!r}.")
+            material.append((color, piece_type))
+    if len(material) > MAX_PIECES:
+        raise ValueError(f"Базы строятся не больше чем для {MAX_PIECES} фигур, в {name!r} их {len(material)}.")
+    return tuple(sorted(material, key=material_sort_key))
+
+
+def material_name(material):
+    """
+    Каноническое название материала: 'KCvK'.
+    """
+    sides = []
+    for color in COLORS:
+        sides.append("".join(piece_type.letter for piece_color, piece_type in material if piece_color == color))
+    return "v".join(sides)
+
+
+def sub_materials(material):
+    """
+    Все меньшие наборы, в которые материал переходит взятиями (короли остаются), от меньших к большим.
+    """
+    others = [slot for slot, (_, piece_type) in enumerate(material) if piece_type is not King]
+    result = []
+    for size in range(len(others)):
+        for removed in combinations(others, len(others) - size):
+            result.append(tuple(item for slot, item in enumerate(material) if slot not in removed))
+    return result
+
+
+def table_size(count):
+    return 2 * 64 ** count
+
+
+def encode_index(positions, turn):
+    """
+    Индекс позиции по клеткам фигур (в порядке материала) и очереди хода.
+    """
+    index = 0
+    for square in positions:
+        index = index * 64 + square
+    return index * 2 + (turn != 'white')
+
+
+def decode_index(index, count):
+    """
+    Индекс -> (клетки фигур, очередь хода).
+    """
+    turn = COLORS[index & 1]
+    index >>= 1
+    positions = [0] * count
+    for slot in range(count - 1, -1, -1):
+        index, positions[slot] = divmod(index, 64)
+    return positions, turn
+
+
+def decode_value(value):
+    """
+    Байт базы -> (результат 'win'/'draw'/'loss', число полуходов до мата) или None для INVALID.
+    """
+    if value == INVALID:
+        return None
+    if value == DRAW:
+        return 'draw', 0
+    if value < LOSS:
+        return 'win', value
+    return 'loss', value - LOSS
+
+
+class Tablebase:
+    """
+    Набор баз из каталога directory. Файлы открываются через mmap при первом обращении.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        self.tables = {} # {название материала: mmap или None, если файла нет}
+        self.files = []
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, name):
+        return os.path.join(self.directory, name + ".tb")
+
+    def table(self, name):
+        """
+        mmap файла базы (значения позиций начинаются после HEADER) или None, если такой базы нет.
+        """
+        if name not in self.tables:
+            path = self.path(name)
+            if not os.path.exists(path):
+                self.tables[name] = None
+                return None
+            count = len(parse_material(name))
+            file = open(path, 'rb')
+            # Размер проверяется до mmap: пустой файл отобразить нельзя
+            if os.fstat(file.fileno()).st_size != HEADER.size + table_size(count):
+                file.close()
+                raise ValueError(f"{path}: файл не является базой {name}.")
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, stored = HEADER.unpack_from(data, 0)
+            if magic != MAGIC or stored.rstrip(b"\0").decode() != name:
+                data.close()
+                file.close()
+                raise ValueError(f"{path}: файл не является базой {name}.")
+            self.files.append(file)
+            self.tables[name] = data
+        return self.tables[name]
+
+    def value(self, name, index):
+        """
+        Байт позиции index базы name; ValueError, если базы нет.
+        """
+        data = self.table(name)
+        if data is None:
+            raise ValueError(f"Нет базы {name} в {self.directory}.")
+        return data[HEADER.size + index]
+
+    def locate(self, board):
+        """
+        (название материала, индекс позиции) для доски или None, если фигур больше MAX_PIECES
+        или нет одного из королей.
+        """
+        found = []
+        for square, piece in enumerate(board.squares):
+            if piece is not None:
+                if len(found) == MAX_PIECES:
+                    return None
+                found.append((material_sort_key((piece.color, type(piece))), square, piece))
+        found.sort(key=lambda item: item[0])
+        material = tuple((piece.color, type(piece)) for _, _, piece in found)
+        if sum(1 for _, piece_type in material if piece_type is King) != 2 or material[0][1] is not King:
+            return None
+        return material_name(material), encode_index([square for _, square, _ in found], board.turn)
+
+    def probe(self, board):
+        """
+        Результат позиции для того, кто ходит: ('win'|'draw'|'loss', полуходов до мата)
+        или None, если базы для этого материала нет.
+        """
+        located = self.locate(board)
+        data = self.table(located[0]) if located is not None else None
+        if data is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return decode_value(data[HEADER.size + located[1]])
+
+    def best_move(self, board):
+        """
+        Лучший ход по базе: самый быстрый выигрыш, иначе ничья, иначе самый долгий проигрыш.
+        :return: (ход, результат, полуходов до мата) или None, если позиции нет в базах или ходов нет
+        """
+        best = None
+        best_rank = None
+        for move in board.legal_moves():
+            record = board.make_move(*move)
+            child = self.probe(board)
+            board.unmake_move(record)
+            if child is None:
+                return None
+            result, dtm = child
+            if result == 'loss':
+                outcome, rank = ('win', dtm + 1), (2, -dtm)
+            elif result == 'win':
+                outcome, rank = ('loss', dtm + 1), (0, dtm)
+            else:
+                outcome, rank = ('draw', 0), (1, 0)
+            if best_rank is None or rank > best_rank:
+                best, best_rank = (move,) + outcome, rank
+        return best
+
+    def search(self, board):
+        """
+        Точный ответ базы в виде chess_engine.SearchResult (для подсказки и анализа) или None.
+        Оценка как у поисковика: MATE_SCORE - полуходы до мата; depth — длина мата в полуходах.
+        """
+        from chess_engine import MATE_SCORE, SearchResult
+
+        started = time.perf_counter()
+        best = self.best_move(board)
+        if best is None:
+            return None
+        move, result, dtm = best
+        score = {'win': MATE_SCORE - dtm, 'loss': -(MATE_SCORE - dtm), 'draw': 0}[result]
+        # Главная линия: лучшие ходы обеих сторон до мата (для ничьей — только первый ход)
+        pv = [move]
+        if result != 'draw':
+            line = board.copy()
+            line.make_move(*move)
+            for _ in range(dtm - 1):
+                step = self.best_move(line)
+                if step is None:
+                    break
+                pv.append(step[0])
+                line.make_move(*step[0])
+        return SearchResult(move, score, dtm, 0, time.perf_counter() - started, tuple(pv))
+
+    def close(self):
+        for data in self.tables.values():
+            if data is not None:
+                data.close()
+        for file in self.files:
+            file.close()
+        self.tables = {}
+        self.files = []
+
+
+def _init_worker(directory):
+    global _worker_tablebase
+    _worker_tablebase = Tablebase(directory)
+
+
+def _successors(task):
+    """
+    Задача для процесса пула: граф ходов для позиций start..stop-1 базы материала name.
+    :return: (состояния, число продолжений, продолжения подряд, выигрыш взятием,
+             запрет проигрыша, нижняя граница проигрыша) — массивы по позициям
+    """
+    name, directory, start, stop = task
+    tablebase = _worker_tablebase if _worker_tablebase is not None else Tablebase(directory)
+    material = parse_material(name)
+    count = len(material)
+    pieces = [piece_type(color) for color, piece_type in material]
+    board = Board(setup=False)
+    squares = board.squares
+    states = bytearray(stop - start)
+    counts = array('I')
+    successors = array('I')
+    capture_wins = bytearray(stop - start)
+    blocked = bytearray(stop - start)
+    floors = bytearray(stop - start)
+    for offset, index in enumerate(range(start, stop)):
+        positions, turn = decode_index(index, count)
+        slots = {square: slot for slot, square in enumerate(positions)}
+        moves = ()
+        if len(slots) < count:
+            states[offset] = INVALID
+        else:
+            for slot, square in enumerate(positions):
+                squares[square] = pieces[slot]
+            board.turn = turn
+            if board.is_check(COLORS[1 - COLORS.index(turn)]):
+                states[offset] = INVALID
+            else:
+                moves = board.legal_moves()
+                if not moves:
+                    states[offset] = LOSS if board.is_check() else STALEMATE
+        internal = 0
+        other = COLORS[1 - COLORS.index(turn)]
+        for move_start, move_end in moves:
+            from_square = move_start[0] * 8 + move_start[1]
+            to_square = move_end[0] * 8 + move_end[1]
+            slot = slots[from_square]
+            child = list(positions)
+            child[slot] = to_square
+            target = slots.get(to_square)
+            if target is None:
+                successors.append(encode_index(child, other))
+                internal += 1
+                continue
+            # Взятие: позиция уходит в базу меньшего материала
+            removed = {target, slot} if isinstance(pieces[slot], Kamikaze) else {target}
+            sub = tuple(item for item_slot, item in enumerate(material) if item_slot not in removed)
+            if sum(1 for _, piece_type in sub if piece_type is King) != 2:
+                raise ValueError(f"Взятие короля в позиции {index} базы {name}.")
+            sub_positions = [square for item_slot, square in enumerate(child) if item_slot not in removed]
+            value = tablebase.value(material_name(sub), encode_index(sub_positions, other))
+            if value == INVALID:
+                raise ValueError(f"Ход из позиции {index} базы {name} ведёт в недостижимую позицию.")
+            if value == DRAW:
+                blocked[offset] = 1
+            elif value < LOSS:
+                # Соперник выигрывает: проигрыш не раньше чем через value + 1 полуходов
+                floors[offset] = max(floors[offset], value + 1)
+            else:
+                blocked[offset] = 1
+                dtm = value - LOSS + 1
+                if not capture_wins[offset] or dtm < capture_wins[offset]:
+                    capture_wins[offset] = dtm
+        counts.append(internal)
+        for square in positions:
+            squares[square] = None
+    return states, counts, successors, capture_wins, blocked, floors
+
+
+def _map_tasks(tasks, directory, workers):
+    if workers == 1:
+        _init_worker(directory)
+        yield from map(_successors, tasks)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(directory,)) as executor:
+        yield from executor.map(_successors, tasks)
+
+
+def retrograde(states, counts, successors, capture_wins, blocked, floors):
+    """
+    Ретроградный анализ по графу ходов. Позиции решаются по уровням (полуходам до мата):
+    на уровне L проигрыши делают предшественников выигрышами на уровне L + 1, а выигрыш
+    уменьшает у предшественников счётчик ещё не проигранных ходов; когда он дошёл до нуля,
+    предшественник проигран на уровне max(L + 1, граница от взятий).
+    :return: bytearray значений позиций
+    """
+    size = len(states)
+    offsets = array('I', [0]) * (size + 1)
+    total = 0
+    for index in range(size):
+        total += counts[index]
+        offsets[index + 1] = total
+    # Обратный граф: предшественники каждой позиции подряд (CSR)
+    predecessor_offsets = array('I', [0]) * (size + 1)
+    for child in successors:
+        predecessor_offsets[child + 1] += 1
+    for index in range(size):
+        predecessor_offsets[index + 1] += predecessor_offsets[index]
+    fill = array('I', predecessor_offsets)
+    predecessors = array('I', [0]) * len(successors)
+    for index in range(size):
+        for edge in range(offsets[index], offsets[index + 1]):
+            child = successors[edge]
+            predecessors[fill[child]] = index
+            fill[child] += 1
+    del fill
+
+    values = bytearray(size)
+    resolved = bytearray(size)
+    # Ходы, которые ещё не признаны выигрышными для соперника; взятие в ничью или в выигрыш
+    # для себя навсегда запрещает проигрыш
+    remaining = array('I', counts)
+    wins = [[] for _ in range(MAX_DTM + 2)]
+    losses = [[] for _ in range(MAX_DTM + 2)]
+    for index in range(size):
+        state = states[index]
+        if state == INVALID:
+            values[index] = INVALID
+            resolved[index] = 1
+        elif state == LOSS:
+            losses[0].append(index)
+        elif state == STALEMATE:
+            resolved[index] = 1
+        else:
+            if blocked[index]:
+                remaining[index] += 1
+            elif not remaining[index]:
+                # Все ходы — взятия, после которых соперник выигрывает
+                losses[floors[index]].append(index)
+            if capture_wins[index]:
+                wins[capture_wins[index]].append(index)
+
+    for level in range(MAX_DTM + 1):
+        for index in losses[level]:
+            if resolved[index]:
+                continue
+            resolved[index] = 1
+            values[index] = LOSS + level
+            for edge in range(predecessor_offsets[index], predecessor_offsets[index + 1]):
+                parent = predecessors[edge]
+                if not resolved[parent]:
+                    wins[level + 1].append(parent)
+        for index in wins[level]:
+            if resolved[index]:
+                continue
+            resolved[index] = 1
+            values[index] = level
+            for edge in range(predecessor_offsets[index], predecessor_offsets[index + 1]):
+                parent = predecessors[edge]
+                if resolved[parent]:
+                    continue
+                remaining[parent] -= 1
+                if remaining[parent] == 0:
+                    losses[max(level + 1, floors[parent])].append(parent)
+        wins[level] = losses[level] = None
+    if wins[MAX_DTM + 1] or losses[MAX_DTM + 1]:
+        raise ValueError(f"Мат длиннее {MAX_DTM} полуходов не помещается в байт базы.")
+    return values
+
+
+def generate(name, directory, workers=None, force=False, log=None):
+    """
+    Строит базу материала name (и недостающие базы меньшего материала) в каталоге directory.
+    :param name: материал, например 'KCvK'
+    :param directory:
+    :param workers: число процессов (1 — без пула, None — все ядра)
+    :param force: перестроить, даже если файл уже есть
+    :param log: поток для сообщений о ходе построения (None — без сообщений)
+    :return: путь к файлу базы
+    """
+    material = parse_material(name)
+    name = material_name(material)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, name + ".tb")
+    for sub in sub_materials(material):
+        sub_path = os.path.join(directory, material_name(sub) + ".tb")
+        if not os.path.exists(sub_path):
+            generate(material_name(sub), directory, workers, log=log)
+    if os.path.exists(path) and not force:
+        return path
+
+    started = time.perf_counter()
+    size = table_size(len(material))
+    tasks = [(name, directory, start, min(start + CHUNK, size)) for start in range(0, size, CHUNK)]
+    states = bytearray()
+    counts = array('I')
+    successors = array('I')
+    capture_wins = bytearray()
+    blocked = bytearray()
+    floors = bytearray()
+    for part in _map_tasks(tasks, directory, workers):
+        states += part[0]
+        counts.extend(part[1])
+        successors.extend(part[2])
+        capture_wins += part[3]
+        blocked += part[4]
+        floors += part[5]
+    generated = time.perf_counter()
+    values = retrograde(states, counts, successors, capture_wins, blocked, floors)
+
+    # Пишем во временный файл и переименовываем, чтобы не оставить недописанную базу
+    temporary = path + ".tmp"
+    with open(temporary, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, name.encode()))
+        f.write(values)
+    os.replace(temporary, path)
+    if log is not None:
+        print(f"{name}: {size} позиций, {len(successors)} ходов; граф {generated - started:.1f} с, "
+              f"ретроградный анализ {time.perf_counter() - generated:.1f} с", file=log)
+    return path
+
+
+def table_stats(tablebase, name):
+    """
+    Сводка по базе: число выигрышей, ничьих, проигрышей и недостижимых позиций, самый длинный мат.
+    """
+    data = tablebase.table(name)
+    if data is None:
+        raise ValueError(f"Нет базы {name} в {tablebase.directory}.")
+    histogram = [0] * 256
+    for value in data[HEADER.size:]:
+        histogram[value] += 1
+    longest = max((value for value in range(1, LOSS) if histogram[value]), default=0)
+    return {'material': name, 'positions': len(data) - HEADER.size,
+            'win': sum(histogram[1:LOSS]), 'draw': histogram[DRAW],
+            'loss': sum(histogram[LOSS:INVALID]), 'invalid': histogram[INVALID],
+            'longest_mate_plies': longest}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Эндшпильные базы chess_my.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('generate', help="построить базы")
+    build.add_argument('materials', nargs='+', help="например KCvK KHvK KXvK")
+    build.add_argument('--workers', type=int, default=None, help="число процессов (по умолчанию — все ядра)")
+    build.add_argument('--force', action='store_true', help="перестроить существующие")
+    info = commands.add_parser('info', help="сводка по базе")
+    info.add_argument('materials', nargs='+')
+    probe = commands.add_parser('probe', help="оценка позиции и лучший ход по базе")
+    probe.add_argument('--fen', required=True)
+    for command in (build, info, probe):
+        command.add_argument('--dir', default='tablebases', help="каталог с базами")
+    args = parser.parse_args(argv)
+
+    if args.command == 'generate':
+        for name in args.materials:
+            generate(name, args.dir, args.workers, args.force, log=sys.stderr)
+        return
+    tablebase = Tablebase(args.dir)
+    try:
+        if args.command == 'info':
+            for name in args.materials:
+                print(table_stats(tablebase, material_name(parse_material(name))))
+            return
+        board = Board.from_fen(args.fen)
+        result = tablebase.probe(board)
+        if result is None:
+            print("Позиции нет в базах (или она недостижима).")
+            return
+        best = tablebase.best_move(board)
+        move = (Board.coords_to_algebraic(best[0][0]) + Board.coords_to_algebraic(best[0][1])) if best else "-"
+        print(f"{result[0]}, мат через {result[1]} полуходов; лучший ход {move}")
+    finally:
+        tablebase.close()
+
+
+if __name__ == "__main__":
+    main()
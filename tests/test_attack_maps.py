@@ -0,0 +1,43 @@
+"""
+Карты атак: инкрементальное обновление при make/unmake и подсветка фигур под боем.
+"""
+import random
+
+from chess_my import AttackMaps, Board
+
+
+def test_attack_maps_follow_make_and_unmake():
+    rng = random.Random(3)
+    board = Board()
+    board.enable_attack_maps()
+    records = []
+    for _ in range(60):
+        moves = board.legal_moves()
+        if not moves:
+            break
+        records.append(board.make_move(*rng.choice(moves)))
+        assert board.attack_maps.counts == AttackMaps(board).counts
+    while records:
+        board.unmake_move(records.pop())
+        assert board.attack_maps.counts == AttackMaps(board).counts
+
+
+def test_maps_agree_with_direct_attack_checks():
+    rng = random.Random(8)
+    board = Board()
+    for _ in range(40):
+        board.make_move(*rng.choice(board.legal_moves()))
+    plain = Board.from_fen(board.to_fen())
+    board.enable_attack_maps()
+    for color in ('white', 'black'):
+        assert board.attacked_mask(color) == plain.attacked_mask(color)
+        assert board.threatened_pieces(color) == plain.threatened_pieces(color)
+        for index in range(64):
+            assert board.attack_count(index, color) == plain.attack_count(index, color)
+
+
+def test_threatened_pieces():
+    # Чёрная ладья e7 бьёт белого Чемпиона на e2
+    board = Board.from_fen("4k3/4r3/8/8/8/8/4H3/K7 w")
+    assert board.threatened_pieces('white') == [(6, 4)]
+    assert board.threatened_pieces('black') == []
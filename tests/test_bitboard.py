@@ -0,0 +1,13 @@
+"""
+Сверка битбордовых генераторов с chess_my / checkers_my на случайных партиях (уменьшенный размер).
+"""
+import checkers_bitboard
+import chess_bitboard
+
+
+def test_chess_bitboard_cross_check():
+    assert chess_bitboard.random_cross_check(games=5, max_plies=60, seed=1) > 0
+
+
+def test_checkers_bitboard_cross_check():
+    assert checkers_bitboard.random_cross_check(games=6, max_plies=60, seed=1) > 0
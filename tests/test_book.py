@@ -0,0 +1,54 @@
+"""
+Книга позиций: какие ходы книги играются вместо поиска.
+"""
+from book import OpeningBook, collect, read_games, write_book
+from chess_my import Board
+
+
+def parse(text):
+    return Board.algebraic_to_coords(text[:2]), Board.algebraic_to_coords(text[2:])
+
+
+def build(tmp_path, games, min_count=1):
+    stats, played, invalid = collect([([parse(move) for move in moves], result) for moves, result in games])
+    assert invalid == 0
+    path = str(tmp_path / "test.cbk")
+    write_book(stats, path, min_count=min_count)
+    return path
+
+
+def test_search_requires_count_and_non_negative_average(tmp_path):
+    # b2b4 сыгран часто, но проигрывает; g1f3 реже, но в среднем не проигрывает; c2c3 сыгран один раз
+    games = [(['b2b4'], -1)] * 5 + [(['g1f3'], 1)] * 3 + [(['g1f3'], -1)] + [(['c2c3'], 1)]
+    with OpeningBook(build(tmp_path, games)) as book:
+        moves = book.lookup(Board())
+        assert [entry.count for entry in moves] == [5, 4, 1]
+        result = book.search(Board())
+        assert result.move == parse('g1f3')
+        # Оценки у книги нет
+        assert result.score == 0
+
+
+def test_search_falls_back_when_nothing_qualifies(tmp_path):
+    games = [(['b2b4'], -1)] * 5 + [(['c2c3'], 1)] * 2
+    with OpeningBook(build(tmp_path, games)) as book:
+        assert book.lookup(Board())
+        assert book.search(Board()) is None
+
+
+def test_build_drops_rare_moves_by_default(tmp_path):
+    stats, _, _ = collect([([parse('b2b4')], 0)] * 3 + [([parse('c2c3')], 0)])
+    path = str(tmp_path / "default.cbk")
+    assert write_book(stats, path) == 1
+
+
+def test_read_games_skips_malformed_lines(tmp_path, capsys):
+    path = tmp_path / "games.jsonl"
+    path.write_text('{"moves": [1, 2]}\n'
+                    '{"type": "checkers", "moves": ["c3d4"]}\n'
+                    '[1, 2]\n'
+                    '{"moves": ["b2b4", "g7g5"], "result": "1-0"}\n'
+                    'b2b4 g7g5 0-1\n', encoding='utf-8')
+    games = list(read_games(str(path)))
+    assert games == [([parse('b2b4'), parse('g7g5')], 1), ([parse('b2b4'), parse('g7g5')], -1)]
+    assert capsys.readouterr().err.count("пропущена") == 2
@@ -0,0 +1,40 @@
+"""
+Ленивая проверка ходов: can_move и кэш ходов позиции против get_valid_moves.
+"""
+import random
+
+from chess_my import Board
+
+
+def random_position(seed, plies):
+    rng = random.Random(seed)
+    board = Board()
+    for _ in range(plies):
+        moves = board.legal_moves()
+        if not moves:
+            break
+        board.make_move(*rng.choice(moves))
+    return board
+
+
+def test_can_move_matches_get_valid_moves():
+    for seed, plies in ((11, 30), (12, 0), (13, 60)):
+        board = random_position(seed, plies)
+        for index, piece in enumerate(board.squares):
+            start = divmod(index, 8)
+            expected = set(piece.get_valid_moves(board, *start)) if piece is not None else set()
+            assert set(board.valid_moves(*start)) == expected
+            for end_index in range(64):
+                end = divmod(end_index, 8)
+                assert bool(board.can_move(start, end)) == (end in expected)
+        assert not board.can_move((6, 1), (8, 1))
+
+
+def test_move_cache_follows_position():
+    board = Board()
+    before = board.valid_moves(6, 1)
+    record = board.make_move((6, 2), (4, 2))
+    # Расстановка изменилась — кэш пересчитан, а после отката снова совпадает с исходным
+    assert set(board.valid_moves(6, 1)) == set(board.get_piece(6, 1).get_valid_moves(board, 6, 1))
+    board.unmake_move(record)
+    assert board.valid_moves(6, 1) == before
@@ -0,0 +1,29 @@
+"""
+Поисковик checkers_engine: доказанные оценки в таблицах транспозиций.
+"""
+import pytest
+
+import checkers_my
+from checkers_engine import MATE_SCORE, Engine, _from_table, _to_table
+
+# Окончания, где у ходящего доказанный проигрыш (больше ENDGAME_PIECES шашек — обычный поиск)
+LOST_POSITIONS = {
+    "8/M1m1K3/8/8/7M/M7/1M6/M7 b": -(MATE_SCORE - 4),
+    "8/2M5/3M4/m7/5m1M/M1K5/1M6/8 b": -(MATE_SCORE - 6),
+    "1m3m2/8/3m1m2/k3m3/8/M7/8/M7 w": -(MATE_SCORE - 6),
+}
+
+
+def test_table_scores_round_trip():
+    # Оценки без доказанного результата (в том числе ничья) не сдвигаются
+    for score in (0, 37, -412):
+        assert _to_table(score, 9) == score
+    assert _from_table(_to_table(MATE_SCORE - 7, 3), 1) == MATE_SCORE - 5
+    assert _from_table(_to_table(-(MATE_SCORE - 7), 3), 5) == -(MATE_SCORE - 9)
+
+
+@pytest.mark.parametrize('fen, score', sorted(LOST_POSITIONS.items()))
+def test_lost_positions_with_warm_tables(fen, score):
+    engine = Engine(tt_size=1 << 14)
+    for depth in (12, 8, 12):
+        assert engine.search(checkers_my.Board.from_fen(fen), time_limit=None, max_depth=depth).score == score
@@ -0,0 +1,48 @@
+"""
+Ходы в checkers_my.Game: неоднозначные цепочки взятий.
+"""
+import pytest
+
+import checkers_my
+
+# Белая шашка f2 бьёт до d8 двумя цепочками: через c5 и c7 или через e5 и e7 (e3 — в обеих)
+AMBIGUOUS = "1m5m/2m1m3/8/2m1m3/8/2M1m1M1/3m1M1M/8 w"
+START, END = (6, 5), (0, 3)
+
+
+def make_game(fen):
+    game = checkers_my.Game(render='headless')
+    game.board = checkers_my.Board.from_fen(fen)
+    game.current_turn = game.board.turn
+    return game
+
+
+def test_ambiguous_capture_requires_choice():
+    game = make_game(AMBIGUOUS)
+    assert len(game.find_moves(START, END)) == 2
+    with pytest.raises(ValueError):
+        game.find_move(START, END)
+    valid, message = game.play_move(START, END)
+    assert not valid and "c5" in message and "e5" in message
+    # Отказ не меняет позицию
+    assert game.board.to_fen().split()[0] == AMBIGUOUS.split()[0]
+
+
+@pytest.mark.parametrize('captured', [[(3, 2), (1, 2), (5, 4)], [(5, 4), (3, 4), (1, 4)]])
+def test_chosen_capture_is_played(captured):
+    game = make_game(AMBIGUOUS)
+    valid, _ = game.play_move(START, END, captured)
+    assert valid
+    for row, col in captured:
+        assert game.board.get_piece(row, col) is None
+    assert game.current_turn == 'black'
+
+
+def test_wrong_capture_set_is_rejected():
+    game = make_game(AMBIGUOUS)
+    assert game.play_move(START, END, [(5, 4)]) == (False, "Некорректный ход.")
+
+
+def test_unique_move_needs_no_choice():
+    game = checkers_my.Game(render='headless')
+    assert game.play_move((5, 2), (4, 3)) == (True, "")
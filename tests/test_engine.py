@@ -0,0 +1,57 @@
+"""
+Поисковик chess_engine: оценки мата через таблицу транспозиций и порядок взятий.
+"""
+import random
+
+from chess_engine import MATE_SCORE, Engine, _from_table, _to_table
+from chess_my import Board
+
+
+def test_table_scores_round_trip():
+    for score in (0, 150, -150, MATE_SCORE - 3, -(MATE_SCORE - 5)):
+        assert _from_table(_to_table(score, 7), 7) == score
+    # Мат, найденный в узле на глубине 4, из узла на глубине 2 ближе на два полухода
+    assert _from_table(_to_table(MATE_SCORE - 5, 4), 2) == MATE_SCORE - 3
+
+
+def test_mate_score_with_warm_table():
+    board = Board.from_fen("4k3/8/4K3/8/8/8/8/R7 w")
+    engine = Engine(tt_size=1 << 12)
+    first = engine.search(board, time_limit=None, max_depth=4)
+    assert first.score == MATE_SCORE - 1
+    assert first.move == ((7, 0), (0, 0))
+    # Повторный поиск берёт оценки из таблицы — расстояние до мата не должно измениться
+    second = engine.search(board, time_limit=None, max_depth=4)
+    assert second.score == MATE_SCORE - 1
+
+
+def test_mate_in_two_distance():
+    board = Board.from_fen("6k1/8/6K1/8/8/8/8/1R6 w")
+    engine = Engine(tt_size=1 << 12)
+    result = engine.search(board, time_limit=None, max_depth=5)
+    assert result.score in (MATE_SCORE - 1, MATE_SCORE - 3)
+    for _ in range(2):
+        assert engine.search(board, time_limit=None, max_depth=5).score == result.score
+
+
+def test_kamikaze_capture_pays_for_itself():
+    # Пешку на b5 могут взять Камикадзе с b2 и ладья с h5; взрыв уносит и самого Камикадзе
+    board = Board.from_fen("4k3/8/8/1p5R/8/8/1X6/4K3 w")
+    kamikaze = ((6, 1), (3, 1))
+    rook = ((3, 7), (3, 1))
+    assert kamikaze in board.legal_moves() and rook in board.legal_moves()
+    assert Engine._mvv_lva(board, kamikaze) < Engine._mvv_lva(board, rook)
+
+
+def test_legal_captures_match_legal_moves():
+    rng = random.Random(4)
+    for _ in range(30):
+        board = Board()
+        for _ in range(80):
+            moves = board.legal_moves()
+            if not moves:
+                break
+            squares = board.squares
+            expected = sorted(move for move in moves if squares[move[1][0] * 8 + move[1][1]] is not None)
+            assert sorted(board.legal_captures()) == expected
+            board.make_move(*rng.choice(moves))
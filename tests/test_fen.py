@@ -0,0 +1,56 @@
+"""
+FEN для досок chess_my и checkers_my: запись, чтение и ошибки разбора.
+"""
+import random
+
+import pytest
+
+import checkers_my
+import chess_my
+
+
+def test_chess_start_position():
+    assert chess_my.Board().to_fen() == chess_my.START_FEN
+    board = chess_my.Board.from_fen(chess_my.START_FEN)
+    assert board.squares == chess_my.Board().squares
+    assert board.zobrist_key == chess_my.Board().zobrist_key
+
+
+def test_chess_round_trip_on_random_games():
+    rng = random.Random(7)
+    board = chess_my.Board()
+    for _ in range(80):
+        moves = board.legal_moves()
+        if not moves:
+            break
+        board.make_move(*rng.choice(moves))
+        restored = chess_my.Board.from_fen(board.to_fen())
+        assert restored.to_fen() == board.to_fen()
+        assert restored.zobrist_key == board.zobrist_key
+
+
+def test_extra_fields_are_ignored():
+    board = chess_my.Board.from_fen("4k3/8/8/8/8/8/3C4/4K3 b - - 0 1")
+    assert board.turn == 'black'
+    assert board.to_fen() == "4k3/8/8/8/8/8/3C4/4K3 b"
+
+
+@pytest.mark.parametrize('fen', ["", "8/8/8 w", "4k3/8/8/8/8/8/3Z4/4K3 w", "4k3/8/8/8/8/8/8/4K3 x",
+                                 "4k4/8/8/8/8/8/8/4K3 w"])
+def test_chess_malformed_fen(fen):
+    with pytest.raises(ValueError):
+        chess_my.Board.from_fen(fen)
+
+
+def test_checkers_round_trip():
+    board = checkers_my.Board()
+    assert board.to_fen() == checkers_my.START_FEN
+    rng = random.Random(3)
+    for _ in range(40):
+        moves = board.generate_moves(board.turn)
+        if not moves:
+            break
+        board.make_move(*rng.choice(moves))
+        restored = checkers_my.Board.from_fen(board.to_fen())
+        assert restored.to_fen() == board.to_fen()
+        assert restored.turn == board.turn
@@ -0,0 +1,111 @@
+"""
+Дерево вариантов GameTree: ветвление, undo/redo по последнему посещённому продолжению,
+goto между именованными вариантами и общее начало вариантов.
+"""
+from chess_my import Board, GameTree, MoveRecord, TreeNode
+
+MAIN = [((6, 1), (4, 1)), ((1, 6), (3, 6)), ((7, 1), (5, 2)), ((0, 1), (2, 2))]
+SIDE = [((6, 4), (4, 4)), ((1, 1), (3, 1))]
+
+
+def positions(moves):
+    """
+    (FEN, ключ) после каждого префикса moves, посчитанные на отдельной доске.
+    """
+    board = Board()
+    result = [(board.to_fen(), board.zobrist_key)]
+    for move in moves:
+        board.make_move(*move)
+        result.append((board.to_fen(), board.zobrist_key))
+    return result
+
+
+def state(board):
+    return board.to_fen(), board.zobrist_key
+
+
+def test_branching_undo_redo_and_goto():
+    board = Board()
+    tree = GameTree()
+    main_positions = positions(MAIN)
+    for ply, move in enumerate(MAIN, 1):
+        tree.play(board, *move)
+        assert state(board) == main_positions[ply]
+    tree.name('main')
+
+    # Возвращаемся на два хода и играем другой вариант от общего начала
+    assert tree.undo(board, 2) == 2
+    assert state(board) == main_positions[2]
+    branch = tree.current
+    side_moves = MAIN[:2] + SIDE
+    side_positions = positions(side_moves)
+    for ply, move in enumerate(SIDE, 3):
+        tree.play(board, *move)
+        assert state(board) == side_positions[ply]
+    tree.name('side')
+    # Общее начало хранится один раз: 4 узла главной линии и 2 узла второго варианта
+    assert len(tree) == 6
+    assert len(branch.children) == 2
+    assert tree.path('side') == side_moves and tree.path('main') == MAIN
+
+    # goto между вариантами через общего предка
+    tree.goto(board, 'main')
+    assert state(board) == main_positions[4] and tree.current is tree.find('main')
+    tree.goto(board, 'side')
+    assert state(board) == side_positions[4]
+
+    # redo идёт по последнему посещённому продолжению
+    tree.undo(board, 2)
+    assert tree.current is branch
+    assert tree.redo(board, 5) == 2
+    assert state(board) == side_positions[4]
+    tree.goto(board, 'main')
+    tree.undo(board, 2)
+    assert tree.redo(board) == 1
+    assert state(board) == main_positions[3]
+
+    # Переход по номеру узла и в начало партии
+    tree.goto(board, tree.find('side').parent.id)
+    assert state(board) == side_positions[3]
+    tree.goto(board, 0)
+    assert state(board) == main_positions[0]
+    assert tree.undo(board) == 0
+
+
+def test_tree_stores_records_not_boards():
+    board = Board()
+    tree = GameTree()
+    for move in MAIN:
+        tree.play(board, *move)
+    for node in tree.nodes.values():
+        assert isinstance(node, TreeNode)
+        values = [getattr(node, name) for name in TreeNode.__slots__]
+        assert not any(isinstance(value, Board) for value in values)
+        if node.record is not None:
+            assert isinstance(node.record, MoveRecord)
+            assert not any(isinstance(getattr(node.record, name), Board) for name in MoveRecord.__slots__)
+
+
+def test_replaying_an_existing_move_reuses_the_node():
+    board = Board()
+    tree = GameTree()
+    first = tree.play(board, *MAIN[0])
+    tree.undo(board)
+    assert tree.play(board, *MAIN[0]) is first
+    assert len(tree) == 1
+
+
+def test_format_marks_names_and_current_line():
+    board = Board()
+    tree = GameTree()
+    for move in MAIN:
+        tree.play(board, *move)
+    tree.name('main')
+    tree.undo(board, 2)
+    for move in SIDE:
+        tree.play(board, *move)
+    tree.name('side')
+    lines = tree.format().splitlines()
+    assert len(lines) == 2
+    assert lines[0].startswith("  #4:") and "(main)" in lines[0]
+    assert lines[1].startswith("* #6:") and "[b7b5](side)" in lines[1]
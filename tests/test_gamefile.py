@@ -0,0 +1,64 @@
+"""
+Двоичный архив партий: запись, чтение через mmap и перевод в дерево вариантов Game и обратно.
+"""
+import random
+
+import pytest
+
+from chess_my import Board, Game, GameTree
+from gamefile import GameArchive, GameWriter, moves_to_tree, restore_game, tree_to_moves
+
+
+def play_random(board, tree, rng, plies):
+    for _ in range(plies):
+        moves = board.legal_moves()
+        if not moves:
+            break
+        tree.play(board, *rng.choice(moves))
+
+
+def test_archive_round_trip(tmp_path):
+    rng = random.Random(2)
+    games = []
+    path = tmp_path / "games.cmg"
+    with GameWriter(str(path)) as writer:
+        for index in range(4):
+            start = Board.from_fen("4k3/8/8/8/8/8/3C4/4K3 w") if index == 3 else None
+            board = start.copy() if start is not None else Board()
+            tree = GameTree()
+            play_random(board, tree, rng, 30)
+            writer.add_tree(tree, start=start)
+            games.append((tree_to_moves(tree), board.to_fen()))
+        writer.add_game([])
+    with GameArchive(str(path)) as archive:
+        assert len(archive) == 5
+        for index, (moves, fen) in enumerate(games):
+            assert archive[index] == moves
+            assert archive.board(index).to_fen() == fen
+            assert archive.move(index, 0) == moves[0]
+        assert archive.plies(4) == 0
+        assert archive.board(4).to_fen() == Board().to_fen()
+
+
+def test_tree_conversion_and_restore_game():
+    rng = random.Random(5)
+    board = Board()
+    tree = GameTree()
+    play_random(board, tree, rng, 20)
+    moves = tree_to_moves(tree)
+    restored_board, restored_tree = moves_to_tree(moves)
+    assert restored_board.to_fen() == board.to_fen()
+    assert tree_to_moves(restored_tree) == moves
+
+    game = restore_game(Game(render='headless'), moves)
+    assert game.board.zobrist_key == board.zobrist_key
+    assert game.move_count == len(moves)
+    assert game.current_player == board.turn
+
+
+@pytest.mark.parametrize('content', [b"", b"CMG1", b"NOPE" + bytes(12)])
+def test_bad_archives_raise_value_error(tmp_path, content):
+    path = tmp_path / "bad.cmg"
+    path.write_bytes(content)
+    with pytest.raises(ValueError):
+        GameArchive(str(path))
@@ -0,0 +1,47 @@
+"""
+Доска chess_my на плоском массиве: Grid со словарным интерфейсом поверх Board.squares.
+"""
+import pytest
+
+from chess_my import Board, Grid, Pawn, Rook
+
+
+def test_grid_indexes_row_major():
+    board = Board()
+    for index, piece in enumerate(board.squares):
+        pos = divmod(index, 8)
+        assert board.grid.get(pos) is piece
+        assert (pos in board.grid) == (piece is not None)
+        assert board.get_piece(*pos) is piece
+    assert len(board.grid) == sum(piece is not None for piece in board.squares)
+    assert set(board.grid) == {divmod(index, 8) for index, piece in enumerate(board.squares) if piece}
+
+
+def test_grid_mapping_operations():
+    grid = Grid()
+    rook = Rook('white')
+    grid[(7, 0)] = rook
+    assert grid.squares[56] is rook and grid[(7, 0)] is rook
+    grid[(7, 0)] = Pawn('black')
+    assert isinstance(grid.squares[56], Pawn)
+    copy = grid.copy()
+    del grid[(7, 0)]
+    assert grid.squares[56] is None and (7, 0) not in grid and len(grid) == 0
+    assert (7, 0) in copy
+    # Клетки вне доски и пустые клетки в "словаре" отсутствуют
+    for pos in ((8, 0), (0, -1), (3, 3)):
+        assert pos not in grid
+        assert grid.get(pos, 'нет') == 'нет'
+        with pytest.raises(KeyError):
+            grid[pos]
+    with pytest.raises(KeyError):
+        grid[(8, 8)] = rook
+    with pytest.raises(KeyError):
+        del grid[(3, 3)]
+
+
+def test_move_piece_updates_squares():
+    board = Board()
+    board.move_piece((6, 1), (4, 1))
+    assert board.squares[6 * 8 + 1] is None
+    assert board.squares[4 * 8 + 1] is board.grid[(4, 1)]
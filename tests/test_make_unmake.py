@@ -0,0 +1,36 @@
+"""
+Ход и его откат: MoveRecord хранит только изменения, unmake_move возвращает доску назад.
+"""
+import random
+
+from chess_my import Board, MoveHistory
+
+
+def test_unmake_restores_random_games():
+    for seed in range(3):
+        rng = random.Random(seed)
+        board = Board()
+        history = MoveHistory()
+        positions = []
+        for _ in range(80):
+            moves = board.legal_moves()
+            if not moves:
+                break
+            positions.append((board.to_fen(), list(board.squares)))
+            history.add_move(board.make_move(*rng.choice(moves)))
+        while positions:
+            board.unmake_move(history.undo_move())
+            assert (board.to_fen(), list(board.squares)) == positions.pop()
+        assert history.undo_move() is None
+
+
+def test_kamikaze_explosion_is_undone():
+    board = Board.from_fen("4k3/8/8/1p5R/8/8/1X6/4K3 w")
+    before = board.to_fen()
+    record = board.make_move((6, 1), (3, 1))
+    assert record.exploded
+    # Взрыв снимает и жертву, и самого Камикадзе
+    assert board.get_piece(3, 1) is None and board.get_piece(6, 1) is None
+    assert [pos for pos, _ in record.captured] == [(3, 1)]
+    board.unmake_move(record)
+    assert board.to_fen() == before
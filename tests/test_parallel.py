@@ -0,0 +1,40 @@
+"""
+Параллельный поиск chess_parallel: итог, главная линия лучшего процесса, конечные позиции
+и передача позиции в процесс через Board.pack.
+"""
+from chess_engine import MATE_SCORE, Engine
+from chess_parallel import make_executor, parallel_search
+from chess_my import Board
+
+
+def test_parallel_search_returns_worker_pv():
+    board = Board()
+    with make_executor(2) as executor:
+        result = parallel_search(board, executor, 2, time_limit=None, max_depth=3)
+    assert result.depth == 3
+    assert result.pv[0] == result.move
+    assert len(result.pv) > 1
+    # Линия должна проигрываться ход за ходом от исходной позиции
+    for move in result.pv:
+        assert move in board.legal_moves()
+        board.make_move(*move)
+
+
+def test_terminal_positions_score_like_engine():
+    # Мат (ладья на a8, король e6) и пат (чёрный король a8 заперт ферзём на b6)
+    for fen, score in (("R3k3/8/4K3/8/8/8/8/8 b", -MATE_SCORE), ("k7/8/1Q6/8/8/8/8/4K3 b", 0)):
+        board = Board.from_fen(fen)
+        expected = Engine().search(board, time_limit=None, max_depth=2)
+        with make_executor(1) as executor:
+            result = parallel_search(board, executor, 1, time_limit=None, max_depth=2)
+        assert result.move is None and expected.move is None
+        assert result.score == expected.score == score
+
+
+def test_pack_round_trip():
+    board = Board.from_fen("r3k3/8/8/8/8/8/8/R3K2X b")
+    data = board.pack()
+    assert len(data) == 65
+    restored = Board.unpack(data)
+    assert restored.to_fen() == board.to_fen()
+    assert restored.zobrist_key == board.zobrist_key
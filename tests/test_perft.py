@@ -0,0 +1,42 @@
+"""
+Perft с закреплёнными числами узлов: любое изменение генераторов ходов, меняющее их, — ошибка.
+Для шашек числа совпадают с эталонными для английских шашек (шашки бьют только вперёд).
+"""
+import pytest
+
+from perft import divide, make_board, perft, perft_legal, perft_packed
+
+CHESS_LEGAL = {
+    None: (25, 619, 15856),
+    "4k3/8/8/8/8/8/3C4/4K3 w": (9, 45, 480),
+    "r3k3/8/8/8/8/8/8/R3K2X w": (23, 307, 6374),
+    # Чемпион e2 связан ладьёй e7
+    "4k3/4r3/8/8/8/8/4H3/4K3 w": (4, 64, 422),
+}
+# Без проверки шаха (get_valid_moves каждой фигуры)
+CHESS_PSEUDO_LEGAL = (25, 619, 15860)
+CHECKERS = (7, 49, 302, 1469)
+
+
+@pytest.mark.parametrize('fen', list(CHESS_LEGAL))
+def test_chess_legal_counts(fen):
+    board, color = make_board('chess', 'array', fen)
+    assert tuple(perft_legal(board, depth, color) for depth in (1, 2, 3)) == CHESS_LEGAL[fen]
+
+
+@pytest.mark.parametrize('representation, counter', [('array', perft), ('packed', perft_packed),
+                                                     ('bitboard', perft)])
+def test_chess_pseudo_legal_counts_agree_across_boards(representation, counter):
+    board, color = make_board('chess', representation)
+    assert tuple(counter(board, depth, color) for depth in (1, 2, 3)) == CHESS_PSEUDO_LEGAL
+
+
+@pytest.mark.parametrize('representation', ['array', 'bitboard'])
+def test_checkers_counts(representation):
+    board, color = make_board('checkers', representation)
+    assert tuple(perft(board, depth, color) for depth in (1, 2, 3, 4)) == CHECKERS
+
+
+def test_divide_sums_to_perft():
+    board, color = make_board('chess', 'array')
+    assert sum(divide(board, 2, color, perft_legal).values()) == CHESS_LEGAL[None][1]
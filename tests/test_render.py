@@ -0,0 +1,128 @@
+"""
+Рендерер: кадр 'diff', наложенный на предыдущий кадр, совпадает со свежим полным кадром.
+"""
+import random
+import re
+
+import checkers_my
+import chess_my
+from render import Renderer, cell_width, mark_threat
+
+# ANSI-последовательности, которые пишет Renderer
+ESCAPE = re.compile(r"\x1b(?:\[([0-9;]*)([A-Za-z])|([78]))")
+
+
+class Screen:
+    """
+    Простейший терминал: клетки экрана (символ и оформление), курсор и его сохранение.
+    """
+    def __init__(self):
+        self.cells = {}
+        self.line, self.column = 1, 1
+        self.saved = (1, 1)
+        self.style = ""
+
+    def feed(self, text):
+        position = 0
+        while position < len(text):
+            match = ESCAPE.match(text, position)
+            if match:
+                self._escape(*match.groups())
+                position = match.end()
+                continue
+            char = text[position]
+            position += 1
+            if char == "\n":
+                self.line, self.column = self.line + 1, 1
+                continue
+            self.cells[self.line, self.column] = (char, self.style)
+            self.column += cell_width(char)
+
+    def _escape(self, params, command, save):
+        if save == "7":
+            self.saved = (self.line, self.column)
+        elif save == "8":
+            self.line, self.column = self.saved
+        elif command == "H":
+            numbers = [int(number) for number in params.split(";")] if params else [1, 1]
+            self.line, self.column = numbers
+        elif command == "J":
+            self.cells.clear()
+        elif command == "K":
+            for key in [key for key in self.cells if key[0] == self.line and key[1] >= self.column]:
+                del self.cells[key]
+        elif command == "m":
+            self.style = "" if params in ("", "0") else params
+
+    def board_area(self, lines=10):
+        return {key: value for key, value in self.cells.items() if key[0] <= lines}
+
+
+def fresh_screen(cells, header):
+    screen = Screen()
+    renderer = Renderer('diff', out=_Sink(screen))
+    renderer.draw(cells, header)
+    return screen.board_area()
+
+
+class _Sink:
+    def __init__(self, screen):
+        self.screen = screen
+
+    def write(self, text):
+        self.screen.feed(text)
+
+    def flush(self):
+        pass
+
+
+def check_frames(frames, header):
+    screen = Screen()
+    renderer = Renderer('diff', out=_Sink(screen))
+    for cells in frames:
+        renderer.draw(cells, header)
+        assert screen.board_area() == fresh_screen(cells, header)
+
+
+def test_diff_frames_match_full_frames_chess():
+    rng = random.Random(3)
+    board = chess_my.Board()
+    frames = [board.cells()]
+    for _ in range(60):
+        moves = board.legal_moves()
+        if not moves:
+            break
+        board.make_move(*rng.choice(moves))
+        squares = [divmod(index, 8) for index, piece in enumerate(board.squares) if piece]
+        frames.append(board.cells(threats=rng.sample(squares, min(3, len(squares)))))
+    check_frames(frames, chess_my.Board.FILES_HEADER)
+
+
+def test_kamikaze_width_change_repaints_rank():
+    board = chess_my.Board()
+    before = board.cells()
+    # Камикадзе (3 столбца) уходит с a3 на a4: на обеих горизонталях сдвигаются клетки правее
+    board.make_move((5, 0), (4, 0))
+    after = board.cells()
+    assert cell_width(before[5 * 8]) != cell_width(after[5 * 8])
+    check_frames([before, after, before], chess_my.Board.FILES_HEADER)
+
+
+def test_diff_frames_match_full_frames_checkers():
+    rng = random.Random(5)
+    board = checkers_my.Board()
+    frames = [board.cells()]
+    color = 'white'
+    for _ in range(40):
+        moves = board.generate_moves(color)
+        if not moves:
+            break
+        move = rng.choice(moves)
+        board.make_move(*move)
+        frames.append(board.cells(highlight_moves=[move[1]]))
+        color = 'black' if color == 'white' else 'white'
+    check_frames(frames, checkers_my.Board.FILES_HEADER)
+
+
+def test_threat_marking_keeps_width():
+    assert cell_width(mark_threat('⸱K⸱')) == 3
@@ -0,0 +1,35 @@
+"""
+Разбор строк архива replay: записи JSON других игр и испорченные строки.
+"""
+import json
+
+import pytest
+
+from replay import iter_games, parse_line, replay_chunk
+
+
+def test_text_and_chess_json_lines():
+    assert parse_line("1. b2b4 g7g5 2. c1a3 1-0") == ['b2b4', 'g7g5', 'c1a3']
+    record = {'game': 3, 'type': 'chess', 'moves': ['b2b4', 'g7g5'], 'result': '1/2-1/2'}
+    assert parse_line(json.dumps(record)) == ['b2b4', 'g7g5']
+    assert parse_line(json.dumps({'moves': ['b2b4']})) == ['b2b4']
+
+
+@pytest.mark.parametrize('record', [{'game': 0, 'type': 'checkers', 'moves': ['c3d4']},
+                                    {'game': 'checkers', 'moves': ['c3d4']}])
+def test_other_games_are_skipped(record):
+    assert parse_line(json.dumps(record)) is None
+
+
+@pytest.mark.parametrize('line', ['["b2b4", "g7g5"]', '{"moves": "b2b4"}', '{"moves": [1, 2]}', '{"moves": ['])
+def test_malformed_json_lines(line):
+    with pytest.raises(ValueError):
+        parse_line(line)
+
+
+def test_malformed_lines_are_reported_not_raised():
+    lines = ['b2b4 g7g5', '[1, 2]', json.dumps({'type': 'checkers', 'moves': ['c3d4']}), '{"moves": ["b2b4"]}']
+    games = list(iter_games(lines))
+    assert [(index, line) for index, line, _ in games] == [(0, 1), (1, 2), (2, 4)]
+    results = replay_chunk((games, False))
+    assert [result['valid'] for result in results] == [True, False, True]
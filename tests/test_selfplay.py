@@ -0,0 +1,15 @@
+"""
+Пакетная игра selfplay: стратегия 'engine' в обеих играх.
+"""
+import random
+
+import pytest
+
+from selfplay import GAMES
+
+
+@pytest.mark.parametrize('game', sorted(GAMES))
+def test_engine_policy_plays_both_games(game):
+    result, reason, moves = GAMES[game]('engine', 'random', random.Random(1), 30)
+    assert result in ('1-0', '0-1', '1/2-1/2')
+    assert 0 < len(moves) <= 30
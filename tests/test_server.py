@@ -0,0 +1,71 @@
+"""
+Сервер партий: сессии соединения, проверка времени подсказки и ошибки пула.
+"""
+import asyncio
+import json
+
+import pytest
+
+from server import MAX_HINT_TIME, GameServer, hint_time
+
+
+@pytest.fixture
+def game_server():
+    server = GameServer(workers=1)
+    yield server
+    server.close()
+
+
+async def request(reader, writer, message):
+    writer.write((json.dumps(message) + "\n").encode())
+    await writer.drain()
+    return json.loads(await reader.readline())
+
+
+def test_sessions_are_dropped_with_their_connection(game_server):
+    async def scenario():
+        listener = await asyncio.start_server(game_server.handle_connection, '127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+        async with listener:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            kept = (await request(reader, writer, {'op': 'new', 'game': 'chess'}))['session']
+            closed = (await request(reader, writer, {'op': 'new', 'game': 'checkers'}))['session']
+            assert (await request(reader, writer, {'op': 'close', 'session': closed}))['ok']
+            assert set(game_server.sessions) == {kept}
+            # Клиент уходит, не закрыв сессию
+            writer.close()
+            await writer.wait_closed()
+            for _ in range(100):
+                if not game_server.sessions:
+                    break
+                await asyncio.sleep(0.01)
+        return game_server.sessions
+
+    assert asyncio.run(scenario()) == {}
+
+
+@pytest.mark.parametrize('value', [float('nan'), float('inf'), 0, -1.0, True, "1"])
+def test_bad_hint_times_are_rejected(game_server, value):
+    async def scenario():
+        session = (await game_server.dispatch({'op': 'new'}))['session']
+        return await game_server.dispatch({'op': 'hint', 'session': session, 'time': value})
+
+    response = asyncio.run(scenario())
+    assert response['ok'] is False
+    with pytest.raises(ValueError):
+        hint_time(value)
+
+
+def test_hint_time_is_clamped():
+    assert hint_time(0.25) == 0.25
+    assert hint_time(1e9) == MAX_HINT_TIME
+
+
+def test_pool_failure_becomes_error_response(game_server):
+    async def scenario():
+        session = (await game_server.dispatch({'op': 'new'}))['session']
+        game_server.executor.shutdown()
+        return await game_server.dispatch({'op': 'hint', 'session': session, 'time': 0.1, 'id': 7})
+
+    response = asyncio.run(scenario())
+    assert response['ok'] is False and response['id'] == 7
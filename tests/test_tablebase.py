@@ -0,0 +1,91 @@
+"""
+Эндшпильные базы: индексация позиций, построение баз KvK и KRvK, проба через mmap,
+лучшие ходы и главная линия до мата.
+"""
+import pytest
+
+from chess_engine import MATE_SCORE
+from chess_my import Board
+from tablebase import (INVALID, Tablebase, decode_index, encode_index, generate, material_name,
+                       parse_material, sub_materials, table_stats)
+
+# Самый долгий мат KRvK: 31 полуход
+LONGEST_MATE = "K7/1R6/2k5/8/8/8/8/8 w"
+
+
+def test_index_round_trip():
+    for positions, turn in (([0, 63, 17], 'white'), ([5, 9, 44], 'black'), ([60, 4], 'black')):
+        assert decode_index(encode_index(positions, turn), len(positions)) == (positions, turn)
+
+
+def test_material_names():
+    assert material_name(parse_material("KCvK")) == "KCvK"
+    assert [material_name(sub) for sub in sub_materials(parse_material("KQvK"))] == ["KvK"]
+    with pytest.raises(ValueError):
+        parse_material("KQRvK")
+
+
+def test_king_versus_king_is_drawn(tmp_path):
+    generate("KvK", str(tmp_path), workers=1)
+    tablebase = Tablebase(str(tmp_path))
+    try:
+        stats = table_stats(tablebase, "KvK")
+        # Недостижимы: короли на одной клетке (128) и рядом (420 пар клеток * 2 очереди)
+        assert stats['invalid'] == 128 + 840
+        assert stats['win'] == stats['loss'] == 0
+        assert tablebase.probe(Board.from_fen("8/8/8/3k4/8/8/8/4K3 w")) == ('draw', 0)
+        located = tablebase.locate(Board.from_fen("8/8/8/8/8/8/3k4/4K3 w"))
+        assert tablebase.value(*located) == INVALID
+        # Позиции с другим материалом в базе нет
+        assert tablebase.probe(Board.from_fen("8/8/8/3k4/8/8/3C4/4K3 w")) is None
+    finally:
+        tablebase.close()
+
+
+@pytest.fixture(scope='module')
+def rook_tablebase(tmp_path_factory):
+    # Самая дорогая проверка набора: KRvK строится около полуминуты на одном ядре
+    directory = str(tmp_path_factory.mktemp("tables"))
+    generate("KRvK", directory, workers=1)
+    tablebase = Tablebase(directory)
+    yield tablebase
+    tablebase.close()
+
+
+def test_rook_table_distances(rook_tablebase):
+    stats = table_stats(rook_tablebase, "KRvK")
+    assert stats['longest_mate_plies'] == 31
+    assert stats['win'] > 0 and stats['loss'] > 0
+    assert rook_tablebase.probe(Board.from_fen("4k3/8/4K3/8/8/8/8/R7 w")) == ('win', 1)
+    assert rook_tablebase.probe(Board.from_fen("R3k3/8/4K3/8/8/8/8/8 b")) == ('loss', 0)
+    # Одна ладья против короля: ход чёрных, ладью можно взять — ничья
+    assert rook_tablebase.probe(Board.from_fen("8/8/8/8/8/8/1kR5/7K b")) == ('draw', 0)
+
+
+def test_best_moves_mate_in_the_stored_distance(rook_tablebase):
+    board = Board.from_fen(LONGEST_MATE)
+    assert rook_tablebase.probe(board) == ('win', 31)
+    for remaining in range(31, 0, -1):
+        move, result, dtm = rook_tablebase.best_move(board)
+        assert (result, dtm) == (('win', remaining) if remaining % 2 else ('loss', remaining))
+        board.make_move(*move)
+    assert board.is_checkmate()
+
+
+def test_search_returns_mating_line(rook_tablebase):
+    board = Board.from_fen(LONGEST_MATE)
+    result = rook_tablebase.search(board)
+    assert result.score == MATE_SCORE - 31 and result.depth == 31
+    assert len(result.pv) == 31
+    for move in result.pv:
+        assert move in board.legal_moves()
+        board.make_move(*move)
+    assert board.is_checkmate()
+
+
+def test_truncated_table_file_is_rejected(tmp_path):
+    (tmp_path / "KRvK.tb").write_bytes(b"")
+    tablebase = Tablebase(str(tmp_path))
+    with pytest.raises(ValueError):
+        tablebase.probe(Board.from_fen("4k3/8/4K3/8/8/8/8/R7 w"))
+    tablebase.close()
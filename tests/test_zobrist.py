@@ -0,0 +1,52 @@
+"""
+Zobrist-ключи chess_my и таблица транспозиций.
+"""
+import random
+
+from chess_my import Board
+from transposition import EXACT, LOWER, TranspositionTable
+
+
+def test_zobrist_key_is_incremental_and_unmake_restores_it():
+    for seed in range(3):
+        rng = random.Random(seed)
+        board = Board()
+        history = []
+        for _ in range(80):
+            moves = board.legal_moves()
+            if not moves:
+                break
+            before = (board.to_fen(), board.zobrist_key)
+            history.append((before, board.make_move(*rng.choice(moves))))
+            assert board.grid.key == board.grid.compute_key()
+        for before, record in reversed(history):
+            board.unmake_move(record)
+            assert (board.to_fen(), board.zobrist_key) == before
+
+
+def test_key_depends_on_side_to_move_and_transpositions_match():
+    board = Board()
+    white_key = board.zobrist_key
+    board.turn = 'black'
+    assert board.zobrist_key != white_key
+    # Один и тот же ход разным порядком — одна позиция
+    first, second = Board(), Board()
+    for board, moves in ((first, [((7, 1), (5, 2)), ((0, 1), (2, 2)), ((7, 6), (5, 5))]),
+                         (second, [((7, 6), (5, 5)), ((0, 1), (2, 2)), ((7, 1), (5, 2))])):
+        for move in moves:
+            board.make_move(*move)
+    assert first.zobrist_key == second.zobrist_key
+
+
+def test_transposition_table_replacement():
+    table = TranspositionTable(size=5)
+    assert len(table) == 8
+    assert table.store(1, 4, 10, EXACT, 'ход')
+    assert table.probe(1)[1:5] == (4, 10, EXACT, 'ход')
+    # Другая позиция в той же ячейке с меньшей глубиной не вытесняет запись текущего поиска
+    assert not table.store(9, 2, 20, LOWER)
+    assert table.probe(9) is None
+    table.new_search()
+    assert table.store(9, 2, 20, LOWER)
+    assert table.probe(1) is None
+    assert table.stats()['replacements'] == 1
@@ -0,0 +1,101 @@
+"""
+Таблица транспозиций фиксированного размера для позиций с Zobrist-ключами
+(chess_my.Board.zobrist_key и аналогичных).
+"""
+
+# Тип оценки в записи: точная, нижняя граница (отсечение по beta), верхняя граница (не дотянули до alpha)
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class TranspositionTable:
+    """
+    Хеш-таблица на size ячеек (степень двойки), ячейка выбирается по младшим битам ключа.
+    В ячейке хранится кортеж (key, depth, value, flag, move, generation).
+
+    Политика замены: ячейку занимает запись той же позиции, запись не меньшей глубины
+    или любая запись, если старая осталась от прошлого поиска (generation).
+    Так глубокие результаты текущего поиска не вытесняются мелкими.
+    """
+    def __init__(self, size=1 << 16):
+        # Округляем размер вверх до степени двойки, чтобы индекс считался маской
+        capacity = 1
+        while capacity < size:
+            capacity <<= 1
+        self.mask = capacity - 1
+        self.entries = [None] * capacity
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.replacements = 0
+        self.rejected = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def probe(self, key):
+        """
+        Возвращает запись (key, depth, value, flag, move, generation) для позиции или None.
+        :param key:
+        :return:
+        """
+        entry = self.entries[key & self.mask]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, value, flag=EXACT, move=None):
+        """
+        Сохраняет результат анализа позиции, если это разрешает политика замены.
+        :param key:
+        :param depth: глубина, на которую посчитано value
+        :param value:
+        :param flag: EXACT, LOWER или UPPER
+        :param move: лучший найденный ход
+        :return: True, если запись сохранена
+        """
+        index = key & self.mask
+        old = self.entries[index]
+        if old is not None and old[0] != key and old[1] > depth and old[5] == self.generation:
+            self.rejected += 1
+            return False
+        if old is not None and old[0] != key:
+            self.replacements += 1
+        self.entries[index] = (key, depth, value, flag, move, self.generation)
+        self.stores += 1
+        return True
+
+    def new_search(self):
+        """
+        Помечает начало нового поиска: старые записи можно вытеснять независимо от глубины.
+        :return:
+        """
+        self.generation += 1
+
+    def clear(self):
+        self.entries = [None] * len(self.entries)
+        self.generation = 0
+        self.hits = self.misses = self.stores = self.replacements = self.rejected = 0
+
+    @property
+    def hit_rate(self):
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.0
+
+    def stats(self):
+        """
+        Статистика обращений: попадания, промахи, записи, вытеснения и заполненность.
+        :return:
+        """
+        return {
+            'size': len(self.entries),
+            'filled': len(self.entries) - self.entries.count(None),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate,
+            'stores': self.stores,
+            'replacements': self.replacements,
+            'rejected': self.rejected,
+        }